@@ -177,19 +177,21 @@ async def list_knowledge():
 
 @router.post("/knowledge")
 async def update_knowledge(item: KnowledgeItem):
-    from app.voice.knowledge import KnowledgeBase
-    kb = KnowledgeBase(settings.redis_url)
-    try:
-        await kb.seed({item.key: item.content})
-        return {"status": "success"}
-    finally:
-        await kb.close()
+    from app.voice.knowledge import get_knowledge_base
+    from app.voice.tools import clear_kb_response_cache
+    await get_knowledge_base().seed({item.key: item.content})
+    clear_kb_response_cache()
+    return {"status": "success"}
 
 @router.delete("/knowledge/{key}")
 async def delete_knowledge(key: str):
+    from app.voice.knowledge import DOC_PREFIX, VECTOR_PREFIX, clear_query_cache
+    from app.voice.tools import clear_kb_response_cache
     r = redis.from_url(settings.redis_url)
     try:
-        await r.delete(f"knowledge:{key}")
+        await r.delete(f"{DOC_PREFIX}{key}", f"{VECTOR_PREFIX}{key}")
+        await clear_query_cache(r)
+        clear_kb_response_cache()
         return {"status": "success"}
     finally:
         await r.close()
@@ -267,14 +269,12 @@ async def approve_candidate(cand_id: str):
             return {"status": "error", "message": "Candidate not found"}
         
         # Add to KB
-        from app.voice.knowledge import KnowledgeBase
-        kb = KnowledgeBase(settings.redis_url)
-        try:
-            # generating a key from the question or just the cand_id
-            key = f"faq_{hash(data['question']) % 10000}"
-            await kb.seed({key: data['answer']})
-        finally:
-            await kb.close()
+        from app.voice.knowledge import get_knowledge_base
+        from app.voice.tools import clear_kb_response_cache
+        # generating a key from the question or just the cand_id
+        key = f"faq_{hash(data['question']) % 10000}"
+        await get_knowledge_base().seed({key: data['answer']})
+        clear_kb_response_cache()
         
         # Remove from candidates list and hash
         await r.lrem("candidates:knowledge", 0, cand_id)
@@ -2,17 +2,22 @@
 
 import sys
 import os
+import types
 from pathlib import Path
-from unittest.mock import MagicMock
 
-# Aggressive Sentry Hub monkeypatch for Sentry 2.x compatibility during pytest discovery
+# Aggressive Sentry Hub monkeypatch for Sentry 2.x compatibility during pytest discovery.
+# The stand-in modules are plain ModuleType sentinels exposing only Hub, so
+# attribute lookups during collection do not build MagicMock child trees.
 if "pytest" in sys.modules or os.getenv("PYTEST_CURRENT_TEST"):
     try:
         import sentry_sdk
         if not hasattr(sentry_sdk, "Hub"):
+            from unittest.mock import MagicMock
             sentry_sdk.Hub = MagicMock()
-        sys.modules['sentry_sdk.hub'] = MagicMock()
-        sys.modules['sentry_sdk.Hub'] = MagicMock()
+        for _name in ("sentry_sdk.hub", "sentry_sdk.Hub"):
+            _stub = types.ModuleType(_name)
+            _stub.Hub = sentry_sdk.Hub
+            sys.modules[_name] = _stub
     except ImportError:
         pass
 
@@ -51,6 +56,9 @@ class Settings(BaseSettings):
     
     # Phase 5: Learning Engine
     wandb_api_key: str = ""
+    # Weave tracing of the voice agent and its tool calls; off skips span
+    # creation and serialization on the call path entirely
+    weave_enabled: bool = True
     redis_stream_analysis: str = "call:analysis"
 
     # Logging
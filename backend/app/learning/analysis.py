@@ -26,28 +26,50 @@ class PIIFilter:
     # Date of Birth (Simple formats)
     DOB_REGEX = r"\b(0[1-9]|1[0-2])[- /](0[1-9]|[12][0-9]|3[01])[- /](19|20)\d{2}\b"
 
+    # Compiled once, in redaction order (each pass sees the previous
+    # passes' output, so overlapping matches resolve the same way)
+    _REDACTIONS = tuple(
+        (re.compile(pattern), token) for pattern, token in (
+            (SSN_REGEX, "[SSN]"),
+            (PHONE_REGEX, "[PHONE]"),
+            (EMAIL_REGEX, "[EMAIL]"),
+            (CC_REGEX, "[CC]"),
+            (DOB_REGEX, "[DOB]"),
+        )
+    )
+    # Any of the above, in one scan: matches iff some pattern does
+    _ANY_PII_RE = re.compile("|".join(
+        f"(?:{pattern})"
+        for pattern in (SSN_REGEX, PHONE_REGEX, EMAIL_REGEX, CC_REGEX, DOB_REGEX)
+    ))
+
     @classmethod
     def redact(cls, text: str) -> str:
         """Redact PII from text."""
         if not text:
             return ""
-        text = re.sub(cls.SSN_REGEX, "[SSN]", text)
-        text = re.sub(cls.PHONE_REGEX, "[PHONE]", text)
-        text = re.sub(cls.EMAIL_REGEX, "[EMAIL]", text)
-        text = re.sub(cls.CC_REGEX, "[CC]", text)
-        text = re.sub(cls.DOB_REGEX, "[DOB]", text)
+        # Most text is clean: one scan and it is returned as-is
+        if not cls._ANY_PII_RE.search(text):
+            return text
+        for pattern, token in cls._REDACTIONS:
+            text = pattern.sub(token, text)
         return text
 
+    # Redaction markers that disqualify a knowledge candidate outright,
+    # matched by one precompiled alternation however many are listed
+    DROP_MARKERS = ("[SSN]",)
+    _DROP_RE = re.compile("|".join(map(re.escape, DROP_MARKERS)))
+
+    @classmethod
+    def has_drop_marker(cls, *texts: str) -> bool:
+        """Check if any text contains a DROP_MARKERS token."""
+        search = cls._DROP_RE.search
+        return any(search(t) for t in texts)
+
     @classmethod
     def contains_pii(cls, text: str) -> bool:
         """Check if text contains potential PII."""
-        return (
-            bool(re.search(cls.SSN_REGEX, text)) or
-            bool(re.search(cls.PHONE_REGEX, text)) or
-            bool(re.search(cls.EMAIL_REGEX, text)) or
-            bool(re.search(cls.CC_REGEX, text)) or
-            bool(re.search(cls.DOB_REGEX, text))
-        )
+        return cls._ANY_PII_RE.search(text) is not None
 
 # --- Data Models ---
 
@@ -79,8 +101,13 @@ from google import genai
 from google.genai import types
 
 class CallAnalyzer:
-    def __init__(self):
-        self.client = genai.Client(api_key=settings.gemini_api_key)
+    def __init__(self, client: Optional[genai.Client] = None):
+        # Pass a long-lived client to reuse its connection pool across calls
+        self.client = client or genai.Client(api_key=settings.gemini_api_key)
+
+    async def close(self):
+        """Close the client's async HTTP session."""
+        await self.client.aio.aclose()
 
     @weave.op()
     async def analyze_transcript(self, call_id: str, transcript: str) -> CallAnalysis:
@@ -104,13 +131,9 @@ class CallAnalyzer:
         """
         
         try:
-            # google-genai generate_content is synchronous in v0.x
-            # or we check for async client. 
-            # Given the previous context, I'll use to_thread if needed, 
-            # but let's see if we can use the async client if available in future.
-            # For now, following the user's Client usage.
-            
-            response = self.client.models.generate_content(
+            # Async client: keeps the event loop free, so concurrent analyses
+            # (see worker.py) overlap on one pooled HTTP session
+            response = await self.client.aio.models.generate_content(
                 model="gemini-2.0-flash",
                 contents=f"Transcript:\n{transcript}",
                 config=types.GenerateContentConfig(
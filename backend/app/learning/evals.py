@@ -5,7 +5,7 @@ Uses Weave to score prompts and OpenAI to optimize them.
 import json
 import logging
 import weave
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 from app.config import settings
 from app.voice.prompt_manager import PromptManager
 
@@ -21,8 +21,8 @@ class TestCase(weave.Object):
     expected_tools: List[str]
 
 class Evaluator:
-    def __init__(self):
-        self.client = genai.Client(api_key=settings.gemini_api_key)
+    def __init__(self, client: Optional[genai.Client] = None):
+        self.client = client or genai.Client(api_key=settings.gemini_api_key)
 
     @weave.op()
     async def score_interaction(self, target_prompt: str, test_case: TestCase) -> float:
@@ -57,10 +57,11 @@ class Evaluator:
             return 0.0
 
 class PromptOptimizer:
-    def __init__(self, prompt_manager: PromptManager):
+    def __init__(self, prompt_manager: PromptManager, client: Optional[genai.Client] = None):
         self.pm = prompt_manager
-        self.evaluator = Evaluator()
-        self.client = genai.Client(api_key=settings.gemini_api_key)
+        # Revision and scoring share one client (and its connection pool)
+        self.client = client or genai.Client(api_key=settings.gemini_api_key)
+        self.evaluator = Evaluator(self.client)
 
     async def optimize_and_gate(self, call_id: str, transcript: str, current_prompt: str):
         """
@@ -2,6 +2,7 @@
 
 Creates FastAPI app with:
 - Redis connection lifecycle (connect on startup, close on shutdown)
+- Shared KnowledgeBase closed on shutdown
 - HIPAA audit logging middleware
 - CORS middleware (dev: allow all origins)
 - Health check endpoint
@@ -55,6 +56,8 @@ async def lifespan(app: FastAPI):
     yield
 
     # Shutdown
+    from app.voice.knowledge import close_knowledge_base
+    await close_knowledge_base()
     await app.state.redis.close()
     logger.info("Redis disconnected")
 
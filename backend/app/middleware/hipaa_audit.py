@@ -4,10 +4,11 @@ Logs every request to PHI-related endpoints with structured JSON including
 timestamp, caller identity, resource accessed, HTTP method, and response status.
 """
 
-import json
 import logging
 import time
 
+import orjson
+
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import Response
@@ -43,8 +44,10 @@ class HIPAAAuditMiddleware(BaseHTTPMiddleware):
         response = await call_next(request)
         duration_ms = (time.time() - start_time) * 1000
 
-        # Only log requests to PHI-related paths
-        if any(request.url.path.startswith(prefix) for prefix in PHI_PATHS):
+        # Only log requests to PHI-related paths (and only if anyone listens)
+        if logger.isEnabledFor(logging.INFO) and any(
+            request.url.path.startswith(prefix) for prefix in PHI_PATHS
+        ):
             audit_entry = {
                 "event": "phi_access",
                 "timestamp": time.time(),
@@ -55,6 +58,6 @@ class HIPAAAuditMiddleware(BaseHTTPMiddleware):
                 "status_code": response.status_code,
                 "duration_ms": round(duration_ms, 2),
             }
-            logger.info(json.dumps(audit_entry))
+            logger.info(orjson.dumps(audit_entry).decode())
 
         return response
@@ -67,6 +67,8 @@ async def create_call(request: CreateCallRequest):
             "provider_id": request.provider_id,
             "state": "ringing" # Assort Health specific
         }
+        # A field Daily left out is simply not stored (call hash fields are strings)
+        initial_state = {k: v for k, v in initial_state.items() if v is not None}
         await redis_service.set_call_state(call_id, initial_state)
 
         logger.info(f"Created call {call_id} in room {room_name}")
@@ -121,9 +123,10 @@ async def start_agent_handler(call_id: str, state: dict):
     try:
         redis_service = get_redis_service()
         
-        # Update state
+        # Update state. Only the changed field is written: the rest of
+        # `state` may be stale (the state machine owns "state").
         state["agent_joined"] = True
-        await redis_service.set_call_state(call_id, state)
+        await redis_service.set_call_field(call_id, "agent_joined", True)
 
         room_url = state.get("room_url")
         room_name = state.get("room_name")
@@ -147,9 +150,9 @@ async def start_agent_handler(call_id: str, state: dict):
         redis_service = get_redis_service()
         state = await redis_service.get_call_state(call_id)
         if state:
-            state["agent_joined"] = False
-            state["agent_error"] = str(e)
-            await redis_service.set_call_state(call_id, state)
+            await redis_service.set_call_state(
+                call_id, {"agent_joined": False, "agent_error": str(e)}
+            )
 
 
 # ── Twilio SIP Integration (Legacy) ───────────────────────────────────
@@ -25,10 +25,22 @@ class EHRService(ABC):
 
     @abstractmethod
     async def get_availability(
-        self, provider_id: str, start_date: date, end_date: date
+        self, provider_id: str, start_date: date, end_date: date,
+        *, limit: Optional[int] = None,
     ) -> List[Slot]:
         """
-        Get available appointment slots for a provider within a date range.
+        Get available appointment slots for a provider within a date range,
+        earliest first. With ``limit``, only the earliest ``limit`` slots are
+        returned, so adapters can stop fetching early.
+        """
+        pass
+
+    @abstractmethod
+    async def count_availability(
+        self, provider_id: str, start_date: date, end_date: date
+    ) -> int:
+        """
+        Count available appointment slots for a provider within a date range.
         """
         pass
 
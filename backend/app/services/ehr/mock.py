@@ -1,3 +1,4 @@
+import heapq
 import random
 import uuid
 from datetime import date, datetime, timedelta
@@ -99,6 +100,16 @@ class MockEHRAdapter(EHRService):
                     self.slots[slot_id] = slot
                     start_time = end_time
 
+    def reset(self):
+        """Undo bookings: drop appointments and free every slot again.
+
+        Patients, practitioners and slots stay as seeded, so one adapter can
+        be reused (e.g. across tests) without paying for a new seed.
+        """
+        self.appointments.clear()
+        for slot in self.slots.values():
+            slot.status = "free"
+
     async def lookup_patient(self, name: str, dob: str) -> Optional[Patient]:
         # Fuzzy match name (case insensitive, partial match)
         target_name = name.lower()
@@ -113,7 +124,7 @@ class MockEHRAdapter(EHRService):
     async def lookup_patient_by_id(self, patient_id: str) -> Optional[Patient]:
         return self.patients.get(patient_id)
 
-    async def get_availability(
+    def _available_slots(
         self, provider_id: str, start_date: date, end_date: date
     ) -> List[Slot]:
         available_slots = []
@@ -131,9 +142,23 @@ class MockEHRAdapter(EHRService):
                slot.status == "free" and \
                start_datetime <= slot.start <= end_datetime:
                 available_slots.append(slot)
-        
+        return available_slots
+
+    async def get_availability(
+        self, provider_id: str, start_date: date, end_date: date,
+        *, limit: Optional[int] = None,
+    ) -> List[Slot]:
+        available_slots = self._available_slots(provider_id, start_date, end_date)
+        if limit is not None:
+            # Earliest `limit` slots without sorting the whole range
+            return heapq.nsmallest(limit, available_slots, key=lambda s: s.start)
         return sorted(available_slots, key=lambda s: s.start)
 
+    async def count_availability(
+        self, provider_id: str, start_date: date, end_date: date
+    ) -> int:
+        return len(self._available_slots(provider_id, start_date, end_date))
+
     async def book_appointment(
         self, patient_id: str, slot_id: str, visit_type: VisitType
     ) -> Appointment:
@@ -1,16 +1,38 @@
 import json
 import logging
 from datetime import datetime
-from typing import Optional, Any, List
+from typing import Optional, Any, Awaitable, Callable, List, Tuple, TypeVar
 
 import redis.asyncio as redis
-import numpy as np
-import struct
+import orjson
+from redis.exceptions import ResponseError, WatchError
 
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Non-string call state fields (stored as JSON in the call hash)
+CALL_STATE_JSON_FIELDS = frozenset({
+    "participants",
+    "agent_joined",
+    "created_at",
+    "updated_at",
+})
+# The same names as bytes, for writers that pass pre-encoded field names
+_JSON_FIELD_KEYS = CALL_STATE_JSON_FIELDS | {f.encode() for f in CALL_STATE_JSON_FIELDS}
+
+T = TypeVar("T")
+
+# HSET that only touches a call record which already exists
+#   KEYS: state hash   ARGV: field, value, field, value, ...
+_UPDATE_EXISTING_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV))
+return 1
+"""
+
 class RedisService:
     """
     Service for Redis operations, including call state management,
@@ -20,6 +42,7 @@ class RedisService:
     def __init__(self):
         self.redis_url = settings.redis_url
         self.client: Optional[redis.Redis] = None
+        self._update_existing_script = None
         logger.info(f"RedisService initialized with URL: {self.redis_url}")
 
     async def connect(self):
@@ -41,26 +64,165 @@ class RedisService:
         return self.client is not None
 
     # ==================== Call State Management ====================
-
-    async def set_call_state(self, call_id: str, state: dict):
-        """Store or update the complete state of a call."""
+    #
+    # A call's state is a Redis hash (call:{id}:state), one field per key, so
+    # single-field updates are a plain HSET with no read-modify-write.
+    # Fields listed in CALL_STATE_JSON_FIELDS are orjson-encoded on write and
+    # decoded on read, so they come back as the value written; every other
+    # field holds a string. Pre-encoded bytes are stored as-is.
+    #
+    # Older releases stored the whole state as one JSON string under the same
+    # key. Such a record is converted to a hash the first time Redis rejects
+    # an operation on it with WRONGTYPE (see run_on_call_state).
+
+    @staticmethod
+    def _encode_call_fields(fields: dict) -> dict:
+        encoded = {}
+        for k, v in fields.items():
+            if isinstance(v, bytes):
+                encoded[k] = v
+            elif k in _JSON_FIELD_KEYS:
+                encoded[k] = orjson.dumps(v)
+            elif isinstance(v, str):
+                encoded[k] = v
+            else:
+                raise TypeError(
+                    f"Call state field {k!r} must be a string (or listed in "
+                    f"CALL_STATE_JSON_FIELDS), got {type(v).__name__}"
+                )
+        return encoded
+
+    @staticmethod
+    def _decode_call_fields(data: dict) -> dict:
+        for field in CALL_STATE_JSON_FIELDS.intersection(data):
+            data[field] = orjson.loads(data[field])
+        return data
+
+    async def run_on_call_state(self, call_id: str, op: Callable[[], Awaitable[T]]) -> T:
+        """Run `op` against a call's state; if Redis answers WRONGTYPE (a
+        legacy string record), convert the record to a hash and retry once."""
+        try:
+            return await op()
+        except ResponseError as e:
+            if "WRONGTYPE" not in str(e):
+                raise
+        await self._upgrade_legacy_call_state(call_id)
+        return await op()
+
+    async def _upgrade_legacy_call_state(self, call_id: str):
+        """Rewrite a call state stored as one JSON string as a hash.
+
+        Values keep their JSON types where the hash layout can hold them:
+        None outside the JSON fields is dropped, other non-string values are
+        kept as their JSON text. WATCH makes a concurrent upgrade harmless.
+        """
+        key = f"call:{call_id}:state"
+        async with self.client.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(key)
+                if await pipe.type(key) not in ("string", b"string"):
+                    return  # Upgraded by someone else (or gone)
+                data = orjson.loads(await pipe.get(key))
+                mapping = {
+                    k: orjson.dumps(v)
+                    if k in CALL_STATE_JSON_FIELDS or not isinstance(v, str) else v
+                    for k, v in data.items()
+                    if v is not None or k in CALL_STATE_JSON_FIELDS
+                }
+                pipe.multi()
+                pipe.delete(key)
+                if mapping:
+                    pipe.hset(key, mapping=mapping)
+                await pipe.execute()
+            except WatchError:
+                return
+        logger.info(f"[Redis] Upgraded legacy state record of call {call_id} to a hash")
+
+    async def set_call_state(self, call_id: str, state: dict, state_code: Optional[int] = None):
+        """Store or update the state of a call (fields not in ``state`` are kept).
+
+        When ``state_code`` is given, the call's integer state code is written
+        in the same round trip (see ``get_call_state_code``).
+        """
         key = f"call:{call_id}:state"
         if not self._is_connected():
             await self.connect()
-        
-        await self.client.set(key, json.dumps(state))
+
+        mapping = self._encode_call_fields(state)
+
+        async def write():
+            if state_code is None:
+                await self.client.hset(key, mapping=mapping)
+            else:
+                async with self.client.pipeline() as pipe:
+                    pipe.hset(key, mapping=mapping)
+                    pipe.set(f"call:{call_id}:state_code", state_code)
+                    await pipe.execute()
+
+        await self.run_on_call_state(call_id, write)
         logger.debug(f"[Redis] Set state for call {call_id}")
 
+    async def update_call_state(self, call_id: str, fields: dict) -> bool:
+        """Update fields of an existing call's state.
+
+        Unlike ``set_call_state`` this never creates the record: an unknown
+        or expired call is left absent. Returns whether the call existed.
+        """
+        key = f"call:{call_id}:state"
+        if not self._is_connected():
+            await self.connect()
+        if self._update_existing_script is None:
+            self._update_existing_script = self.client.register_script(_UPDATE_EXISTING_LUA)
+
+        args = [part for item in self._encode_call_fields(fields).items() for part in item]
+        if not args:
+            return bool(await self.client.exists(key))
+        return bool(await self.run_on_call_state(call_id, lambda: self._update_existing_script(
+            keys=[key], args=args, client=self.client,
+        )))
+
+    async def set_call_field(self, call_id: str, field: str, value: Any) -> bool:
+        """Set a single field of an existing call's state (see update_call_state)."""
+        return await self.update_call_state(call_id, {field: value})
+
     async def get_call_state(self, call_id: str) -> Optional[dict]:
         """Retrieve the current state of a call."""
         key = f"call:{call_id}:state"
         if not self._is_connected():
             await self.connect()
-            
+
+        data = await self.run_on_call_state(call_id, lambda: self.client.hgetall(key))
+        if not data:
+            return None
+        return self._decode_call_fields(data)
+
+    async def get_call_state_code(self, call_id: str) -> Optional[int]:
+        """Retrieve the integer state code of a call, without the cold record.
+
+        Returns None if the code has never been written for this call.
+        """
+        key = f"call:{call_id}:state_code"
+        if not self._is_connected():
+            await self.connect()
+
         data = await self.client.get(key)
+        return None if data is None else int(data)
+
+    async def get_call_state_with_code(self, call_id: str) -> Tuple[Optional[int], Optional[dict]]:
+        """Retrieve a call's state code and full record in one round trip."""
+        if not self._is_connected():
+            await self.connect()
+
+        async def read():
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.get(f"call:{call_id}:state_code")
+                pipe.hgetall(f"call:{call_id}:state")
+                return await pipe.execute()
+
+        code, data = await self.run_on_call_state(call_id, read)
         if data:
-            return json.loads(data)
-        return None
+            self._decode_call_fields(data)
+        return (None if code is None else int(code)), (data or None)
 
     # ==================== Interaction Logging ====================
 
@@ -120,60 +282,72 @@ class RedisService:
             logger.info(f"[Redis] Found {len(all_keys)} knowledge base keys")
 
             # Convert query embedding to numpy for cosine similarity
-            query_vec = np.array(query_embedding)
+            # (imported here: only this fallback scan needs it)
+            import numpy as np
+            query_vec = np.asarray(query_embedding, dtype=np.float32)
             query_norm = np.linalg.norm(query_vec)
             if query_norm == 0:
                 return []
 
-            results = []
-            for key in all_keys:
+            # Fetch every hash in one round trip
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key in all_keys:
+                    pipe.hgetall(key)
+                hashes = await pipe.execute()
+
+            # Collect the usable vectors as rows of one matrix
+            rows, keys, contents = [], [], []
+            for key, data in zip(all_keys, hashes):
+                # Extract vector bytes and convert to floats (wnbHack pattern)
+                vector_bytes = data.get("vector") if data else None
+                if not vector_bytes:
+                    continue
                 try:
-                    # Get the hash data
-                    data = await self.client.hgetall(key)
-                    if not data:
-                        continue
-
-                    # Extract vector bytes and convert to floats (wnbHack pattern)
-                    vector_bytes = data.get("vector")
-                    if not vector_bytes:
-                        continue
-
                     # Handle bytes vs string (decoding for decode_responses=True)
                     if isinstance(vector_bytes, str):
                         # If it looks like JSON, parse it, else treat as latin-1 bytes
                         if vector_bytes.startswith("["):
-                            stored_vec = np.array(json.loads(vector_bytes))
+                            stored_vec = np.asarray(json.loads(vector_bytes), dtype=np.float32)
                         else:
-                            vector_bytes_raw = vector_bytes.encode('latin-1')
-                            num_floats = len(vector_bytes_raw) // 4
-                            stored_vec = np.array(struct.unpack(f'{num_floats}f', vector_bytes_raw))
+                            raw = vector_bytes.encode('latin-1')
+                            stored_vec = np.frombuffer(raw, dtype=np.float32, count=len(raw) // 4)
                     else:
-                        num_floats = len(vector_bytes) // 4
-                        stored_vec = np.array(struct.unpack(f'{num_floats}f', vector_bytes))
-
-                    # Compute cosine similarity
-                    stored_norm = np.linalg.norm(stored_vec)
-                    if stored_norm == 0:
-                        continue
-
-                    similarity = np.dot(query_vec, stored_vec) / (query_norm * stored_norm)
-
-                    # Get content
-                    content = data.get("content") or ""
-                    
-                    results.append({
-                        "content": content,
-                        "metadata": {"source": "knowledge_base", "key": key},
-                        "score": float(similarity)
-                    })
-                    
+                        stored_vec = np.frombuffer(vector_bytes, dtype=np.float32, count=len(vector_bytes) // 4)
                 except Exception as e:
                     logger.debug(f"[Redis] Error processing key {key}: {e}")
                     continue
+                if stored_vec.shape != query_vec.shape:
+                    logger.debug(f"[Redis] Skipping {key}: dimension {stored_vec.size}")
+                    continue
+                rows.append(stored_vec)
+                keys.append(key)
+                contents.append(data.get("content") or "")
+
+            if not rows:
+                return []
 
-            # Sort by similarity score and return top k
-            results.sort(key=lambda x: x["score"], reverse=True)
-            return results[:k]
+            # Cosine similarity against all stored vectors in one matmul
+            matrix = np.stack(rows)
+            norms = np.linalg.norm(matrix, axis=1)
+            valid = norms != 0
+            scores = np.full(len(rows), -np.inf, dtype=np.float32)
+            scores[valid] = (matrix[valid] @ query_vec) / (norms[valid] * query_norm)
+
+            # Top k by score, without sorting the rest
+            n = int(valid.sum())
+            k = min(k, n)
+            if k <= 0:
+                return []
+            top = np.argpartition(scores, -k)[-k:] if k < len(scores) else np.arange(len(scores))
+            top = top[np.argsort(scores[top])[::-1]]
+            return [
+                {
+                    "content": contents[i],
+                    "metadata": {"source": "knowledge_base", "key": keys[i]},
+                    "score": float(scores[i]),
+                }
+                for i in top
+            ]
 
         except Exception as e:
             logger.error(f"[Redis] Vector search failed: {e}")
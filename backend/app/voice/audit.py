@@ -0,0 +1,128 @@
+"""
+Audit Sink — batched, non-blocking writes to per-call HIPAA audit streams.
+
+State transitions and emergency detections are appended to
+`call:{id}:events`. Issuing one XADD per event puts a Redis round trip on
+the hot path of every transition. The sink queues events in-process and
+a background task flushes them in one pipelined round trip.
+
+Flush policy:
+  - The first queued event starts a short collection window (50ms)
+  - Everything queued by then (up to 100 events) goes out in one pipeline
+  - Streams are trimmed with approximate MAXLEN so they cannot grow unbounded
+  - A failed batch is retried with backoff until it is written (at least
+    once: a retry after a partial pipeline write may repeat some entries)
+
+Consistency: the audit stream is eventually consistent with call state. A
+transition is written to the call's state before its event reaches the
+stream, and an event still queued when the process dies is lost. `close()`
+logs every event it could not write, so none is dropped silently.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.redis_service import RedisService
+
+logger = logging.getLogger(__name__)
+
+# Maximum events flushed per round trip
+MAX_BATCH = 100
+# Collection window after the first event of a batch
+FLUSH_INTERVAL_SECONDS = 0.05
+# Approximate per-stream cap (XADD MAXLEN ~)
+STREAM_MAXLEN = 10_000
+# Wait before retrying a failed batch; doubles per attempt up to the cap
+RETRY_BACKOFF_SECONDS = 0.1
+MAX_RETRY_BACKOFF_SECONDS = 5.0
+# How long close() waits for Redis before logging what is still unwritten
+CLOSE_TIMEOUT_SECONDS = 10.0
+
+
+class AuditSink:
+    """Queues audit stream entries and flushes them in pipelined batches.
+
+    `submit()` never awaits Redis — callers on the voice hot path return
+    immediately. Use `flush()` to wait for queued events to be written
+    and `close()` at call teardown.
+    """
+
+    def __init__(self, redis_service: RedisService):
+        self.service = redis_service
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._batch: List[Tuple[str, Dict[str, Any]]] = []  # being written
+
+    def submit(self, key: str, fields: Dict[str, Any]):
+        """Queue an XADD of `fields` onto stream `key`."""
+        self._queue.put_nowait((key, fields))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        """Background flush loop."""
+        while True:
+            batch = [await self._queue.get()]
+            if self._queue.qsize() < MAX_BATCH - 1:
+                await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+            while len(batch) < MAX_BATCH and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            self._batch = batch
+            await self._write_until_done(batch)
+            self._batch = []
+            for _ in batch:
+                self._queue.task_done()
+
+    async def _write_until_done(self, batch: List[Tuple[str, Dict[str, Any]]]):
+        """Write a batch, retrying with backoff until Redis accepts it."""
+        delay = RETRY_BACKOFF_SECONDS
+        while True:
+            try:
+                await self._write(batch)
+                return
+            except Exception as e:
+                logger.error(
+                    f"[AUDIT] Failed to write {len(batch)} audit events, "
+                    f"retrying in {delay:.1f}s: {e}"
+                )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RETRY_BACKOFF_SECONDS)
+
+    async def _write(self, batch: List[Tuple[str, Dict[str, Any]]]):
+        """Write a batch of entries in a single round trip."""
+        await self.service.connect()
+        async with self.service.client.pipeline(transaction=False) as pipe:
+            for key, fields in batch:
+                pipe.xadd(key, fields, maxlen=STREAM_MAXLEN, approximate=True)
+            await pipe.execute()
+
+    async def flush(self):
+        """Wait until every queued event has been written."""
+        if self._task is not None and not self._task.done():
+            await self._queue.join()
+
+    async def close(self, timeout: float = CLOSE_TIMEOUT_SECONDS):
+        """Flush pending events and stop the background task.
+
+        Waits up to `timeout` for the writes. Events still unwritten then
+        (Redis unreachable) are logged in full, the only record left of them.
+        """
+        try:
+            await asyncio.wait_for(self.flush(), timeout)
+        except asyncio.TimeoutError:
+            unwritten = list(self._batch)
+            while not self._queue.empty():
+                unwritten.append(self._queue.get_nowait())
+            for key, fields in unwritten:
+                logger.error(f"[AUDIT] Unwritten audit event for {key}: {fields}")
+            self._batch = []
+            self._queue = asyncio.Queue()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -29,9 +29,9 @@ from app.config import settings
 from app.voice.call_state import CallState, CallStateMachine
 from app.voice.prompts import get_post_verification_prompt
 from app.voice.prompt_manager import PromptManager
-from app.voice.knowledge import KnowledgeBase, VALLEY_FAMILY_MEDICINE_FAQ
-from app.voice.tools import TOOL_SCHEMAS, dispatch_tool
-from app.voice.thinking_phrases import get_thinking_phrase, clear_call_phrases
+from app.voice.knowledge import VALLEY_FAMILY_MEDICINE_FAQ, get_knowledge_base
+from app.voice.tools import TOOL_FUNCTIONS, TOOL_SCHEMAS, VERIFY_PATIENT, dispatch_tool
+from app.voice.thinking_phrases import get_thinking_phrase, clear_call_phrases, start_call_phrases
 from app.voice.latency import LatencyTracker
 from app.voice.kb_prefetch import KBPrefetcher
 from app.services.ehr.factory import get_ehr_service
@@ -103,7 +103,8 @@ async def run_agent(
       - Latency tracker measures TTFT/TTFA per turn
     """
     # Initialize Weave for real-time observability (wnbHack pattern extension)
-    weave.init(f"assort-health-{settings.practice_name.lower().replace(' ', '-')}")
+    if settings.weave_enabled:
+        weave.init(f"assort-health-{settings.practice_name.lower().replace(' ', '-')}")
     
     logger.info(f"Starting agent for call {call_id} in room {room_name}")
 
@@ -115,15 +116,18 @@ async def run_agent(
     from app.services.ehr.factory import get_ehr_service
     import json
 
+    # This call's thinking-phrase history, inherited by all pipeline tasks
+    start_call_phrases()
+
     redis_service = get_redis_service()
     daily_service = get_daily_service()
     ehr_service = get_ehr_service()
     prompt_manager = PromptManager()
 
     # ── Context Pre-Loading ─────────────────────────────────────────
-    # Create KB singleton ONCE at call start. Seed FAQ data.
-    # The KB connection stays warm for the entire call duration.
-    kb = KnowledgeBase(settings.redis_url)
+    # Use the process-wide KB (its connection pool stays warm across
+    # calls; closed at app shutdown). Seed FAQ data.
+    kb = get_knowledge_base()
     await kb.seed(VALLEY_FAMILY_MEDICINE_FAQ)
     logger.info(f"[PRELOAD] KB pre-loaded with {len(VALLEY_FAMILY_MEDICINE_FAQ)} FAQ items")
 
@@ -183,7 +187,10 @@ async def run_agent(
         assistant_transcript_logger = TranscriptLogger(call_id, redis_service, role="assistant")
 
         # Emergency Detector
-        emergency_detector = EmergencyDetector()
+        emergency_detector = EmergencyDetector(
+            call_id=call_id,
+            audit_sink=call_state_machine.audit,
+        )
 
         # ── Latency-Optimized Processors ────────────────────────────
         # Latency Tracker: measures TTFT, TTFA, tool duration per turn
@@ -196,9 +203,10 @@ async def run_agent(
         kb_prefetcher = KBPrefetcher(kb=kb)
 
         # Tool handler (Healthcare specific) — with thinking phrases + latency
-        @weave.op()
         async def tools_handler(function_name, tool_call_id, args, llm, context, result_callback):
             logger.info(f"[Tool Call] {function_name}: {args}")
+            # Intern once so name checks below are identity compares
+            function_name = sys.intern(function_name)
 
             # ── Thinking Phrase ─────────────────────────────────
             # Emit a filler phrase BEFORE the tool executes so the
@@ -224,7 +232,7 @@ async def run_agent(
             latency_tracker.mark_tool_end()
             
             # Identity Verification Gate
-            if function_name == "verify_patient":
+            if function_name is VERIFY_PATIENT:
                 try:
                     result_data = json.loads(result_json)
                     if result_data.get("verified"):
@@ -238,14 +246,18 @@ async def run_agent(
                 except Exception as e:
                     logger.error(f"Error checking verification result: {e}")
 
-            await result_callback(result_json)
+            # pipecat's function-call context stores str results
+            await result_callback(result_json.decode())
+
+        if settings.weave_enabled:
+            tools_handler = weave.op()(tools_handler)
 
         # Register tools
-        for tool in TOOL_SCHEMAS:
+        for name, function in TOOL_FUNCTIONS.items():
             llm.register_function(
-                tool["function"]["name"],
+                name,
                 tools_handler,
-                format=tool["function"]
+                format=function
             )
 
         # Build the latency-optimized pipeline
@@ -312,8 +324,8 @@ async def run_agent(
         # Clean up thinking phrase tracking
         clear_call_phrases(call_id)
 
-        # Close KB connection
-        await kb.close()
+        # Write any audit events still queued
+        await call_state_machine.close()
 
         await presence_handler.on_call_ended()
         logger.info(f"Agent exited for call {call_id}")
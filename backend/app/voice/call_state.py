@@ -11,25 +11,36 @@ States:
 """
 
 import logging
-from datetime import datetime, timezone
+import time
 from enum import Enum
-from typing import Optional, Any
+from typing import Optional, Any, Tuple
 
 from app.services.redis_service import RedisService
+from app.voice.audit import AuditSink, STREAM_MAXLEN
 
 logger = logging.getLogger(__name__)
 
 class CallState(Enum):
-    """Voice call states matching wnbHack logic."""
-    RINGING = "ringing"
-    GREETING = "greeting"
-    ROUTING = "routing"
-    VERIFIED = "verified"
-    RESOLVING = "resolving"
-    COMPLETED = "completed"
-    TRANSFERRING = "transferring"
-    TRANSFERRED = "transferred"
-    ABANDONED = "abandoned"
+    """Voice call states matching wnbHack logic.
+
+    Each state also carries a small integer `code`. The code is what
+    get_state() reads, so the hot path never parses the string.
+    """
+    RINGING = "ringing", 0
+    GREETING = "greeting", 1
+    ROUTING = "routing", 2
+    VERIFIED = "verified", 3
+    RESOLVING = "resolving", 4
+    COMPLETED = "completed", 5
+    TRANSFERRING = "transferring", 6
+    TRANSFERRED = "transferred", 7
+    ABANDONED = "abandoned", 8
+
+    def __new__(cls, value: str, code: int):
+        member = object.__new__(cls)
+        member._value_ = value
+        member.code = code
+        return member
 
 VALID_TRANSITIONS = {
     CallState.RINGING: {CallState.GREETING, CallState.ABANDONED},
@@ -40,66 +51,243 @@ VALID_TRANSITIONS = {
     CallState.TRANSFERRING: {CallState.TRANSFERRED, CallState.ABANDONED},
 }
 
+# State by code, for decoding the stored code
+INT2STATE = tuple(sorted(CallState, key=lambda s: s.code))
+
+# Every valid transition packed as (from.code << 4 | to.code)
+_ALLOWED = frozenset(
+    frm.code << 4 | to.code
+    for frm, targets in VALID_TRANSITIONS.items()
+    for to in targets
+)
+
+
+def is_valid_transition(from_code: int, to_code: int, _allowed=_ALLOWED) -> bool:
+    """O(1) check of a transition by state codes."""
+    return (from_code << 4 | to_code) in _allowed
+
+
+# Pre-encoded state values and field names for hot writes. redis-py passes
+# bytes through unchanged, so these skip a str.encode() per argument.
+STATE_BYTES = {s: s.value.encode() for s in CallState}
+_NO_STATE = b"none"
+_F_STATE = b"state"
+_F_STATUS = b"status"
+_F_UPDATED_AT = b"updated_at"
+_F_TYPE = b"type"
+_F_FROM = b"from"
+_F_TO = b"to"
+_F_TIMESTAMP = b"timestamp"
+_STATE_TRANSITION = b"state_transition"
+_COMPLETED = STATE_BYTES[CallState.COMPLETED]
+
+# Create a call only if it does not exist. The "status" ... "agent_joined"
+# values mirror how RedisService encodes a fresh call record.
+#   KEYS: state hash, state code, audit stream
+#   ARGV: state, state code, provider_id, now (epoch ms), stream maxlen
+_CREATE_CALL_LUA = """
+if redis.call('HSETNX', KEYS[1], 'state', ARGV[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1],
+    'status', 'pending',
+    'provider_id', ARGV[3],
+    'created_at', ARGV[4],
+    'updated_at', ARGV[4],
+    'participants', '[]',
+    'agent_joined', 'false')
+redis.call('SET', KEYS[2], ARGV[2])
+redis.call('XADD', KEYS[3], 'MAXLEN', '~', ARGV[5], '*',
+    'type', 'state_transition',
+    'from', 'none',
+    'to', ARGV[1],
+    'timestamp', ARGV[4])
+return 1
+"""
+
+
+# Store a verified patient on an existing call and, if it is still in one of
+# the pre-verification states, move it to VERIFIED — one round trip.
+#   KEYS: state hash, state code
+#   ARGV: patient_id, patient_name, verified state, verified code, now
+#         (epoch ms), then the states verification may start from
+# Returns the previous state if the call transitioned, else nil.
+_VERIFY_AND_STORE_LUA = """
+local current = redis.call('HGET', KEYS[1], 'state')
+local transitioned = false
+if current then
+    for i = 6, #ARGV do
+        if current == ARGV[i] then
+            redis.call('HSET', KEYS[1], 'state', ARGV[3], 'updated_at', ARGV[5])
+            redis.call('SET', KEYS[2], ARGV[4])
+            transitioned = true
+            break
+        end
+    end
+end
+if current or redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('HSET', KEYS[1], 'patient_id', ARGV[1], 'patient_name', ARGV[2])
+end
+if transitioned then
+    return current
+end
+return false
+"""
+
+# States from which a successful verification moves the call to VERIFIED
+VERIFIABLE_STATES = (CallState.ROUTING, CallState.GREETING)
+
+
+def _now_ms() -> int:
+    """Wall-clock time as integer epoch milliseconds."""
+    return time.time_ns() // 1_000_000
+
+
 class CallStateMachine:
     """Redis-backed call state machine with HIPAA audit trail."""
 
-    def __init__(self, redis_service: RedisService):
+    def __init__(self, redis_service: RedisService, audit_sink: Optional[AuditSink] = None):
         self.service = redis_service
+        self.audit = audit_sink or AuditSink(redis_service)
+        self._create_call_script = None  # registered on first use
+        self._verify_and_store_script = None
+
+    async def close(self):
+        """Write queued audit events and stop the audit sink's flush task."""
+        await self.audit.close()
 
     async def create_call(self, call_id: str, provider_id: str = "default") -> 'CallState':
-        """Initialize a new call in RINGING state."""
-        now = datetime.now(timezone.utc).isoformat()
-        state = {
-            "status": "pending", # wnbHack compatibility
-            "state": CallState.RINGING.value,
-            "provider_id": provider_id,
-            "created_at": now,
-            "updated_at": now,
-            "participants": [],
-            "agent_joined": False
-        }
-        await self.service.set_call_state(call_id, state)
-        await self._log_transition(call_id, None, CallState.RINGING)
+        """Initialize a new call in RINGING state.
+
+        Idempotent: record, state code and the audit event are written by one
+        Lua script only if the call does not exist yet, so a retried webhook
+        neither resets the call nor logs a duplicate event. For an existing
+        call the current state is returned unchanged.
+        """
+        await self.service.connect()
+        if self._create_call_script is None:
+            self._create_call_script = self.service.client.register_script(_CREATE_CALL_LUA)
+
+        created = await self.service.run_on_call_state(call_id, lambda: self._create_call_script(
+            keys=[
+                f"call:{call_id}:state",
+                f"call:{call_id}:state_code",
+                f"call:{call_id}:events",
+            ],
+            args=[
+                CallState.RINGING.value,
+                CallState.RINGING.code,
+                provider_id,
+                _now_ms(),
+                STREAM_MAXLEN,
+            ],
+            client=self.service.client,
+        ))
+        if not created:
+            return await self.get_state(call_id)
+
+        logger.info("Call %s: none → %s", call_id, CallState.RINGING.value)
         return CallState.RINGING
 
-    async def transition(self, call_id: str, new_state: CallState) -> CallState:
-        """Transition a call to a new state."""
-        state = await self.service.get_call_state(call_id)
-        if state is None:
+    async def transition(
+        self,
+        call_id: str,
+        new_state: CallState,
+        from_states: Optional[Tuple[CallState, ...]] = None,
+    ) -> CallState:
+        """Transition a call to a new state.
+
+        With ``from_states``, the call only moves if it is currently in one
+        of them; otherwise it is left as is and its current state returned
+        (e.g. a caller who hung up mid-booking stays ABANDONED).
+        """
+        current = await self.get_state(call_id)
+        if current is None:
             raise ValueError(f"Call {call_id} not found")
 
-        current_val = state.get("state")
-        current = CallState(current_val) if current_val else None
+        if from_states is not None and current not in from_states:
+            logger.info(
+                "Call %s: not moving %s → %s (only from %s)",
+                call_id, current.value, new_state.value,
+                ", ".join(s.value for s in from_states),
+            )
+            return current
 
         # Basic validation
-        if current and new_state not in VALID_TRANSITIONS.get(current, set()):
+        if not is_valid_transition(current.code, new_state.code):
              logger.warning(f"Unexpected transition: {current.value} → {new_state.value}")
              # We still allow it for flexibility in voice flows, but log it
 
-        state["state"] = new_state.value
-        state["updated_at"] = datetime.now(timezone.utc).isoformat()
-        
+        now = _now_ms()
+        fields = {_F_STATE: STATE_BYTES[new_state], _F_UPDATED_AT: now}
+
         # Sync with wnbHack 'status' field
-        if new_state == CallState.COMPLETED:
-            state["status"] = "completed"
+        if new_state is CallState.COMPLETED:
+            fields[_F_STATUS] = _COMPLETED
 
-        await self.service.set_call_state(call_id, state)
-        await self._log_transition(call_id, current, new_state)
+        await self.service.set_call_state(call_id, fields, state_code=new_state.code)
+        self._log_transition(call_id, current, new_state, now)
         return new_state
 
+    async def verify_and_store(
+        self, call_id: str, patient_id: str, patient_name: str,
+    ) -> Optional[CallState]:
+        """Record a verified patient on the call, transitioning it to VERIFIED
+        if it is in one of VERIFIABLE_STATES.
+
+        State check, transition and both metadata fields are one atomic Lua
+        call. Returns the state the call transitioned from, or None if it
+        stayed where it was.
+        """
+        await self.service.connect()
+        if self._verify_and_store_script is None:
+            self._verify_and_store_script = self.service.client.register_script(
+                _VERIFY_AND_STORE_LUA
+            )
+
+        now = _now_ms()
+        previous = await self.service.run_on_call_state(call_id, lambda: self._verify_and_store_script(
+            keys=[f"call:{call_id}:state", f"call:{call_id}:state_code"],
+            args=[
+                patient_id,
+                patient_name,
+                CallState.VERIFIED.value,
+                CallState.VERIFIED.code,
+                now,
+                *(s.value for s in VERIFIABLE_STATES),
+            ],
+            client=self.service.client,
+        ))
+        if previous is None:
+            return None
+
+        from_state = CallState(previous)
+        self._log_transition(call_id, from_state, CallState.VERIFIED, now)
+        return from_state
+
     async def get_state(self, call_id: str) -> Optional[CallState]:
         """Get current state of a call."""
+        code = await self.service.get_call_state_code(call_id)
+        if code is not None:
+            return INT2STATE[code]
+
+        # Calls created outside the state machine (e.g. by the voice router)
+        # only carry the string state in their record.
         state = await self.service.get_call_state(call_id)
         if not state or "state" not in state:
             return None
         return CallState(state["state"])
 
     async def set_metadata(self, call_id: str, key: str, value: Any):
-        """Set additional metadata on a call."""
-        state = await self.service.get_call_state(call_id)
-        if state:
-            state[key] = value
-            await self.service.set_call_state(call_id, state)
+        """Set additional metadata on a call (a single-field write).
+
+        Nothing is written if the call does not exist.
+        """
+        await self.service.set_call_field(call_id, key, value)
+
+    async def update_metadata(self, call_id: str, fields: dict):
+        """Set several metadata fields on an existing call in a single write."""
+        await self.service.update_call_state(call_id, fields)
 
     async def get_call_info(self, call_id: str) -> Optional[dict]:
         """Get all call info as a dict."""
@@ -110,18 +298,34 @@ class CallStateMachine:
         state = await self.get_state(call_id)
         return state == CallState.VERIFIED
 
-    async def _log_transition(
-        self, call_id: str, from_state: Optional[CallState], to_state: CallState
+    async def get_verified_and_info(self, call_id: str) -> Tuple[bool, Optional[dict]]:
+        """`is_verified` and `get_call_info` in a single Redis round trip."""
+        code, info = await self.service.get_call_state_with_code(call_id)
+        if code is not None:
+            return code == CallState.VERIFIED.code, info
+        # Record without a state code: fall back to its string state
+        return bool(info) and info.get("state") == CallState.VERIFIED.value, info
+
+    def _log_transition(
+        self,
+        call_id: str,
+        from_state: Optional[CallState],
+        to_state: CallState,
+        now: int,
     ):
-        """Log state transition to Redis stream for HIPAA audit."""
-        now = datetime.now(timezone.utc).isoformat()
-        from_val = from_state.value if from_state else "none"
-        
-        # Use RedisService client directly for streams
-        await self.service.client.xadd(f"call:{call_id}:events", {
-            "type": "state_transition",
-            "from": from_val,
-            "to": to_state.value,
-            "timestamp": now,
+        """Queue state transition on the Redis stream for HIPAA audit.
+
+        ``now`` is the epoch-ms timestamp already written to the call state,
+        so the audit entry and the state agree exactly. The write is batched
+        by the audit sink; this never waits on Redis.
+        """
+        self.audit.submit(f"call:{call_id}:events", {
+            _F_TYPE: _STATE_TRANSITION,
+            _F_FROM: STATE_BYTES[from_state] if from_state else _NO_STATE,
+            _F_TO: STATE_BYTES[to_state],
+            _F_TIMESTAMP: now,
         })
-        logger.info("Call %s: %s → %s", call_id, from_val, to_state.value)
+        logger.info(
+            "Call %s: %s → %s",
+            call_id, from_state.value if from_state else "none", to_state.value,
+        )
@@ -4,11 +4,14 @@ Scans transcription frames for keywords and triggers emergency flow.
 """
 
 import logging
-from typing import Set
+import re
+import time
+from typing import Optional, Set
 
 from pipecat.processors.frame_processor import FrameProcessor, FrameDirection
 from pipecat.frames.frames import Frame, TranscriptionFrame, LLMMessagesFrame
 from app.voice.call_state import CallState
+from app.voice.audit import AuditSink
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +35,23 @@ EMERGENCY_KEYWORDS: Set[str] = {
 }
 
 
+# Keywords are ASCII, so lowering the raw UTF-8 bytes with a translate table
+# is enough to match them and avoids a unicode str.lower() per partial.
+_ASCII_LOWER = bytes.maketrans(bytes(range(0x41, 0x5B)), bytes(range(0x61, 0x7B)))
+_KEYWORD_BYTES = tuple(k.encode("ascii") for k in EMERGENCY_KEYWORDS)
+_MIN_KEYWORD_LEN = min(len(k) for k in _KEYWORD_BYTES)
+
+# Every keyword in one case-sensitive bytes alternation: a single scan per
+# partial however many keywords there are (the buffer is already lowered,
+# which is cheaper than re.IGNORECASE)
+_KEYWORD_RE = re.compile(b"|".join(map(re.escape, _KEYWORD_BYTES)))
+
+
+def _contains_keyword(buf: bytes) -> bool:
+    """True if the lowered UTF-8 buffer contains an emergency keyword."""
+    return len(buf) >= _MIN_KEYWORD_LEN and _KEYWORD_RE.search(buf) is not None
+
+
 EMERGENCY_OVERRIDE_MESSAGE = (
     "EMERGENCY DETECTED. The caller may be experiencing a medical emergency. "
     "Immediately tell them: 'This sounds like it could be a medical emergency. "
@@ -42,24 +62,36 @@ EMERGENCY_OVERRIDE_MESSAGE = (
 
 
 class EmergencyDetector(FrameProcessor):
-    def __init__(self):
+    def __init__(
+        self,
+        call_id: Optional[str] = None,
+        audit_sink: Optional[AuditSink] = None,
+    ) -> None:
         super().__init__()
+        self.call_id = call_id
+        self.audit = audit_sink
 
-    async def process_frame(self, frame: Frame, direction: FrameDirection):
+    async def process_frame(self, frame: Frame, direction: FrameDirection) -> None:
         await super().process_frame(frame, direction)
 
         # only check user speech
         if isinstance(frame, TranscriptionFrame) and frame.user_id != "assistant":
-            text = frame.text.lower()
-            
+            buf = frame.text.encode("utf-8", "ignore").translate(_ASCII_LOWER)
+
             # Simple keyword matching
-            if any(keyword in text for keyword in EMERGENCY_KEYWORDS):
-                logger.warning(f"EMERGENCY DETECTED: {text}")
+            if _contains_keyword(buf):
+                logger.warning(f"EMERGENCY DETECTED: {frame.text}")
                 
                 # Inject system override message to force LLM into emergency mode
                 # This doesn't stop the pipeline but steers the LLM response
                 sys_msg = {"role": "system", "content": EMERGENCY_OVERRIDE_MESSAGE}
                 await self.push_frame(LLMMessagesFrame([sys_msg]), direction)
+
+                if self.audit is not None and self.call_id:
+                    self.audit.submit(f"call:{self.call_id}:events", {
+                        "type": "emergency_detected",
+                        "timestamp": time.time_ns() // 1_000_000,
+                    })
                 
                 # We could also potentially trigger a state change here via callback
                 # if we injected call_state manager, but for now we rely on LLM steering
@@ -18,9 +18,10 @@ Key behaviors:
 """
 
 import asyncio
+import heapq
 import logging
 import time
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 
 from pipecat.frames.frames import Frame, TranscriptionFrame
 from pipecat.processors.frame_processor import FrameProcessor, FrameDirection
@@ -35,6 +36,9 @@ MIN_WORDS_FOR_PREFETCH = 4
 DEBOUNCE_SECONDS = 0.3
 # Cache TTL: how long to keep prefetched results
 CACHE_TTL_SECONDS = 10.0
+# Shortest text that can hold MIN_WORDS_FOR_PREFETCH words ("a b c d");
+# backchannel partials ("uh", "yeah", "okay") are rejected on length alone
+_MIN_PREFETCH_CHARS = 2 * MIN_WORDS_FOR_PREFETCH - 1
 
 
 class KBPrefetcher(FrameProcessor):
@@ -47,7 +51,7 @@ class KBPrefetcher(FrameProcessor):
     a pre-computed result instead of running a fresh KB lookup.
     """
 
-    def __init__(self, kb: KnowledgeBase):
+    def __init__(self, kb: KnowledgeBase) -> None:
         super().__init__()
         self.kb = kb
         self._last_partial: str = ""
@@ -55,19 +59,21 @@ class KBPrefetcher(FrameProcessor):
         self._inflight_task: Optional[asyncio.Task] = None
         self._cache: Dict[str, Dict[str, Any]] = {}
         # {query_text: {"results": [...], "timestamp": float}}
+        self._expiry_heap: List[Tuple[float, str]] = []
+        # min-heap of (expires_at, query_text); may hold superseded entries
 
-    async def process_frame(self, frame: Frame, direction: FrameDirection):
+    async def process_frame(self, frame: Frame, direction: FrameDirection) -> None:
         await super().process_frame(frame, direction)
 
-        if isinstance(frame, TranscriptionFrame):
-            text = frame.text.strip() if hasattr(frame, "text") else ""
+        if isinstance(frame, TranscriptionFrame) and len(frame.text) >= _MIN_PREFETCH_CHARS:
+            text = frame.text.strip()
             if text and len(text.split()) >= MIN_WORDS_FOR_PREFETCH:
                 await self._on_partial(text)
 
         # Always pass frame through
         await self.push_frame(frame, direction)
 
-    async def _on_partial(self, text: str):
+    async def _on_partial(self, text: str) -> None:
         """Handle a new STT partial — debounce and prefetch."""
         self._last_partial = text
 
@@ -78,7 +84,7 @@ class KBPrefetcher(FrameProcessor):
         # Start new debounce timer
         self._debounce_task = asyncio.create_task(self._debounced_prefetch(text))
 
-    async def _debounced_prefetch(self, text: str):
+    async def _debounced_prefetch(self, text: str) -> None:
         """Wait for stability, then trigger KB lookup."""
         try:
             await asyncio.sleep(DEBOUNCE_SECONDS)
@@ -102,17 +108,14 @@ class KBPrefetcher(FrameProcessor):
         # Launch background KB lookup
         self._inflight_task = asyncio.create_task(self._do_prefetch(text))
 
-    async def _do_prefetch(self, query: str):
+    async def _do_prefetch(self, query: str) -> None:
         """Execute the KB lookup in the background."""
         try:
             start = time.monotonic()
             results = await self.kb.query(query, top_k=3)
             elapsed = (time.monotonic() - start) * 1000
 
-            self._cache[query.lower().strip()] = {
-                "results": results,
-                "timestamp": time.monotonic(),
-            }
+            self._store(query.lower().strip(), results)
 
             if results:
                 logger.info(
@@ -127,14 +130,27 @@ class KBPrefetcher(FrameProcessor):
         except Exception as e:
             logger.warning(f"[PREFETCH] KB lookup failed: {e}")
 
+    def _store(self, key: str, results: List[Dict[str, Any]], now: Optional[float] = None) -> None:
+        """Cache results under a normalized query and schedule their expiry."""
+        if now is None:
+            now = time.monotonic()
+        self._cache[key] = {"results": results, "timestamp": now}
+        heapq.heappush(self._expiry_heap, (now + CACHE_TTL_SECONDS, key))
+
+    def _evict_expired(self, now: float) -> None:
+        """Drop expired entries by popping the expiry heap (no full sweep)."""
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            _, key = heapq.heappop(heap)
+            entry = self._cache.get(key)
+            # A key re-cached since has a later heap entry — keep it
+            if entry is not None and entry["timestamp"] + CACHE_TTL_SECONDS <= now:
+                del self._cache[key]
+
     def _has_cached(self, query: str) -> bool:
         """Check if we have a recent cached result for this query."""
-        key = query.lower().strip()
-        entry = self._cache.get(key)
-        if not entry:
-            return False
-        age = time.monotonic() - entry["timestamp"]
-        return age < CACHE_TTL_SECONDS
+        self._evict_expired(time.monotonic())
+        return query.lower().strip() in self._cache
 
     def get_cached_result(self, query: str) -> Optional[List[Dict[str, Any]]]:
         """Retrieve a prefetched result if available and fresh.
@@ -144,27 +160,20 @@ class KBPrefetcher(FrameProcessor):
         Returns:
             List of result dicts if cache hit, None if cache miss.
         """
+        now = time.monotonic()
+        self._evict_expired(now)
+
         key = query.lower().strip()
         entry = self._cache.get(key)
-
         if entry:
-            age = time.monotonic() - entry["timestamp"]
-            if age < CACHE_TTL_SECONDS:
-                logger.info(
-                    f"[PREFETCH] Tool using cached result "
-                    f"({age:.1f}s old, {len(entry['results'])} results)"
-                )
-                return entry["results"]
-            else:
-                # Stale — remove it
-                del self._cache[key]
+            logger.info(
+                f"[PREFETCH] Tool using cached result "
+                f"({now - entry['timestamp']:.1f}s old, {len(entry['results'])} results)"
+            )
+            return entry["results"]
 
         # Also check for partial matches (the tool query may differ slightly)
-        for cached_key, cached_entry in list(self._cache.items()):
-            age = time.monotonic() - cached_entry["timestamp"]
-            if age >= CACHE_TTL_SECONDS:
-                del self._cache[cached_key]
-                continue
+        for cached_key, cached_entry in self._cache.items():
             # Simple containment check for partial matches
             if key in cached_key or cached_key in key:
                 logger.info(
@@ -175,6 +184,7 @@ class KBPrefetcher(FrameProcessor):
 
         return None
 
-    def clear_cache(self):
+    def clear_cache(self) -> None:
         """Clear all cached prefetch results."""
         self._cache.clear()
+        self._expiry_heap.clear()
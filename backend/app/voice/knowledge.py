@@ -5,19 +5,24 @@ metadata-enriched retrieval, and configurable thresholds.
 
 Architecture:
   - Embeddings are cached in Redis with content-hash keys (no re-embedding static data)
-  - Gemini SDK calls are offloaded via asyncio.to_thread (non-blocking)
+  - Only small vector hashes (kb_emb:*) are indexed; content lives in knowledge:* hashes
+  - Gemini SDK calls go through the async client (non-blocking), capped by a semaphore
+  - One Gemini client per process, so every KnowledgeBase reuses its connection pool
   - Documents are chunked for longer content with configurable overlap
   - Query results include metadata (category, source_key) for tracing
   - Similarity threshold is configurable per query
+  - Query results are cached by normalized question text (TTL'd, cleared on content change)
 """
 
 import logging
 import hashlib
 import asyncio
-from typing import List, Dict, Any, Optional
+import json
+from typing import List, Dict, Any, Iterator, Optional, Set
 
 import redis.asyncio as aioredis
 from google import genai
+from google.genai import types
 import numpy as np
 
 from app.config import settings
@@ -27,80 +32,252 @@ logger = logging.getLogger(__name__)
 # Gemini embedding-001 returns 3072 dimensions
 EMBEDDING_DIM = 3072
 INDEX_NAME = "idx:knowledge"
+# Document hashes (content + metadata) and the indexed vector hashes share
+# a suffix: knowledge:{key}[:{chunk_idx}] <-> kb_emb:{key}[:{chunk_idx}]
+DOC_PREFIX = "knowledge:"
+VECTOR_PREFIX = "kb_emb:"
 EMBEDDING_CACHE_PREFIX = "emb_cache:"
+QUERY_CACHE_PREFIX = "qcache:"
+QUERY_CACHE_TTL_SECONDS = 3600
+
+# Vectors are stored half-precision in the index (FLOAT16 needs RediSearch
+# 2.10, i.e. redis-stack 7.4; INT8 would need Redis 8). The embedding cache
+# keeps full FLOAT32 values so the index type can change without re-embedding.
+VECTOR_TYPE = "FLOAT16"
+VECTOR_DTYPE = np.float16
 
 # Chunking defaults
 DEFAULT_CHUNK_SIZE = 500       # characters
 DEFAULT_CHUNK_OVERLAP = 50     # characters
 DEFAULT_SIMILARITY_THRESHOLD = 0.6
 
+# Cap on in-flight embedding requests per knowledge base (Gemini rate limits)
+MAX_CONCURRENT_EMBEDDINGS = 8
+# Most texts a single Gemini batch embedding request accepts
+EMBED_BATCH_SIZE = 100
+# Per-request timeout for embedding calls, so a hung call can't stall a query
+EMBED_TIMEOUT_MS = 10_000
+
+
+def _vector_bytes(embedding: np.ndarray) -> bytes:
+    """A float32 embedding encoded as the index's VECTOR_TYPE."""
+    return embedding.astype(VECTOR_DTYPE).tobytes()
+
+
+_genai_client: Optional[genai.Client] = None
+# Redis URLs whose vector index this process has already verified/created
+_ready_indexes: Set[str] = set()
+
+def _get_genai_client() -> genai.Client:
+    """Process-wide Gemini client: every KnowledgeBase reuses its connection pool."""
+    global _genai_client
+    if _genai_client is None:
+        _genai_client = genai.Client(
+            api_key=settings.gemini_api_key,
+            http_options=types.HttpOptions(timeout=EMBED_TIMEOUT_MS),
+        )
+    return _genai_client
+
+
+def _index_prefixes(info: Dict[str, Any]) -> List[str]:
+    """Key prefixes an FT.INFO reply says the index covers."""
+    definition = info.get("index_definition") or []
+    if isinstance(definition, dict):  # RESP3
+        fields = definition
+    else:
+        fields = dict(zip(definition[::2], definition[1::2]))
+    prefixes = fields.get("prefixes", fields.get(b"prefixes", []))
+    return [p.decode("utf-8") if isinstance(p, bytes) else p for p in prefixes]
+
+
+def _index_vector_type(info: Dict[str, Any]) -> Optional[str]:
+    """Data type of the vector field an FT.INFO reply describes (None if the
+    server does not report it)."""
+    def text(value):
+        return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
+    for attribute in info.get("attributes") or []:
+        if not isinstance(attribute, dict):  # RESP2: flat key/value list
+            attribute = dict(zip(attribute[::2], attribute[1::2]))
+        fields = {text(k).lower(): v for k, v in attribute.items()}
+        if text(fields.get("type", "")).upper() == "VECTOR":
+            data_type = fields.get("data_type")
+            return None if data_type is None else text(data_type).upper()
+    return None
+
+
+async def clear_query_cache(r: aioredis.Redis) -> int:
+    """Drop every cached query result. Call whenever FAQ content changes.
+
+    Returns:
+        Number of cache entries removed
+    """
+    keys = [key async for key in r.scan_iter(match=f"{QUERY_CACHE_PREFIX}*", count=500)]
+    if keys:
+        await r.delete(*keys)
+    return len(keys)
+
 
 class KnowledgeBase:
     """Production-quality RAG knowledge base backed by RediSearch.
 
     Features:
       - Embedding cache: static content is embedded once
-      - Non-blocking: Gemini calls run in a thread pool
+      - Non-blocking: Gemini calls use the async client
       - Metadata: results include category and source key
       - Chunking: long documents are split for better retrieval
       - Configurable threshold: per-query similarity cutoff
+      - Query cache: repeated questions skip embedding and search
     """
 
     def __init__(self, redis_url: str):
+        self.redis_url = redis_url
         self.redis = aioredis.from_url(redis_url)
-        self.genai_client = genai.Client(api_key=settings.gemini_api_key)
+        self.genai_client = _get_genai_client()
+        self._embed_semaphore = asyncio.Semaphore(MAX_CONCURRENT_EMBEDDINGS)
 
     # ── Embedding Layer ─────────────────────────────────────────────────
 
     def _content_hash(self, text: str) -> str:
-        """Deterministic hash for embedding cache key."""
-        return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
-
-    def _embed_sync(self, text: str) -> List[float]:
-        """Synchronous Gemini embedding call (runs in thread pool)."""
-        result = self.genai_client.models.embed_content(
-            model=settings.embedding_model,
-            contents=text,
-        )
-        return result.embeddings[0].values
+        """Deterministic hash for embedding cache key (16 hex chars)."""
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
 
-    async def _get_embedding(self, text: str, use_cache: bool = True) -> List[float]:
-        """Get embedding with content-hash cache.
+    def _cache_key(self, text: str) -> str:
+        return f"{EMBEDDING_CACHE_PREFIX}{self._content_hash(text)}"
+
+    def _query_cache_key(
+        self,
+        question: str,
+        top_k: int,
+        threshold: float,
+        category_filter: Optional[str],
+    ) -> str:
+        """Cache key for a query: normalized question plus search parameters."""
+        norm = " ".join(question.lower().split())
+        params = f"{norm}|{top_k}|{threshold}|{category_filter or ''}"
+        return f"{QUERY_CACHE_PREFIX}{self._content_hash(params)}"
+
+    async def _embed_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """One Gemini embedding call (async client) for a list of texts.
+
+        Each embedding is converted once to a float32 array.
+        """
+        async with self._embed_semaphore:
+            result = await self.genai_client.aio.models.embed_content(
+                model=settings.embedding_model,
+                contents=texts,
+            )
+        return [np.asarray(e.values, dtype=np.float32) for e in result.embeddings]
+
+    async def _get_embedding(self, text: str, use_cache: bool = True) -> Optional[np.ndarray]:
+        """Get a float32 embedding with content-hash cache (None on failure).
 
         Cache flow:
           1. Hash the text content
           2. Check Redis for cached embedding bytes
-          3. On miss: call Gemini (via thread pool), cache the result
-        """
-        cache_key = f"{EMBEDDING_CACHE_PREFIX}{self._content_hash(text)}"
+          3. On miss: call Gemini (async client), cache the result
 
-        # Check cache
+        With use_cache=False (one-off query vectors) the cache is neither
+        read nor written, so user questions never land in the FAQ cache.
+        """
         if use_cache:
+            cache_key = self._cache_key(text)
             try:
                 cached = await self.redis.get(cache_key)
                 if cached:
-                    return np.frombuffer(cached, dtype=np.float32).tolist()
+                    return np.frombuffer(cached, dtype=np.float32)
             except Exception:
                 pass  # Cache miss or error, proceed to embed
 
-        # Embed in thread pool to avoid blocking the event loop
+        # Embed on the async client to avoid blocking the event loop
         try:
-            values = await asyncio.to_thread(self._embed_sync, text)
+            embedding = (await self._embed_batch([text]))[0]
         except Exception as e:
             logger.error(f"Embedding failed for text '{text[:50]}...': {e}")
-            return []
+            return None
 
         # Cache the result (no expiry — FAQ content is static)
+        if use_cache:
+            try:
+                await self.redis.set(cache_key, embedding.tobytes())
+            except Exception as e:
+                logger.warning(f"Failed to cache embedding: {e}")
+
+        return embedding
+
+    async def _get_embeddings(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Batch version of `_get_embedding` for seeding.
+
+        Cache lookups are one MGET, cache writes one pipeline, and cache
+        misses are embedded in EMBED_BATCH_SIZE-text Gemini calls issued
+        concurrently (bounded by the embedding semaphore). Entries that
+        could not be embedded come back as None.
+        """
+        if not texts:
+            return []
+
+        cache_keys = [self._cache_key(t) for t in texts]
+        embeddings: List[Optional[np.ndarray]] = [None] * len(texts)
+
         try:
-            emb_bytes = np.array(values, dtype=np.float32).tobytes()
-            await self.redis.set(cache_key, emb_bytes)
+            cached = await self.redis.mget(cache_keys)
+        except Exception:
+            cached = [None] * len(texts)  # Treat as all misses
+
+        misses = []
+        for i, raw in enumerate(cached):
+            if raw:
+                embeddings[i] = np.frombuffer(raw, dtype=np.float32)
+            else:
+                misses.append(i)
+        if not misses:
+            return embeddings
+
+        # Identical chunks are embedded once
+        miss_texts = list(dict.fromkeys(texts[i] for i in misses))
+        try:
+            batches = await asyncio.gather(*(
+                self._embed_batch(miss_texts[i:i + EMBED_BATCH_SIZE])
+                for i in range(0, len(miss_texts), EMBED_BATCH_SIZE)
+            ))
+            vectors = dict(zip(miss_texts, (v for batch in batches for v in batch)))
         except Exception as e:
-            logger.warning(f"Failed to cache embedding: {e}")
+            logger.error(f"Batch embedding failed for {len(miss_texts)} texts: {e}")
+            return embeddings
 
-        return values
+        for i in misses:
+            embeddings[i] = vectors[texts[i]]
+
+        # Cache the results (no expiry — FAQ content is static)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for text, embedding in vectors.items():
+                    pipe.set(self._cache_key(text), embedding.tobytes())
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to cache embeddings: {e}")
+
+        return embeddings
 
     # ── Chunking Layer ──────────────────────────────────────────────────
 
+    @staticmethod
+    def _chunk_text_iter(
+        text: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        overlap: int = DEFAULT_CHUNK_OVERLAP,
+    ) -> Iterator[str]:
+        """Lazily yield overlapping chunks (see `_chunk_text`)."""
+        if overlap >= chunk_size:
+            raise ValueError(f"overlap ({overlap}) must be smaller than chunk_size ({chunk_size})")
+
+        if len(text) <= chunk_size:
+            yield text
+            return
+
+        for start in range(0, len(text), chunk_size - overlap):
+            yield text[start:start + chunk_size]
+
     @staticmethod
     def _chunk_text(
         text: str,
@@ -112,36 +289,38 @@ class KnowledgeBase:
         Short texts (< chunk_size) are returned as-is.
         Longer texts are split at chunk_size boundaries with overlap.
         """
-        if len(text) <= chunk_size:
-            return [text]
-
-        chunks = []
-        start = 0
-        while start < len(text):
-            end = start + chunk_size
-            chunks.append(text[start:end])
-            start = end - overlap
-        return chunks
+        return list(KnowledgeBase._chunk_text_iter(text, chunk_size, overlap))
 
     # ── Index Management ────────────────────────────────────────────────
 
     async def _ensure_index(self):
-        """Create RediSearch vector index if it does not exist."""
+        """Create RediSearch vector index if it does not exist.
+
+        Checked once per process and Redis URL; later seeds skip FT.INFO.
+        """
+        if self.redis_url in _ready_indexes:
+            return
+
         try:
-            await self.redis.ft(INDEX_NAME).info()
-            return  # Index exists
+            info = await self.redis.ft(INDEX_NAME).info()
         except Exception:
-            pass  # Needs creation
+            info = None  # Needs creation
 
-        from redis.commands.search.field import TextField, TagField, VectorField
+        if info is not None:
+            if (_index_prefixes(info) == [VECTOR_PREFIX]
+                    and _index_vector_type(info) in (VECTOR_TYPE, None)):
+                _ready_indexes.add(self.redis_url)
+                return  # Index exists
+            await self._rebuild_index_vectors()
+
+        from redis.commands.search.field import TagField, VectorField
         from redis.commands.search.indexDefinition import IndexDefinition, IndexType
 
         schema = (
-            TextField("content"),
             TagField("category"),
             TagField("source_key"),
             VectorField("embedding", "HNSW", {
-                "TYPE": "FLOAT32",
+                "TYPE": VECTOR_TYPE,
                 "DIM": EMBEDDING_DIM,
                 "DISTANCE_METRIC": "COSINE",
             }),
@@ -150,52 +329,129 @@ class KnowledgeBase:
         await self.redis.ft(INDEX_NAME).create_index(
             fields=schema,
             definition=IndexDefinition(
-                prefix=["knowledge:"],
+                prefix=[VECTOR_PREFIX],
                 index_type=IndexType.HASH,
             ),
         )
+        _ready_indexes.add(self.redis_url)
         logger.info(f"Created RediSearch index: {INDEX_NAME}")
 
+    async def _rebuild_index_vectors(self):
+        """Rewrite every document's kb_emb:* vector in the current layout and
+        drop the outdated index: one built over knowledge:* documents
+        (pre-split layout) or with another vector TYPE.
+
+        Every existing document is re-embedded from its stored content, not
+        just the FAQ that bot startup seeds: entries added from the dashboard
+        are never seeded again and would otherwise lose their vectors. Content
+        seen before is served by the embedding cache. If any document cannot
+        be embedded nothing is changed, and the next seed tries again.
+        """
+        doc_keys = [key async for key in self.redis.scan_iter(match=f"{DOC_PREFIX}*", count=500)]
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for doc_key in doc_keys:
+                pipe.hmget(doc_key, "content", "category", "source_key")
+            fields = await pipe.execute()
+
+        docs = [
+            (doc_key[len(DOC_PREFIX):], content, category, source_key)
+            for doc_key, (content, category, source_key) in zip(doc_keys, fields)
+            if content is not None
+        ]
+        embeddings = await self._get_embeddings([content.decode("utf-8") for _, content, _, _ in docs])
+        failed = sum(embedding is None for embedding in embeddings)
+        if failed:
+            raise RuntimeError(
+                f"Cannot migrate {INDEX_NAME}: {failed} of {len(docs)} documents failed to embed"
+            )
+
+        logger.info(f"Rebuilding {INDEX_NAME} over {VECTOR_PREFIX}* hashes ({len(docs)} documents)")
+        vector_prefix = VECTOR_PREFIX.encode("utf-8")
+        pipe = self.redis.pipeline(transaction=False)
+        for (doc_id, _, category, source_key), embedding in zip(docs, embeddings):
+            pipe.hset(vector_prefix + doc_id, mapping={
+                "category": category or doc_id,
+                "source_key": source_key or doc_id,
+                "embedding": _vector_bytes(embedding),
+            })
+            # Fields of earlier layouts (inline vectors, int8 scale)
+            pipe.hdel(vector_prefix + doc_id, "scale")
+            pipe.hdel(DOC_PREFIX.encode("utf-8") + doc_id, "embedding", "scale")
+        await pipe.execute()
+        await self.redis.ft(INDEX_NAME).dropindex(delete_documents=False)
+
     # ── Seed ────────────────────────────────────────────────────────────
 
     async def seed(self, practice_data: Dict[str, str]):
         """Embed and store FAQ data in Redis with metadata.
 
-        Each entry is stored as a Redis Hash:
+        Each entry is stored as two Redis Hashes:
           knowledge:{key}[:{chunk_idx}] -> {
               content: str,
               category: str,       # the FAQ key (hours, insurance, etc.)
               source_key: str,     # original key for tracing
-              embedding: bytes,    # FLOAT32 vector
+          }
+          kb_emb:{key}[:{chunk_idx}] -> {     # indexed
+              category: str,
+              source_key: str,
+              embedding: bytes,    # FLOAT16 vector
           }
 
         Embeddings are cached — re-seeding with identical content
-        skips the Gemini API call entirely.
+        skips the Gemini API call entirely. Cached query results are
+        cleared only when a document's content actually changed.
         """
         await self._ensure_index()
         logger.info("Seeding knowledge base...")
 
-        count = 0
+        entries = []  # (doc_id, faq_key, chunk)
         for key, content in practice_data.items():
-            chunks = self._chunk_text(content)
-            for i, chunk in enumerate(chunks):
-                embedding = await self._get_embedding(chunk)
-                if not embedding:
-                    logger.warning(f"Skipping {key} chunk {i}: embedding failed")
-                    continue
-
-                emb_bytes = np.array(embedding, dtype=np.float32).tobytes()
-                doc_key = f"knowledge:{key}" if len(chunks) == 1 else f"knowledge:{key}:{i}"
-
-                await self.redis.hset(doc_key, mapping={
-                    "content": chunk,
-                    "category": key,
-                    "source_key": key,
-                    "embedding": emb_bytes,
-                })
-                count += 1
-
-        logger.info(f"Seeded {count} documents from {len(practice_data)} FAQ entries.")
+            if len(content) <= DEFAULT_CHUNK_SIZE:
+                entries.append((key, key, content))
+                continue
+            for i, chunk in enumerate(self._chunk_text_iter(content)):
+                entries.append((f"{key}:{i}", key, chunk))
+
+        embeddings = await self._get_embeddings([chunk for _, _, chunk in entries])
+
+        # All document writes go out in one pipelined round trip; each write
+        # is preceded by a read of the old content to detect changes
+        pipe = self.redis.pipeline(transaction=False)
+        written = []
+        for (doc_id, key, chunk), embedding in zip(entries, embeddings):
+            doc_key = f"{DOC_PREFIX}{doc_id}"
+            if embedding is None:
+                logger.warning(f"Skipping {doc_key}: embedding failed")
+                continue
+
+            pipe.hget(doc_key, "content")
+            pipe.hset(doc_key, mapping={
+                "content": chunk,
+                "category": key,
+                "source_key": key,
+            })
+            pipe.hset(f"{VECTOR_PREFIX}{doc_id}", mapping={
+                "category": key,
+                "source_key": key,
+                "embedding": _vector_bytes(embedding),
+            })
+            written.append(chunk)
+
+        replies = await pipe.execute()
+        old_contents = replies[::3]
+        if any(old is None or old.decode("utf-8") != chunk
+               for old, chunk in zip(old_contents, written)):
+            await self.invalidate_query_cache()
+        logger.info(f"Seeded {len(written)} documents from {len(practice_data)} FAQ entries.")
+
+    async def invalidate_query_cache(self):
+        """Clear cached query results (FAQ content changed)."""
+        try:
+            removed = await clear_query_cache(self.redis)
+            if removed:
+                logger.info(f"Cleared {removed} cached query results")
+        except Exception as e:
+            logger.warning(f"Failed to clear query cache: {e}")
 
     # ── Query ───────────────────────────────────────────────────────────
 
@@ -217,11 +473,19 @@ class KnowledgeBase:
         Returns:
             List of dicts with keys: content, score, category, source_key
         """
+        qcache_key = self._query_cache_key(question, top_k, threshold, category_filter)
+        try:
+            hit = await self.redis.get(qcache_key)
+            if hit is not None:
+                return json.loads(hit)
+        except Exception:
+            pass  # Cache miss or error, run the full lookup
+
         query_emb = await self._get_embedding(question, use_cache=False)
-        if not query_emb:
+        if query_emb is None:
             return []
 
-        q_vec = np.array(query_emb, dtype=np.float32).tobytes()
+        q_vec = _vector_bytes(query_emb)
 
         from redis.commands.search.query import Query
 
@@ -235,7 +499,7 @@ class KnowledgeBase:
         q = (
             Query(q_str)
             .sort_by("score")
-            .return_fields("content", "score", "category", "source_key")
+            .return_fields("score", "category", "source_key")
             .paging(0, top_k)
             .dialect(2)
         )
@@ -243,24 +507,42 @@ class KnowledgeBase:
         try:
             res = await self.redis.ft(INDEX_NAME).search(q, query_params={"vec": q_vec})
 
-            results = []
+            hits = []
             for doc in res.docs:
                 distance = float(doc.score)
                 similarity = 1 - distance
 
                 if similarity > threshold:
+                    hits.append((doc, similarity))
+
+            # Content lives outside the index: one pipelined read for all hits
+            results = []
+            if hits:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for doc, _ in hits:
+                        pipe.hget(DOC_PREFIX + doc.id[len(VECTOR_PREFIX):], "content")
+                    contents = await pipe.execute()
+
+                for (doc, similarity), content in zip(hits, contents):
+                    if content is None:
+                        continue  # Document deleted since it was indexed
                     results.append({
-                        "content": doc.content,
+                        "content": content.decode("utf-8"),
                         "score": similarity,
                         "category": doc.category,
                         "source_key": doc.source_key,
                     })
-
-            return results
         except Exception as e:
             logger.error(f"Vector search failed: {e}")
             return []
 
+        try:
+            await self.redis.set(qcache_key, json.dumps(results), ex=QUERY_CACHE_TTL_SECONDS)
+        except Exception as e:
+            logger.warning(f"Failed to cache query result: {e}")
+
+        return results
+
     # ── Lifecycle ───────────────────────────────────────────────────────
 
     async def close(self):
@@ -268,6 +550,27 @@ class KnowledgeBase:
         await self.redis.aclose()
 
 
+_knowledge_base: Optional[KnowledgeBase] = None
+
+def get_knowledge_base() -> KnowledgeBase:
+    """Process-wide KnowledgeBase; its Redis connection pool is reused by every caller."""
+    global _knowledge_base
+    if _knowledge_base is None:
+        _knowledge_base = KnowledgeBase(settings.redis_url)
+    return _knowledge_base
+
+
+async def close_knowledge_base():
+    """Close the shared KnowledgeBase and Gemini client (application shutdown)."""
+    global _knowledge_base, _genai_client
+    if _knowledge_base is not None:
+        await _knowledge_base.close()
+        _knowledge_base = None
+    if _genai_client is not None:
+        await _genai_client.aio.aclose()
+        _genai_client = None
+
+
 # ── Seed Data ───────────────────────────────────────────────────────────
 
 VALLEY_FAMILY_MEDICINE_FAQ = {
@@ -8,18 +8,20 @@ Measures the metrics that matter for voice UX:
   - Full turn duration
 
 Stores per-turn metrics in Redis for p50/p95/p99 analysis.
-Logs a summary at call end.
+Logs a summary at call end. Percentiles come from fixed-size streaming
+sketches, so memory stays bounded however long the call runs.
 
 Pipeline placement:
     STT → ... → [LatencyTracker] → LLM → TTS → [LatencyTracker] → Output
 """
 
+import math
 import time
 import logging
 import json
 import asyncio
 from typing import Optional, Dict, List
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass
 
 from pipecat.frames.frames import (
     Frame,
@@ -32,10 +34,21 @@ from pipecat.processors.frame_processor import FrameProcessor, FrameDirection
 
 logger = logging.getLogger(__name__)
 
+# Approximate cap on per-call latency stream entries (XADD MAXLEN ~)
+LATENCY_STREAM_MAXLEN = 1000
 
-@dataclass
+# Relative width of a LatencySketch bucket: quantiles are accurate to ~2.5%
+SKETCH_BUCKET_GROWTH = 1.05
+_LOG_GROWTH = math.log(SKETCH_BUCKET_GROWTH)
+
+
+@dataclass(slots=True)
 class TurnMetrics:
-    """Metrics for a single conversational turn."""
+    """Metrics for a single conversational turn.
+
+    The *_ms properties are read once per completed turn (sketch update
+    and Redis write); summaries never revisit old turns.
+    """
     turn_id: int = 0
     user_speech_end: float = 0.0
     first_llm_token: float = 0.0
@@ -73,6 +86,52 @@ class TurnMetrics:
         return 0.0
 
 
+class LatencySketch:
+    """Streaming quantile sketch over positive latencies (ms).
+
+    Values are counted in log-spaced buckets (each 5% wider than the last),
+    so `add()` is O(1) and memory is bounded by the value range rather
+    than the number of samples: 1ms–10min fits in under 300 buckets.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.min = math.inf
+        self.max = 0.0
+        self._buckets: Dict[int, int] = {}
+
+    def add(self, value: float):
+        """Record one sample; non-positive values (metric missing) are ignored."""
+        if value <= 0:
+            return
+        idx = math.floor(math.log(value) / _LOG_GROWTH)
+        self._buckets[idx] = self._buckets.get(idx, 0) + 1
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Approximate q-quantile (0.0–1.0); 0 when empty."""
+        if not self.count:
+            return 0
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for idx in sorted(self._buckets):
+            seen += self._buckets[idx]
+            if seen >= rank:
+                # Geometric midpoint of the bucket, clamped to observed range
+                estimate = SKETCH_BUCKET_GROWTH ** (idx + 0.5)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def percentiles(self) -> Dict[str, float]:
+        return {
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
 class LatencyTracker(FrameProcessor):
     """Pipecat FrameProcessor that instruments per-turn latency.
 
@@ -87,62 +146,103 @@ class LatencyTracker(FrameProcessor):
         self.redis_service = redis_service
         self._current_turn = TurnMetrics()
         self._turn_count = 0
-        self._completed_turns: List[TurnMetrics] = []
+        self._completed_turn_count = 0
+        self._ttft = LatencySketch()
+        self._ttfa = LatencySketch()
+        self._tool = LatencySketch()
         self._awaiting_first_token = False
 
+    # Handled frame types in precedence order (most specific first)
+    _HANDLERS = (
+        (TranscriptionFrame, "_on_transcription"),
+        (TextFrame, "_on_text"),
+        (AudioRawFrame, "_on_audio"),
+        (LLMFullResponseEndFrame, "_on_llm_end"),
+    )
+    # Concrete frame type -> handler name (None = ignored); resolved once
+    # per type so subclasses such as TTSAudioRawFrame still dispatch
+    _dispatch: Dict[type, Optional[str]] = {}
+
+    @classmethod
+    def _resolve_handler(cls, frame_type: type) -> Optional[str]:
+        for base, name in cls._HANDLERS:
+            if issubclass(frame_type, base):
+                break
+        else:
+            name = None
+        cls._dispatch[frame_type] = name
+        return name
+
     async def process_frame(self, frame: Frame, direction: FrameDirection):
         await super().process_frame(frame, direction)
-        now = time.monotonic()
-
-        # ── User speech end (start of agent turn) ───────────────
-        if isinstance(frame, TranscriptionFrame):
-            text = frame.text.strip() if hasattr(frame, "text") else ""
-            if text:
-                # Each new user utterance starts a new turn
-                self._turn_count += 1
-                self._current_turn = TurnMetrics(turn_id=self._turn_count)
-                self._current_turn.user_speech_end = now
-                self._awaiting_first_token = True
-
-        # ── First LLM token ─────────────────────────────────────
-        elif isinstance(frame, TextFrame) and self._awaiting_first_token:
-            if self._current_turn.user_speech_end > 0:
-                self._current_turn.first_llm_token = now
-                self._awaiting_first_token = False
-                ttft = self._current_turn.ttft_ms
-                logger.info(
-                    f"[LATENCY] Turn {self._turn_count} TTFT: {ttft:.0f}ms"
-                )
-
-        # ── First audio output ──────────────────────────────────
-        elif isinstance(frame, AudioRawFrame):
-            if (
-                self._current_turn.user_speech_end > 0
-                and self._current_turn.first_audio_out == 0
-            ):
-                self._current_turn.first_audio_out = now
-                ttfa = self._current_turn.ttfa_ms
-                logger.info(
-                    f"[LATENCY] Turn {self._turn_count} TTFA: {ttfa:.0f}ms"
-                )
-
-        # ── LLM response complete ──────────────────────────────
-        elif isinstance(frame, LLMFullResponseEndFrame):
-            if self._current_turn.user_speech_end > 0:
-                self._current_turn.llm_complete = now
-                total = self._current_turn.total_turn_ms
-                logger.info(
-                    f"[LATENCY] Turn {self._turn_count} total: {total:.0f}ms"
-                )
-                self._completed_turns.append(self._current_turn)
-
-                # Store in Redis if available
-                if self.redis_service:
-                    await self._store_turn_metrics(self._current_turn)
+
+        frame_type = type(frame)
+        try:
+            name = self._dispatch[frame_type]
+        except KeyError:
+            name = self._resolve_handler(frame_type)
+
+        if name is not None:
+            turn = getattr(self, name)(frame)
+            # Store completed turns in Redis if available
+            if turn is not None and self.redis_service:
+                await self._store_turn_metrics(turn)
 
         # Always pass frame through
         await self.push_frame(frame, direction)
 
+    # ── Frame handlers (return a completed turn to persist, if any) ──
+    # The clock is read only when a timestamp is actually recorded.
+
+    def _on_transcription(self, frame: TranscriptionFrame) -> None:
+        """User speech end (start of agent turn)."""
+        text = frame.text.strip() if hasattr(frame, "text") else ""
+        if text:
+            # Each new user utterance starts a new turn
+            self._turn_count += 1
+            self._current_turn = TurnMetrics(turn_id=self._turn_count)
+            self._current_turn.user_speech_end = time.monotonic()
+            self._awaiting_first_token = True
+
+    def _on_text(self, frame: TextFrame) -> None:
+        """First LLM token."""
+        if self._awaiting_first_token and self._current_turn.user_speech_end > 0:
+            self._current_turn.first_llm_token = time.monotonic()
+            self._awaiting_first_token = False
+            ttft = self._current_turn.ttft_ms
+            logger.info(
+                f"[LATENCY] Turn {self._turn_count} TTFT: {ttft:.0f}ms"
+            )
+
+    def _on_audio(self, frame: AudioRawFrame) -> None:
+        """First audio output (every other chunk returns at once)."""
+        turn = self._current_turn
+        if turn.first_audio_out or not turn.user_speech_end:
+            return
+        turn.first_audio_out = time.monotonic()
+        logger.info(
+            f"[LATENCY] Turn {self._turn_count} TTFA: {turn.ttfa_ms:.0f}ms"
+        )
+
+    def _on_llm_end(self, frame: LLMFullResponseEndFrame) -> Optional[TurnMetrics]:
+        """LLM response complete."""
+        if self._current_turn.user_speech_end > 0:
+            self._current_turn.llm_complete = time.monotonic()
+            total = self._current_turn.total_turn_ms
+            logger.info(
+                f"[LATENCY] Turn {self._turn_count} total: {total:.0f}ms"
+            )
+            self._record_turn(self._current_turn)
+            return self._current_turn
+        return None
+
+    def _record_turn(self, turn: TurnMetrics):
+        """Fold a completed turn into the running percentile sketches."""
+        self._completed_turn_count += 1
+        self._ttft.add(turn.ttft_ms)
+        self._ttfa.add(turn.ttfa_ms)
+        self._tool.add(turn.tool_duration_ms)
+
     def mark_tool_start(self):
         """Call this before executing a tool."""
         self._current_turn.tool_call_start = time.monotonic()
@@ -166,36 +266,22 @@ class LatencyTracker(FrameProcessor):
                 "total_ms": f"{turn.total_turn_ms:.1f}",
             }
             await self.redis_service.client.xadd(
-                f"call:{self.call_id}:latency", metrics
+                f"call:{self.call_id}:latency", metrics,
+                maxlen=LATENCY_STREAM_MAXLEN, approximate=True,
             )
         except Exception as e:
             logger.warning(f"Failed to store latency metrics: {e}")
 
     def get_summary(self) -> Dict:
         """Get p50/p95/p99 summary for the call."""
-        if not self._completed_turns:
+        if not self._completed_turn_count:
             return {"turns": 0}
 
-        ttfts = [t.ttft_ms for t in self._completed_turns if t.ttft_ms > 0]
-        ttfas = [t.ttfa_ms for t in self._completed_turns if t.ttfa_ms > 0]
-        tools = [t.tool_duration_ms for t in self._completed_turns if t.tool_duration_ms > 0]
-
-        def percentiles(values):
-            if not values:
-                return {"p50": 0, "p95": 0, "p99": 0}
-            s = sorted(values)
-            n = len(s)
-            return {
-                "p50": s[n // 2],
-                "p95": s[int(n * 0.95)] if n >= 20 else s[-1],
-                "p99": s[int(n * 0.99)] if n >= 100 else s[-1],
-            }
-
         summary = {
-            "turns": len(self._completed_turns),
-            "ttft": percentiles(ttfts),
-            "ttfa": percentiles(ttfas),
-            "tool_calls": percentiles(tools),
+            "turns": self._completed_turn_count,
+            "ttft": self._ttft.percentiles(),
+            "ttfa": self._ttfa.percentiles(),
+            "tool_calls": self._tool.percentiles(),
         }
 
         logger.info(
@@ -7,6 +7,17 @@ from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+
+def _format_interaction(interaction: dict) -> Optional[str]:
+    """Render one logged interaction as a transcript line (None if not speech)."""
+    role = interaction.get("role") or interaction.get("type", "").partition("_")[0]
+    if "user" in role:
+        return f"Customer: {interaction.get('text', '')}"
+    if "assistant" in role or "agent" in role:
+        return f"Agent: {interaction.get('text', '')}"
+    return None
+
+
 class PresenceHandler:
     """
     Handler for Daily participant events and call lifecycle management.
@@ -32,19 +43,20 @@ class PresenceHandler:
         if is_local:
             return
 
-        # Update call state in Redis
+        # Update call state in Redis. Only the fields changed here are
+        # written back, so a state transition made meanwhile is kept.
         state = await self.redis_service.get_call_state(self.call_id)
         if state:
             participants = state.get("participants", [])
             if participant_id not in participants:
                 participants.append(participant_id)
-                state["participants"] = participants
+            updates = {"participants": participants}
 
             if state.get("status") == "pending":
-                state["status"] = "active"
+                updates["status"] = "active"
                 logger.info(f"Call {self.call_id} status updated to 'active'")
 
-            await self.redis_service.set_call_state(self.call_id, state)
+            await self.redis_service.set_call_state(self.call_id, updates)
 
     async def on_participant_left(self, participant: dict) -> None:
         """Handle participant left event."""
@@ -61,13 +73,13 @@ class PresenceHandler:
             participants = state.get("participants", [])
             if participant_id in participants:
                 participants.remove(participant_id)
-                state["participants"] = participants
+            updates = {"participants": participants}
 
             if len(participants) == 0 and state.get("status") == "active":
-                state["status"] = "waiting"
+                updates["status"] = "waiting"
                 logger.info(f"Call {self.call_id} status updated to 'waiting' (no participants)")
 
-            await self.redis_service.set_call_state(self.call_id, state)
+            await self.redis_service.set_call_state(self.call_id, updates)
 
     async def on_call_ended(self) -> None:
         """Handle call ended event (e.g., bot left or room expired)."""
@@ -77,7 +89,9 @@ class PresenceHandler:
         if state and state.get("status") != "completed":
             state["status"] = "completed"
             state["ended_at"] = json.dumps(True) # Just a marker
-            await self.redis_service.set_call_state(self.call_id, state)
+            await self.redis_service.set_call_state(
+                self.call_id, {"status": "completed", "ended_at": state["ended_at"]}
+            )
             logger.info(f"Call {self.call_id} status updated to 'completed'")
 
             # Trigger post-call analysis/learning
@@ -96,22 +110,14 @@ class PresenceHandler:
                 logger.info(f"No interactions found for call {self.call_id}, skipping analysis")
                 return
 
-            # Build transcript from interactions (wnbHack pattern)
-            transcript_parts = []
-            for interaction in interactions:
-                role = interaction.get("role", "") or interaction.get("type", "").split("_")[0]
-                text = interaction.get("text", "")
-
-                if "user" in role:
-                    transcript_parts.append(f"Customer: {text}")
-                elif "assistant" in role or "agent" in role:
-                    transcript_parts.append(f"Agent: {text}")
+            # Build transcript from interactions (wnbHack pattern); lines are
+            # streamed straight into join, non-speech rows are dropped
+            full_transcript = "\n".join(filter(None, map(_format_interaction, interactions)))
 
-            if not transcript_parts:
+            if not full_transcript:
                 logger.info(f"No speech interactions for call {self.call_id}, skipping analysis")
                 return
 
-            full_transcript = "\n".join(transcript_parts)
             logger.info(f"Built transcript for call {self.call_id}: {len(full_transcript)} chars")
 
             # Store full transcript in Redis for the dashboard
@@ -23,13 +23,16 @@ class PromptManager:
         Get the most specific system prompt available.
         Fallback: Provider -> Specialty -> Default.
         """
-        key = "default"
-        if provider_id and f"provider:{provider_id}" in self._prompts:
+        prompts = self._prompts
+        if provider_id:
             key = f"provider:{provider_id}"
-        elif specialty and f"specialty:{specialty}" in self._prompts:
+            if key in prompts:
+                return prompts[key]
+        if specialty:
             key = f"specialty:{specialty}"
-            
-        return self._prompts.get(key, BASE_SYSTEM_PROMPT)
+            if key in prompts:
+                return prompts[key]
+        return prompts.get("default", BASE_SYSTEM_PROMPT)
 
     def update_prompt(self, key: str, content: str):
         """Update a prompt version."""
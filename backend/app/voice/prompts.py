@@ -31,10 +31,11 @@ regardless of verification status.
 """
 
 
-def get_post_verification_prompt(patient_name: str) -> str:
-    """Generate post-verification prompt with patient context."""
-    return f"""You are a friendly, professional receptionist at {PRACTICE_NAME}. \
-You are speaking with a verified patient: {patient_name}.
+# Post-verification prompt, pre-rendered around the patient name at import
+_POST_PREFIX = f"""You are a friendly, professional receptionist at {PRACTICE_NAME}. \
+You are speaking with a verified patient: """
+
+_POST_SUFFIX = """.
 
 You can now help them with:
 - Scheduling appointments (use list_providers, get_availability, book_appointment tools)
@@ -63,3 +64,8 @@ stroke symptoms, suicidal thoughts), immediately provide emergency guidance: \
 immediately, or go to your nearest emergency room."
 Do NOT attempt to schedule or verify identity.
 """
+
+
+def get_post_verification_prompt(patient_name: str) -> str:
+    """Generate post-verification prompt with patient context."""
+    return _POST_PREFIX + patient_name + _POST_SUFFIX
@@ -2,6 +2,7 @@
 SMS service using Twilio.
 """
 
+import asyncio
 import logging
 from twilio.rest import Client
 from app.config import settings
@@ -30,11 +31,10 @@ class SMSService:
         )
 
         try:
-            # Twilio's async client is separate, but standard client is sync.
-            # For low volume, running sync in async function blocks loop briefly.
-            # Better to run in executor or use twilio's async http client.
-            # Simplified: just run sync for now, it's fast enough for prototype.
-            message = self.client.messages.create(
+            # The standard Twilio client is sync; run the HTTP POST in a worker
+            # thread so the voice pipeline keeps running while it is in flight.
+            message = await asyncio.to_thread(
+                self.client.messages.create,
                 body=body,
                 from_=self.from_number,
                 to=to_number
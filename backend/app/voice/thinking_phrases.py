@@ -10,73 +10,128 @@ Usage:
 """
 
 import random
+from collections import deque
+from contextvars import ContextVar
+from functools import lru_cache, partial
 from typing import Optional
 
 # ── Phrase Pools ────────────────────────────────────────────────────────
 # Grouped by tool type for context-appropriate responses.
 # Each pool has enough variety to avoid repetition across a single call.
+# Pools are tuples: immutable, compact and cheap to iterate on every pick.
 
-TOOL_PHRASES = {
-    "verify_patient": [
+TOOL_PHRASES: dict[str, tuple[str, ...]] = {
+    "verify_patient": (
         "Let me pull up your records real quick.",
         "One moment while I look you up in our system.",
         "Let me verify that for you.",
         "Sure, let me check on that right now.",
         "Pulling up your information now.",
-    ],
-    "search_knowledge_base": [
+    ),
+    "search_knowledge_base": (
         "Let me check on that for you.",
         "One moment, I'm looking that up.",
         "Great question, let me find that information.",
         "Sure, give me just a second.",
         "Let me look into that.",
-    ],
-    "get_availability": [
+    ),
+    "get_availability": (
         "Let me check what we have available.",
         "One moment while I look at the schedule.",
         "Let me see what times are open.",
         "Sure, pulling up the calendar now.",
         "Let me check our availability for you.",
-    ],
-    "book_appointment": [
+    ),
+    "book_appointment": (
         "Let me get that booked for you.",
         "One moment while I confirm that slot.",
         "Sure, I'm scheduling that right now.",
         "Let me lock that in for you.",
         "Getting that appointment set up now.",
-    ],
-    "check_insurance": [
+    ),
+    "check_insurance": (
         "Let me verify your coverage.",
         "One moment while I check your plan.",
         "Let me look into your insurance details.",
         "Sure, checking on that now.",
         "Pulling up your insurance information.",
-    ],
-    "list_providers": [
+    ),
+    "list_providers": (
         "Let me see who's available.",
         "One moment while I check our providers.",
         "Let me pull up our provider list.",
         "Sure, looking that up now.",
         "Let me find our available providers.",
-    ],
+    ),
 }
 
 # Fallback phrases for any tool type not explicitly mapped
-DEFAULT_PHRASES = [
+DEFAULT_PHRASES: tuple[str, ...] = (
     "One moment please.",
     "Let me look into that.",
     "Sure, give me just a second.",
     "Working on that for you.",
     "Let me check on that.",
-]
+)
 
-# Track recently used phrases per call to avoid repetition
-_recent_phrases: dict[str, list[str]] = {}
+# Number of recent phrases per call+tool that are not repeated
+RECENT_PHRASE_WINDOW = 3
+
+# Recently used phrases of the call running in the current context:
+# {tool_name: (last phrases in order, same phrases as a set)}. Set by
+# start_call_phrases(); tasks spawned by the call's pipeline inherit it, so
+# concurrent calls never share (or contend on) a dict.
+_call_phrase_ctx: ContextVar[Optional[dict[str, tuple[deque, set]]]] = ContextVar(
+    "thinking_phrases", default=None,
+)
+
+# Fallback for callers outside a started call context, keyed by call_id
+_recent_phrases: dict[str, dict[str, tuple[deque, set]]] = {}
+
+
+# Random stream of the call running in the current context (see above);
+# the module-level generator is only used outside a started call.
+_rng_ctx: ContextVar[Optional[random.Random]] = ContextVar("thinking_phrases_rng", default=None)
+
+
+def start_call_phrases() -> None:
+    """Give the current call (and every task it spawns) its own phrase history
+    and random generator."""
+    _call_phrase_ctx.set({})
+    _rng_ctx.set(random.Random())
+
+
+@lru_cache(maxsize=256)
+def _available(pool: tuple, recent_key: frozenset) -> tuple:
+    """Phrases of `pool` not in `recent_key`, computed once per combination.
+
+    The key space is tiny (a handful of pools times the subsets of at most
+    RECENT_PHRASE_WINDOW of their phrases), so the cache is never evicted.
+    """
+    return tuple(p for p in pool if p not in recent_key)
+
+
+def _pick_excluding(pool, recent, rng=random) -> Optional[str]:
+    """Uniform random pick from `pool` minus `recent`, None if nothing is left.
+
+    The eligible phrases come from the memoized `_available` table, so a
+    pick is one cache hit and one random draw.
+    """
+    eligible = _available(tuple(pool), frozenset(recent))
+    return rng.choice(eligible) if eligible else None
 
 
 def get_thinking_phrase(
     tool_name: str,
     call_id: Optional[str] = None,
+    *,
+    _pools=TOOL_PHRASES,
+    _default=DEFAULT_PHRASES,
+    _recent=_recent_phrases,
+    _phrases_ctx_get=_call_phrase_ctx.get,
+    _rng_ctx_get=_rng_ctx.get,
+    _pick=_pick_excluding,
+    _new_window=partial(deque, maxlen=RECENT_PHRASE_WINDOW),
 ) -> str:
     """Select a context-aware thinking phrase for a tool call.
 
@@ -85,36 +140,57 @@ def get_thinking_phrase(
 
     Args:
         tool_name: The function_name of the tool being called
-        call_id: Optional call ID for per-call dedup
+        call_id: Call ID for per-call dedup when no call context was started
 
     Returns:
         A natural-sounding filler phrase
+
+    The underscore keyword arguments bind module globals as locals (one
+    LOAD_FAST each instead of a global lookup); callers never pass them.
     """
-    pool = TOOL_PHRASES.get(tool_name, DEFAULT_PHRASES)
+    pool = _pools.get(tool_name, _default)
+    rng = _rng_ctx_get() or random
 
     # Per-call dedup: avoid repeating phrases within the same call
-    if call_id:
-        recent_key = f"{call_id}:{tool_name}"
-        recent = _recent_phrases.get(recent_key, [])
-
-        # Filter out recently used phrases
-        available = [p for p in pool if p not in recent]
-        if not available:
+    call_phrases = _phrases_ctx_get()
+    if call_phrases is None and call_id:
+        call_phrases = _recent.get(call_id)
+        if call_phrases is None:
+            call_phrases = _recent[call_id] = {}
+
+    if call_phrases is not None:
+        entry = call_phrases.get(tool_name)
+        if entry is None:
+            entry = call_phrases[tool_name] = (_new_window(), set())
+        recent, seen = entry
+
+        # Pick among phrases not used recently (O(1) set membership)
+        phrase = _pick(pool, seen, rng)
+        if phrase is None:
             # All used — reset and start over
-            available = pool
-            recent = []
+            phrase = rng.choice(pool)
+            recent.clear()
+            seen.clear()
 
-        phrase = random.choice(available)
+        # The deque drops its oldest phrase on append; keep the set in step
+        if len(recent) == recent.maxlen:
+            seen.discard(recent[0])
         recent.append(phrase)
-        _recent_phrases[recent_key] = recent[-3:]  # Keep last 3
+        seen.add(phrase)
     else:
-        phrase = random.choice(pool)
+        phrase = rng.choice(pool)
 
     return phrase
 
 
-def clear_call_phrases(call_id: str):
-    """Clean up phrase tracking for a completed call."""
-    keys_to_remove = [k for k in _recent_phrases if k.startswith(f"{call_id}:")]
-    for k in keys_to_remove:
-        del _recent_phrases[k]
+def clear_call_phrases(
+    call_id: str,
+    *,
+    _phrases_ctx_set=_call_phrase_ctx.set,
+    _rng_ctx_set=_rng_ctx.set,
+    _recent_pop=_recent_phrases.pop,
+):
+    """Clean up phrase tracking for a completed call (no scan of other calls)."""
+    _phrases_ctx_set(None)
+    _rng_ctx_set(None)
+    _recent_pop(call_id, None)
@@ -4,16 +4,29 @@ EHR Tool wrappers for OpenAI function calling in the voice pipeline.
 All tools are always registered with the LLM. Gated tools check
 call_state == VERIFIED before executing. If not verified, they return
 a structured error that the LLM incorporates into its response.
+
+Handlers return their result already encoded as UTF-8 bytes (orjson output
+or encoded text); only the pipecat boundary in bot.py decodes it.
 """
 
-import json
+import asyncio
 import logging
+import sys
+import time
+from collections import OrderedDict
+import orjson
 import weave
 from datetime import date, datetime
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Dict, List, Literal, Optional, Tuple, Type
+
+from pydantic import BaseModel, Field, ValidationError
 
 from app.services.ehr.interface import EHRService
+from app.services.ehr.models import VisitType
 from app.voice.call_state import CallState, CallStateMachine
+from app.voice.knowledge import KnowledgeBase, get_knowledge_base
 from app.config import settings
 
 logger = logging.getLogger(__name__)
@@ -23,158 +36,224 @@ logger = logging.getLogger(__name__)
 # Tool schemas (OpenAI function-calling format)
 # ---------------------------------------------------------------------------
 
-TOOL_SCHEMAS: List[Dict[str, Any]] = [
-    {
-        "type": "function",
-        "function": {
-            "name": "verify_patient",
-            "description": "Verify a caller's identity by looking up their name and date of birth in the EHR system. Use this BEFORE any other EHR tools.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "name": {
-                        "type": "string",
-                        "description": "The patient's full name, e.g. 'John Smith'",
-                    },
-                    "date_of_birth": {
-                        "type": "string",
-                        "description": "The patient's date of birth in YYYY-MM-DD format, e.g. '1990-05-15'",
-                    },
-                },
-                "required": ["name", "date_of_birth"],
-            },
-        },
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "list_providers",
-            "description": "List all available healthcare providers/doctors in the practice. Use this when the patient wants to know who they can see.",
-            "parameters": {
-                "type": "object",
-                "properties": {},
-                "required": [],
-            },
-        },
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "get_availability",
-            "description": "Get available appointment slots for a specific provider within a date range. Requires identity verification first.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "provider_id": {
-                        "type": "string",
-                        "description": "The unique ID of the healthcare provider/doctor.",
-                    },
-                    "start_date": {
-                        "type": "string",
-                        "description": "Start date for availability search in YYYY-MM-DD format. Calculate this based on the user's request (e.g. 'next Tuesday').",
-                    },
-                    "end_date": {
-                        "type": "string",
-                        "description": "End date for availability search in YYYY-MM-DD format. Calculate this based on the user's request.",
-                    },
-                },
-                "required": ["provider_id", "start_date", "end_date"],
-            },
-        },
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "book_appointment",
-            "description": "Book an appointment for the verified patient in a specific time slot. ALWAYS confirm details with the patient before calling this.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "slot_id": {
-                        "type": "string",
-                        "description": "The ID of the available time slot to book.",
-                    },
-                    "visit_type": {
-                        "type": "string",
-                        "enum": ["routine", "urgent", "checkup", "followup"],
-                        "description": "Type of visit. Map patient language: 'check-up'/'annual' → checkup, 'follow-up' → followup, 'sick visit' → urgent, otherwise → routine.",
-                    },
-                },
-                "required": ["slot_id", "visit_type"],
-            },
+# Each tool's arguments are a pydantic model: the JSON schema the LLM sees is
+# generated from it, and dispatch_tool validates the LLM's arguments with it
+# (pydantic-core) before calling the handler, so the two cannot drift.
+
+class VerifyPatientArgs(BaseModel):
+    name: str = Field(description="The patient's full name, e.g. 'John Smith'")
+    date_of_birth: str = Field(
+        description="The patient's date of birth in YYYY-MM-DD format, e.g. '1990-05-15'",
+    )
+
+
+class ListProvidersArgs(BaseModel):
+    pass
+
+
+class GetAvailabilityArgs(BaseModel):
+    provider_id: str = Field(description="The unique ID of the healthcare provider/doctor.")
+    start_date: str = Field(
+        description="Start date for availability search in YYYY-MM-DD format. Calculate this based on the user's request (e.g. 'next Tuesday').",
+    )
+    end_date: str = Field(
+        description="End date for availability search in YYYY-MM-DD format. Calculate this based on the user's request.",
+    )
+
+
+class BookAppointmentArgs(BaseModel):
+    slot_id: str = Field(description="The ID of the available time slot to book.")
+    visit_type: Literal["routine", "urgent", "checkup", "followup"] = Field(
+        description="Type of visit. Map patient language: 'check-up'/'annual' → checkup, 'follow-up' → followup, 'sick visit' → urgent, otherwise → routine.",
+    )
+
+
+class CheckInsuranceArgs(BaseModel):
+    plan_id: str = Field(description="The insurance plan ID to verify coverage against.")
+
+
+class SearchKnowledgeBaseArgs(BaseModel):
+    query: str = Field(
+        description="The user's question, e.g. 'What are your hours?' or 'Do you take Aetna?'",
+    )
+
+
+# (name, description, argument model), in the order the LLM sees the tools
+_TOOLS: Tuple[Tuple[str, str, Type[BaseModel]], ...] = (
+    (
+        "verify_patient",
+        "Verify a caller's identity by looking up their name and date of birth in the EHR system. Use this BEFORE any other EHR tools.",
+        VerifyPatientArgs,
+    ),
+    (
+        "list_providers",
+        "List all available healthcare providers/doctors in the practice. Use this when the patient wants to know who they can see.",
+        ListProvidersArgs,
+    ),
+    (
+        "get_availability",
+        "Get available appointment slots for a specific provider within a date range. Requires identity verification first.",
+        GetAvailabilityArgs,
+    ),
+    (
+        "book_appointment",
+        "Book an appointment for the verified patient in a specific time slot. ALWAYS confirm details with the patient before calling this.",
+        BookAppointmentArgs,
+    ),
+    (
+        "check_insurance",
+        "Check insurance coverage for the verified patient. Requires identity verification first.",
+        CheckInsuranceArgs,
+    ),
+    (
+        "search_knowledge_base",
+        "Answer general questions about the medical practice (hours, location, insurance, policies). Does NOT require verification.",
+        SearchKnowledgeBaseArgs,
+    ),
+)
+
+
+def _parameters_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """Function-calling parameters for `model`, without pydantic's titles."""
+    schema = model.model_json_schema()
+    return {
+        "type": "object",
+        "properties": {
+            field: {k: v for k, v in prop.items() if k != "title"}
+            for field, prop in schema.get("properties", {}).items()
         },
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "check_insurance",
-            "description": "Check insurance coverage for the verified patient. Requires identity verification first.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "plan_id": {
-                        "type": "string",
-                        "description": "The insurance plan ID to verify coverage against.",
-                    },
-                },
-                "required": ["plan_id"],
-            },
-        },
-    },
+        "required": schema.get("required", []),
+    }
+
+
+TOOL_SCHEMAS: List[Dict[str, Any]] = [
     {
         "type": "function",
         "function": {
-            "name": "search_knowledge_base",
-            "description": "Answer general questions about the medical practice (hours, location, insurance, policies). Does NOT require verification.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "The user's question, e.g. 'What are your hours?' or 'Do you take Aetna?'",
-                    },
-                },
-                "required": ["query"],
-            },
+            "name": name,
+            "description": description,
+            "parameters": _parameters_schema(model),
         },
-    },
+    }
+    for name, description, model in _TOOLS
 ]
 
+# Name lookup, computed once at import. The schema dicts stay plain
+# (not MappingProxyType) because pipecat copies and serializes context tools.
+TOOL_FUNCTIONS: Dict[str, Dict[str, Any]] = {
+    schema["function"]["name"]: schema["function"] for schema in TOOL_SCHEMAS
+}
+
 
 # ---------------------------------------------------------------------------
 # Tool execution handlers
 # ---------------------------------------------------------------------------
 
-def _gate_check_error() -> str:
-    """Return structured error for gated tools called before verification."""
-    return json.dumps({
-        "error": "identity_not_verified",
-        "message": "I need to verify your identity first. Can I get your full name and date of birth?",
-    })
+def _maybe_op(fn):
+    """weave.op() when tracing is enabled, else the function unchanged."""
+    return weave.op()(fn) if settings.weave_enabled else fn
+
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize a tool result (orjson: C-level, compact, already UTF-8)."""
+    return orjson.dumps(obj)
+
+
+# Constant error payloads, serialized once. _GATE_ERROR is returned by the
+# gated tools when called before verification.
+_GATE_ERROR = _dumps({
+    "error": "identity_not_verified",
+    "message": "I need to verify your identity first. Can I get your full name and date of birth?",
+})
+_NO_PATIENT = _dumps({"error": "no_patient", "message": "Patient information not found."})
+_LOOKUP_FAILED = _dumps({"error": "lookup_failed", "message": "I'm having trouble looking that up. Could you try again?"})
+_VERIFY_FAILED = _dumps({
+    "verified": False,
+    "message": "I couldn't find a patient matching that name and date of birth. Could you double-check the spelling or try again?",
+})
+# %s takes the JSON-escaped tool name (without quotes)
+_UNKNOWN_TOOL_TMPL = b'{"error":"unknown_tool","message":"Unknown tool: %s"}'
+
+
+_KB_NO_RESULTS = (
+    b"No relevant information found in the knowledge base. I suggest asking "
+    b"the patient if they would like to be transferred to the front desk."
+)
+
 
+# Recent knowledge-base answers, keyed by normalized query. FAQ questions
+# repeat constantly; a hit skips the prefetch cache, Redis and formatting.
+KB_RESPONSE_CACHE_SIZE = 512
+KB_RESPONSE_CACHE_TTL_SECONDS = 300.0
+_kb_responses: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+# {normalized_query: (expires_at, formatted_response)}, least recent first
 
-@weave.op()
+
+def _kb_cache_get(key: str) -> Optional[bytes]:
+    entry = _kb_responses.get(key)
+    if entry is None:
+        return None
+    expires_at, response = entry
+    if expires_at <= time.monotonic():
+        del _kb_responses[key]
+        return None
+    _kb_responses.move_to_end(key)
+    return response
+
+
+def _kb_cache_put(key: str, response: bytes) -> None:
+    _kb_responses[key] = (time.monotonic() + KB_RESPONSE_CACHE_TTL_SECONDS, response)
+    _kb_responses.move_to_end(key)
+    if len(_kb_responses) > KB_RESPONSE_CACHE_SIZE:
+        _kb_responses.popitem(last=False)
+
+
+def clear_kb_response_cache() -> None:
+    """Drop every cached KB answer (call after editing the knowledge base)."""
+    _kb_responses.clear()
+
+
+# Slots offered to the LLM per availability lookup (not to overwhelm it)
+MAX_SLOTS_RETURNED = 10
+
+
+@lru_cache(maxsize=1024)
+def _parse_date(value: str) -> date:
+    """ISO date from the LLM; the same few dates recur throughout a call."""
+    return date.fromisoformat(value)
+
+
+@_maybe_op
 async def execute_search_knowledge_base(
     call_id: str,
     call_state: CallStateMachine,
     ehr_service: EHRService,
     *,
     query: str,
-    kb: 'KnowledgeBase | None' = None,
+    kb: Optional[KnowledgeBase] = None,
     prefetcher=None,
-) -> str:
+) -> bytes:
     """Query knowledge base. UNGATED.
 
     Optimized for latency:
+      0. Check the in-process LRU of recent formatted answers
       1. Check prefetch cache (populated by KBPrefetcher during STT)
-      2. Fall back to shared KB instance (passed from bot.py)
-      3. Last resort: create a new KB instance
+      2. Fall back to the KB instance passed from bot.py
+      3. Otherwise use the process-wide KB (pooled connection, never closed here)
     """
+    cache_key = " ".join(query.lower().split())
+    cached = _kb_cache_get(cache_key)
+    if cached is not None:
+        logger.info(f"[KB] Using cached answer for: '{query[:50]}'")
+        return cached
+
     results = None
 
     # ── Try prefetch cache first (near-zero latency) ────────────
     if prefetcher is not None:
-        results = prefetcher.get_cached_result(query)
+        # An empty prefetch may be a failed lookup or a fuzzy hit on another
+        # question: treat it as a miss and ask the KB
+        results = prefetcher.get_cached_result(query) or None
         if results is not None:
             logger.info(f"[KB] Using prefetched results for: '{query[:50]}'")
 
@@ -183,21 +262,18 @@ async def execute_search_knowledge_base(
         try:
             _kb = kb
             if _kb is None:
-                from app.voice.knowledge import KnowledgeBase
-                _kb = KnowledgeBase(settings.redis_url)
+                _kb = get_knowledge_base()
 
             results = await _kb.query(query, top_k=3)
 
-            # Only close if we created a new instance
-            if kb is None and _kb is not None:
-                await _kb.close()
-
         except Exception as e:
             logger.error(f"KB query error: {e}")
-            return f"I'm sorry, I'm having trouble accessing the knowledge base right now. Error: {str(e)}"
+            return f"I'm sorry, I'm having trouble accessing the knowledge base right now. Error: {str(e)}".encode()
 
+    # Not cached: query() also returns [] when embedding or search fails,
+    # and one blip must not hide the KB from every caller for the TTL
     if not results:
-        return "No relevant information found in the knowledge base. I suggest asking the patient if they would like to be transferred to the front desk."
+        return _KB_NO_RESULTS
 
     # Format results for LLM with metadata
     context_parts = []
@@ -210,10 +286,12 @@ async def execute_search_knowledge_base(
             f"[{i}] (relevance: {score:.2f}, source: {source})\n{content}"
         )
 
-    return "Relevant information found:\n\n" + "\n\n".join(context_parts)
+    response = ("Relevant information found:\n\n" + "\n\n".join(context_parts)).encode()
+    _kb_cache_put(cache_key, response)
+    return response
 
 
-@weave.op()
+@_maybe_op
 async def execute_verify_patient(
     call_id: str,
     call_state: CallStateMachine,
@@ -221,7 +299,7 @@ async def execute_verify_patient(
     *,
     name: str,
     date_of_birth: str,
-) -> str:
+) -> bytes:
     """
     Verify patient identity. NOT gated — this IS the verification.
     On match: transitions call state to VERIFIED, stores patient_id.
@@ -230,35 +308,30 @@ async def execute_verify_patient(
         patient = await ehr_service.lookup_patient(name, date_of_birth)
     except Exception as e:
         logger.error("EHR lookup failed: %s", e)
-        return json.dumps({"error": "lookup_failed", "message": "I'm having trouble looking that up. Could you try again?"})
+        return _LOOKUP_FAILED
 
     if patient is None:
         logger.info("Call %s: verification failed for %s / %s", call_id, name, date_of_birth)
-        return json.dumps({
-            "verified": False,
-            "message": "I couldn't find a patient matching that name and date of birth. Could you double-check the spelling or try again?",
-        })
+        return _VERIFY_FAILED
+
+    full_name = patient.name[0].full_name
 
-    # Verification success — transition state
+    # Verification success — transition state (from ROUTING or GREETING)
+    # and store the patient in a single round trip
     try:
-        current_state = await call_state.get_state(call_id)
-        # Allow transition from ROUTING or GREETING
-        if current_state in (CallState.ROUTING, CallState.GREETING):
-            await call_state.transition(call_id, CallState.VERIFIED)
-        await call_state.set_metadata(call_id, "patient_id", patient.id)
-        await call_state.set_metadata(call_id, "patient_name", patient.name[0].full_name)
+        await call_state.verify_and_store(call_id, patient.id, full_name)
     except Exception as e:
         logger.error("State transition failed: %s", e)
 
-    logger.info("Call %s: patient verified — %s", call_id, patient.name[0].full_name)
-    return json.dumps({
+    logger.info("Call %s: patient verified — %s", call_id, full_name)
+    return _dumps({
         "verified": True,
         "patient_id": patient.id,
-        "patient_name": patient.name[0].full_name,
+        "patient_name": full_name,
     })
 
 
-@weave.op()
+@_maybe_op
 async def execute_get_availability(
     call_id: str,
     call_state: CallStateMachine,
@@ -267,32 +340,38 @@ async def execute_get_availability(
     provider_id: str,
     start_date: str,
     end_date: str,
-) -> str:
+) -> bytes:
     """Get available slots. GATED — requires VERIFIED state."""
     if not await call_state.is_verified(call_id):
-        return _gate_check_error()
+        return _GATE_ERROR
 
     try:
-        start = date.fromisoformat(start_date)
-        end = date.fromisoformat(end_date)
-        slots = await ehr_service.get_availability(provider_id, start, end)
-        return json.dumps({
+        start = _parse_date(start_date)
+        end = _parse_date(end_date)
+        # One slot past the limit tells us whether a full count is needed
+        slots = await ehr_service.get_availability(
+            provider_id, start, end, limit=MAX_SLOTS_RETURNED + 1,
+        )
+        total_available = len(slots)
+        if total_available > MAX_SLOTS_RETURNED:
+            total_available = await ehr_service.count_availability(
+                provider_id, start, end,
+            )
+        # datetimes go to orjson as-is; it emits the same ISO 8601 text
+        # as isoformat() without a Python-level call per slot
+        return _dumps({
             "slots": [
-                {
-                    "slot_id": s.id,
-                    "start": s.start.isoformat(),
-                    "end": s.end.isoformat(),
-                }
-                for s in slots[:10]  # Limit to 10 to not overwhelm
+                {"slot_id": s.id, "start": s.start, "end": s.end}
+                for s in islice(slots, MAX_SLOTS_RETURNED)
             ],
-            "total_available": len(slots),
+            "total_available": total_available,
         })
     except Exception as e:
         logger.error("get_availability failed: %s", e)
-        return json.dumps({"error": "availability_error", "message": str(e)})
+        return _dumps({"error": "availability_error", "message": str(e)})
 
 
-@weave.op()
+@_maybe_op
 async def execute_book_appointment(
     call_id: str,
     call_state: CallStateMachine,
@@ -300,97 +379,101 @@ async def execute_book_appointment(
     *,
     slot_id: str,
     visit_type: str,
-) -> str:
+) -> bytes:
     """Book an appointment. GATED — requires VERIFIED state."""
-    if not await call_state.is_verified(call_id):
-        return _gate_check_error()
+    # Gate check and patient lookup share one Redis round trip
+    verified, call_info = await call_state.get_verified_and_info(call_id)
+    if not verified:
+        return _GATE_ERROR
 
-    # Get patient_id from call metadata
-    call_info = await call_state.get_call_info(call_id)
     patient_id = call_info.get("patient_id") if call_info else None
     if not patient_id:
-        return json.dumps({"error": "no_patient", "message": "Patient information not found."})
+        return _NO_PATIENT
 
     try:
-        from app.services.ehr.models import VisitType
-        
         appointment = await ehr_service.book_appointment(
             patient_id=patient_id, # type: ignore
             slot_id=slot_id,
             visit_type=VisitType(visit_type)
         )
         
-        # Track outcome
-        await call_state.set_metadata(call_id, "scheduled", "true")
-        await call_state.set_metadata(call_id, "appointment_details", f"{appointment.start}")
-
-        # Transition to RESOLVING then COMPLETED
-        try:
-            current = await call_state.get_state(call_id)
-            if current == CallState.VERIFIED:
-                await call_state.transition(call_id, CallState.RESOLVING)
-        except Exception:
-            pass
+        # Track outcome and transition to RESOLVING (then COMPLETED)
+        # concurrently; a failed transition does not fail the booking. Only
+        # a call still VERIFIED moves: the caller may have hung up or been
+        # transferred while the EHR was booking.
+        metadata_result, _ = await asyncio.gather(
+            call_state.update_metadata(call_id, {
+                "scheduled": "true",
+                "appointment_details": f"{appointment.start}",
+            }),
+            call_state.transition(
+                call_id, CallState.RESOLVING, from_states=(CallState.VERIFIED,),
+            ),
+            return_exceptions=True,
+        )
+        if isinstance(metadata_result, Exception):
+            raise metadata_result
 
-        return json.dumps({
+        return _dumps({
             "status": "booked",
             "appointment_id": appointment.id,
-            "start": appointment.start.isoformat(),
-            "end": appointment.end.isoformat(),
+            "start": appointment.start,
+            "end": appointment.end,
             "visit_type": appointment.visit_type.value,
             "status": appointment.status.value,
             "location": settings.practice_location
         })
     except ValueError as e:
-        return json.dumps({"error": "booking_failed", "message": str(e)})
+        return _dumps({"error": "booking_failed", "message": str(e)})
     except Exception as e:
         logger.error("book_appointment failed: %s", e)
-        return json.dumps({"error": "booking_error", "message": str(e)})
+        return _dumps({"error": "booking_error", "message": str(e)})
 
 
-@weave.op()
+@_maybe_op
 async def execute_check_insurance(
     call_id: str,
     call_state: CallStateMachine,
     ehr_service: EHRService,
     *,
     plan_id: str,
-) -> str:
+) -> bytes:
     """Check insurance coverage. GATED — requires VERIFIED state."""
-    if not await call_state.is_verified(call_id):
-        return _gate_check_error()
+    # Gate check and patient lookup share one Redis round trip
+    verified, call_info = await call_state.get_verified_and_info(call_id)
+    if not verified:
+        return _GATE_ERROR
 
-    call_info = await call_state.get_call_info(call_id)
     patient_id = call_info.get("patient_id") if call_info else None
     if not patient_id:
-        return json.dumps({"error": "no_patient", "message": "Patient information not found."})
+        return _NO_PATIENT
 
     try:
         coverage = await ehr_service.check_insurance(patient_id, plan_id)
-        return json.dumps({
+        return _dumps({
             "status": coverage.status,
             "payor": [p.get("display", "Unknown") for p in coverage.payor],
         })
     except ValueError as e:
-        return json.dumps({"error": "insurance_error", "message": str(e)})
+        return _dumps({"error": "insurance_error", "message": str(e)})
     except Exception as e:
         logger.error("check_insurance failed: %s", e)
-        return json.dumps({"error": "insurance_error", "message": str(e)})
+        return _dumps({"error": "insurance_error", "message": str(e)})
 
 
-@weave.op()
+@_maybe_op
 async def execute_list_providers(
     call_id: str,
     call_state: CallStateMachine,
     ehr_service: EHRService,
-) -> str:
+) -> bytes:
     """List providers. GATED — requires VERIFIED state."""
     if not await call_state.is_verified(call_id):
-        return _gate_check_error()
+        return _GATE_ERROR
 
     try:
         providers = await ehr_service.list_practitioners()
-        return json.dumps({
+        return _dumps({
             "providers": [
                 {
                     "id": p.id,
@@ -401,24 +484,50 @@ async def execute_list_providers(
         })
     except Exception as e:
         logger.error("list_providers failed: %s", e)
-        return json.dumps({"error": "list_providers_error", "message": str(e)})
+        return _dumps({"error": "list_providers_error", "message": str(e)})
 
 
 # ---------------------------------------------------------------------------
 # Tool dispatcher
 # ---------------------------------------------------------------------------
 
+# Interned tool names: a name interned with sys.intern() can be compared to
+# these by identity (`is`), a single pointer compare
+VERIFY_PATIENT = sys.intern("verify_patient")
+LIST_PROVIDERS = sys.intern("list_providers")
+GET_AVAILABILITY = sys.intern("get_availability")
+BOOK_APPOINTMENT = sys.intern("book_appointment")
+CHECK_INSURANCE = sys.intern("check_insurance")
+SEARCH_KNOWLEDGE_BASE = sys.intern("search_knowledge_base")
+
 TOOL_HANDLERS = {
-    "verify_patient": execute_verify_patient,
-    "list_providers": execute_list_providers,
-    "get_availability": execute_get_availability,
-    "book_appointment": execute_book_appointment,
-    "check_insurance": execute_check_insurance,
-    "search_knowledge_base": execute_search_knowledge_base,
+    VERIFY_PATIENT: execute_verify_patient,
+    LIST_PROVIDERS: execute_list_providers,
+    GET_AVAILABILITY: execute_get_availability,
+    BOOK_APPOINTMENT: execute_book_appointment,
+    CHECK_INSURANCE: execute_check_insurance,
+    SEARCH_KNOWLEDGE_BASE: execute_search_knowledge_base,
 }
 
+# Tool name -> argument model (see _TOOLS)
+TOOL_ARGS: Dict[str, Type[BaseModel]] = {
+    sys.intern(name): model for name, _, model in _TOOLS
+}
 
-@weave.op()
+
+def _invalid_arguments(tool_name: str, error: ValidationError) -> bytes:
+    """Structured error naming each bad argument, for the LLM to correct."""
+    problems = "; ".join(
+        f"{'.'.join(map(str, e['loc'])) or 'arguments'}: {e['msg']}"
+        for e in error.errors(include_url=False)
+    )
+    return _dumps({
+        "error": "invalid_arguments",
+        "message": f"Invalid arguments for {tool_name}: {problems}",
+    })
+
+
+@_maybe_op
 async def dispatch_tool(
     tool_name: str,
     tool_args: Dict[str, Any],
@@ -427,19 +536,32 @@ async def dispatch_tool(
     ehr_service: EHRService,
     kb=None,
     prefetcher=None,
-) -> str:
+) -> bytes:
     """Route a function call to the appropriate handler.
 
+    The LLM's arguments are validated against the tool's argument model
+    first; missing or malformed ones come back as an invalid_arguments
+    error instead of reaching the handler.
+
     For search_knowledge_base: passes shared KB instance and prefetch
     cache to avoid creating new connections and eliminate latency.
     """
+    # Names from the LLM are fresh strings; interning makes the dict probe
+    # match the key by identity and lets callers use `is` on the result
+    tool_name = sys.intern(tool_name)
     handler = TOOL_HANDLERS.get(tool_name)
     if handler is None:
-        return json.dumps({"error": "unknown_tool", "message": f"Unknown tool: {tool_name}"})
+        return _UNKNOWN_TOOL_TMPL % _dumps(tool_name)[1:-1]
+
+    try:
+        args = TOOL_ARGS[tool_name].model_validate(tool_args).model_dump()
+    except ValidationError as e:
+        return _invalid_arguments(tool_name, e)
 
     # Inject KB and prefetcher for knowledge base lookups
-    if tool_name == "search_knowledge_base":
-        tool_args["kb"] = kb
-        tool_args["prefetcher"] = prefetcher
+    if handler is execute_search_knowledge_base:
+        return await handler(
+            call_id, call_state, ehr_service, **args, kb=kb, prefetcher=prefetcher,
+        )
 
-    return await handler(call_id, call_state, ehr_service, **tool_args)
+    return await handler(call_id, call_state, ehr_service, **args)
@@ -6,22 +6,195 @@ import asyncio
 import json
 import logging
 import signal
+import socket
 import sys
+import time
 import hashlib
+from typing import List, Optional, Tuple
 from redis.asyncio import Redis
 import weave
 
 from app.config import settings
-from app.learning.analysis import CallAnalyzer
+from app.learning.analysis import CallAnalyzer, PIIFilter
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("worker")
 
 STOP_EVENT = asyncio.Event()
 
+# TCP keepalive timing for the worker's Redis connections: first probe after
+# 30s idle, then every 10s, drop after 3 misses. Options missing on this
+# platform (e.g. TCP_KEEPIDLE on macOS) are left at the OS default.
+_KEEPALIVE_OPTIONS = {
+    opt: value
+    for name, value in (("TCP_KEEPIDLE", 30), ("TCP_KEEPINTVL", 10), ("TCP_KEEPCNT", 3))
+    if (opt := getattr(socket, name, None)) is not None
+}
+
 def handle_sigterm(*args):
     STOP_EVENT.set()
 
+# Reads a transcript in one round trip. PresenceHandler stores it as a
+# string; a list of lines is joined server-side, so the worker receives one
+# bulk string instead of a frame per line. Empty string if the key is missing.
+_TRANSCRIPT_LUA = """
+local kind = redis.call('TYPE', KEYS[1]).ok
+if kind == 'string' then
+    return redis.call('GET', KEYS[1])
+elseif kind == 'list' then
+    return table.concat(redis.call('LRANGE', KEYS[1], 0, -1), '\\n')
+end
+return ''
+"""
+
+# Messages read per XREADGROUP; a batch is analyzed concurrently, so this
+# also bounds how many analyzer calls are in flight
+BATCH_SIZE = 16
+
+# Pending messages idle this long (e.g. their consumer died mid-analysis)
+# are claimed by XAUTOCLAIM, checked every RECLAIM_INTERVAL_SECONDS
+RECLAIM_MIN_IDLE_MS = 5 * 60 * 1000
+RECLAIM_INTERVAL_SECONDS = 30.0
+# A reclaimed message already delivered more often than this keeps failing:
+# it is moved to the dead-letter stream (analysis stream key + this suffix)
+# and acked instead of being retried forever
+MAX_DELIVERIES = 5
+DEAD_LETTER_SUFFIX = ":dead"
+
+
+# Candidate sets up to this size are prepared inline: below it a thread
+# hand-off costs more than the work it moves
+INLINE_CANDIDATE_LIMIT = 8
+
+
+def _analysis_mapping(analysis) -> dict:
+    """Hash mapping for an analysis; list fields are stored as JSON strings."""
+    return {
+        k: json.dumps(v) if isinstance(v, list) else v
+        for k, v in analysis.model_dump(exclude={"knowledge_candidates"}).items()
+    }
+
+
+def _prepare_candidates(call_id: str, candidates) -> List[Tuple[str, dict]]:
+    """(candidate key, hash mapping) for each candidate that passes the PII check."""
+    prepared = []
+    for cand in candidates:
+        # Double check PII (though validator handles it)
+        if PIIFilter.has_drop_marker(cand.question, cand.answer):
+            logger.warning(f"Dropping candidate with PII: {cand.question}")
+            continue
+
+        # Deterministic ID based on question hash
+        q_hash = hashlib.blake2b(cand.question.encode(), digest_size=5).hexdigest()
+        prepared.append((f"cand:{call_id}:{q_hash}", cand.model_dump()))
+    return prepared
+
+
+async def handle_message(
+    redis: Redis,
+    analyzer: CallAnalyzer,
+    stream_key: str,
+    group_name: str,
+    message_id: str,
+    data: dict,
+    load_transcript,
+) -> bool:
+    """Analyze one call and store the results.
+
+    ``load_transcript`` is the registered _TRANSCRIPT_LUA script.
+
+    The message is acknowledged only once its results are stored; on error
+    it stays pending in the consumer group, to be reclaimed and retried up
+    to MAX_DELIVERIES times. Returns True if the message was
+    skipped (nothing to analyze) and still needs acking by the caller, which
+    acks a batch's skipped messages with one XACK.
+    """
+    call_id = data.get("call_id")
+    if not call_id:
+        return True
+
+    logger.info(f"Processing call: {call_id}")
+
+    # Fetch transcript from Redis
+    # Assuming bot.py saved it to "call:{call_id}:transcript" or similar
+    # For now, let's fetch from call_state or transcript logs
+    # Ideally, bot.py should store the full transcript list in a known key
+
+    # Fetch transcript from Redis
+    transcript_key = f"call:{call_id}:transcript"
+    # A string (set by PresenceHandler) or a list of lines, which the
+    # script joins with newlines
+    transcript = await load_transcript(keys=[transcript_key], client=redis)
+
+    if not transcript:
+        logger.warning(f"No transcript found for {call_id}")
+        return True
+
+    # Run analysis
+    analysis = await analyzer.analyze_transcript(call_id, transcript)
+
+    # Candidate filtering, hashing and dumping is CPU work; a large set is
+    # prepared in a thread so the loop keeps serving the rest of the batch
+    candidates = analysis.knowledge_candidates
+    if len(candidates) > INLINE_CANDIDATE_LIMIT:
+        prepared = await asyncio.to_thread(_prepare_candidates, call_id, candidates)
+    else:
+        prepared = _prepare_candidates(call_id, candidates)
+
+    # Store the result, queue candidates and ack the message
+    # in one MULTI/EXEC round trip: all of it lands or none
+    result_key = f"analysis:{call_id}"
+    async with redis.pipeline() as pipe:
+        pipe.hset(result_key, mapping=_analysis_mapping(analysis))
+
+        for cand_id, mapping in prepared:
+            # Store details
+            pipe.hset(cand_id, mapping=mapping)
+            # Push to review queue
+            pipe.lpush("candidates:knowledge", cand_id)
+
+        # Acknowledge
+        pipe.xack(stream_key, group_name, message_id)
+        await pipe.execute()
+
+    logger.info(f"Analysis stored for {call_id}: {analysis.outcome}")
+    for _, mapping in prepared:
+        logger.info(f"New candidate queued: {mapping['question']}")
+    return False
+
+
+async def _dead_letter_exhausted(
+    redis: Redis, stream_key: str, group_name: str, messages: list,
+) -> list:
+    """Move reclaimed messages delivered over MAX_DELIVERIES times to the
+    dead-letter stream and ack them. Returns the messages still to process.
+    """
+    async with redis.pipeline(transaction=False) as pipe:
+        for message_id, _ in messages:
+            pipe.xpending_range(stream_key, group_name, min=message_id, max=message_id, count=1)
+        pending = await pipe.execute()
+
+    retry, dead = [], []
+    for message, info in zip(messages, pending):
+        if info and info[0]["times_delivered"] > MAX_DELIVERIES:
+            dead.append((message, info[0]["times_delivered"]))
+        else:
+            retry.append(message)
+    if not dead:
+        return retry
+
+    dead_key = stream_key + DEAD_LETTER_SUFFIX
+    async with redis.pipeline() as pipe:
+        for (message_id, data), deliveries in dead:
+            logger.error(
+                f"Giving up on message {message_id} after {deliveries} deliveries: {data}"
+            )
+            pipe.xadd(dead_key, {**data, "message_id": message_id, "deliveries": deliveries})
+        pipe.xack(stream_key, group_name, *(message_id for (message_id, _), _ in dead))
+        await pipe.execute()
+    return retry
+
+
 async def process_stream(redis: Redis, analyzer: CallAnalyzer):
     """Consume from Redis Stream and process calls."""
     stream_key = settings.redis_stream_analysis
@@ -35,81 +208,99 @@ async def process_stream(redis: Redis, analyzer: CallAnalyzer):
         if "BUSYGROUP" not in str(e):
             logger.error(f"Error creating consumer group: {e}")
 
+    load_transcript = redis.register_script(_TRANSCRIPT_LUA)
+
+    async def process_batch(messages):
+        # Analyze the batch concurrently; one failed call does not
+        # hold back (or un-ack) the others
+        results = await asyncio.gather(
+            *(
+                handle_message(
+                    redis, analyzer, stream_key, group_name, message_id, data,
+                    load_transcript,
+                )
+                for message_id, data in messages
+            ),
+            return_exceptions=True,
+        )
+        skipped = []
+        for (message_id, _), result in zip(messages, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to process message {message_id}: {result}")
+            elif result:
+                skipped.append(message_id)
+        if skipped:
+            await redis.xack(stream_key, group_name, *skipped)
+
     logger.info(f"Worker started. listening on {stream_key}")
 
-    while not STOP_EVENT.is_set():
-        try:
-            # Block for 1s waiting for new messages
-            streams = await redis.xreadgroup(
-                group_name, consumer_name, {stream_key: ">"}, count=1, block=1000
-            )
+    def read_batch() -> asyncio.Task:
+        # Block for 1s waiting for new messages
+        return asyncio.create_task(redis.xreadgroup(
+            group_name, consumer_name, {stream_key: ">"}, count=BATCH_SIZE, block=1000
+        ))
+
+    # The next batch is read while the current one is analyzed, so the
+    # blocking read overlaps LLM time instead of following it
+    next_read: Optional[asyncio.Task] = None
+    next_reclaim = 0.0
+    try:
+        while not STOP_EVENT.is_set():
+            try:
+                # Take over messages left pending by a dead consumer
+                if time.monotonic() >= next_reclaim:
+                    next_reclaim = time.monotonic() + RECLAIM_INTERVAL_SECONDS
+                    # Reply: [next start id, claimed messages, (7.0+) deleted ids]
+                    claimed = (await redis.xautoclaim(
+                        stream_key, group_name, consumer_name,
+                        min_idle_time=RECLAIM_MIN_IDLE_MS, count=BATCH_SIZE,
+                    ))[1]
+                    if claimed:
+                        logger.info(f"Reclaimed {len(claimed)} stale messages")
+                        claimed = await _dead_letter_exhausted(
+                            redis, stream_key, group_name, claimed,
+                        )
+                    if claimed:
+                        await process_batch(claimed)
+
+                if next_read is None:
+                    next_read = read_batch()
+                read, next_read = next_read, None
+                streams = await read
+
+                if not streams:
+                    continue
 
-            if not streams:
-                continue
-
-            for _, messages in streams:
-                for message_id, data in messages:
-                    call_id = data.get("call_id")
-                    if not call_id:
-                        await redis.xack(stream_key, group_name, message_id)
-                        continue
-
-                    logger.info(f"Processing call: {call_id}")
-                    
-                    # Fetch transcript from Redis
-                    # Assuming bot.py saved it to "call:{call_id}:transcript" or similar
-                    # For now, let's fetch from call_state or transcript logs
-                    # Ideally, bot.py should store the full transcript list in a known key
-                    
-                    # Fetch transcript from Redis
-                    transcript_key = f"call:{call_id}:transcript"
-                    # It's a list (pushed by bot.py)
-                    transcript_lines = await redis.lrange(transcript_key, 0, -1)
-                    
-                    if not transcript_lines:
-                        logger.warning(f"No transcript found for {call_id}")
-                        await redis.xack(stream_key, group_name, message_id)
-                        continue
-                        
-                    transcript = "\n".join(transcript_lines)
-
-                    # Run analysis
-                    analysis = await analyzer.analyze_transcript(call_id, transcript)
-                    
-                    # Store result
-                    result_key = f"analysis:{call_id}"
-                    await redis.hset(result_key, mapping=analysis.model_dump(exclude={"knowledge_candidates"}))
-                    logger.info(f"Analysis stored for {call_id}: {analysis.outcome}")
-                    
-                    # Store Knowledge Candidates
-                    for cand in analysis.knowledge_candidates:
-                        # Double check PII (though validator handles it)
-                        if "[SSN]" in cand.question or "[SSN]" in cand.answer:
-                           logger.warning(f"Dropping candidate with PII: {cand.question}")
-                           continue
-                           
-                        # Deterministic ID based on question hash
-                        q_hash = hashlib.md5(cand.question.encode()).hexdigest()[:10]
-                        cand_id = f"cand:{call_id}:{q_hash}"
-                        # Store details
-                        await redis.hset(cand_id, mapping=cand.model_dump())
-                        # Push to review queue
-                        await redis.lpush("candidates:knowledge", cand_id)
-                        logger.info(f"New candidate queued: {cand.question}")
-
-                    # Acknowledge
-                    await redis.xack(stream_key, group_name, message_id)
-
-        except Exception as e:
-            logger.error(f"Worker loop error: {e}")
-            await asyncio.sleep(1)
+                next_read = read_batch()
+                for _, messages in streams:
+                    await process_batch(messages)
+
+            except Exception as e:
+                logger.error(f"Worker loop error: {e}")
+                await asyncio.sleep(1)
+    finally:
+        # Messages a cancelled read already received stay pending and are
+        # picked up by XAUTOCLAIM
+        if next_read is not None:
+            next_read.cancel()
 
 async def main():
     # Initialize Weave
     if settings.wandb_api_key:
         weave.init("assort-health")
     
-    redis = Redis.from_url(settings.redis_url, decode_responses=True)
+    redis = Redis.from_url(
+        settings.redis_url,
+        decode_responses=True,
+        # Probe idle connections so a dead peer is noticed between calls
+        socket_keepalive=True,
+        socket_keepalive_options=_KEEPALIVE_OPTIONS,
+        health_check_interval=30,
+        # One connection per in-flight message plus the reader, with headroom
+        max_connections=BATCH_SIZE * 2,
+        # Set on every pooled connection (CLIENT SETNAME), for CLIENT LIST
+        client_name="analysis_worker_1",
+    )
     analyzer = CallAnalyzer()
     
     loop = asyncio.get_running_loop()
@@ -117,8 +308,17 @@ async def main():
     loop.add_signal_handler(signal.SIGTERM, handle_sigterm)
     
     await process_stream(redis, analyzer)
+    await analyzer.close()
     await redis.close()
     logger.info("Worker stopped.")
 
 if __name__ == "__main__":
+    # uvloop ships with uvicorn[standard] (not on Windows); its libuv loop
+    # speeds up the Redis-heavy read/write cycle. Fall back to asyncio's.
+    try:
+        import uvloop
+    except ImportError:
+        uvloop = None
+    if uvloop is not None and sys.platform != "win32":
+        uvloop.install()
     asyncio.run(main())
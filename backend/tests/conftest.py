@@ -2,17 +2,51 @@
 
 # Sentry and Pipecat mocks removed. Tests will use real libraries if installed.
 
+import asyncio
+import sys
+
 import httpx
 import pytest
 import pytest_asyncio
+from pytest_asyncio import is_async_test
 
-from app.main import app
+from app.config import settings
 
 
-@pytest_asyncio.fixture
+def pytest_collection_modifyitems(items):
+    """Run every async test in the session event loop, so session-scoped
+    async fixtures (the Redis connection pool) can be shared by all tests."""
+    session_loop = pytest.mark.asyncio(loop_scope="session")
+    for item in items:
+        if is_async_test(item):
+            item.add_marker(session_loop, append=False)
+
+
+@pytest.fixture(scope="session")
+def event_loop_policy():
+    """Run the tests on uvloop, like the worker, when it is available.
+
+    uvloop ships with uvicorn[standard] (not on Windows); its libuv loop cuts
+    the per-await cost of the Redis and ASGI round trips. Falls back to
+    asyncio's default loop.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        uvloop = None
+    if uvloop is not None and sys.platform != "win32":
+        return uvloop.EventLoopPolicy()
+    return asyncio.DefaultEventLoopPolicy()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
 async def redis_client():
-    """Fixture for real Redis client connected to test database."""
-    from app.config import settings
+    """Fixture for real Redis client connected to test database.
+
+    One client (and connection pool) for the whole session: connections are
+    set up once instead of per test. Tests keep to their own keys rather
+    than flushing, since the configured URL may be a shared database.
+    """
     from redis.asyncio import Redis
     
     # Use a specific database for testing if possible, or just the default
@@ -20,7 +54,35 @@ async def redis_client():
     client = Redis.from_url(settings.redis_url, decode_responses=True)
     await client.ping()
     yield client
-    await client.close()
+    await client.aclose()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def _fake_redis_client():
+    """In-process Redis (streams, hashes, Lua) shared by the whole session."""
+    import fakeredis
+
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    yield client
+    await client.aclose()
+
+
+@pytest_asyncio.fixture
+async def fake_redis(_fake_redis_client):
+    """fakeredis client for unit tests that need Redis semantics but not a
+    server; every test starts from an empty database."""
+    yield _fake_redis_client
+    await _fake_redis_client.flushdb()
+
+
+@pytest.fixture
+def fake_redis_service(fake_redis):
+    """RedisService on in-process fakeredis; no server needed."""
+    from app.services.redis_service import RedisService
+
+    service = RedisService()
+    service.client = fake_redis
+    return service
 
 
 @pytest_asyncio.fixture
@@ -36,22 +98,83 @@ async def redis_service(redis_client):
     return service
 
 
-@pytest_asyncio.fixture
-async def client(redis_client, redis_service):
-    """Async HTTP client with real Redis and EHR service."""
-    app.state.redis = redis_client
-    # Initialize EHR service for integration tests
+@pytest.fixture(scope="session")
+def _asgi_transport():
+    """One ASGI transport for the app; it holds no per-request state."""
+    # Imported here so unit-test files that never build a client don't
+    # pay for the full application at collection time
+    from app.main import app
+    return httpx.ASGITransport(app=app)
+
+
+@pytest.fixture(scope="session")
+def _ehr_seed():
+    """Mock EHR seeded once per session."""
     from app.services.ehr.mock import MockEHRAdapter
-    app.state.ehr_service = MockEHRAdapter()
+    return MockEHRAdapter()
+
+
+@pytest.fixture
+def ehr_service(_ehr_seed):
+    """The session's seeded mock EHR, with bookings earlier tests made undone.
+
+    Bookings only add appointments and mark slots busy, so resetting those
+    is much cheaper than seeding a new adapter for every test.
+    """
+    _ehr_seed.reset()
+    return _ehr_seed
+
+
+@pytest.fixture(scope="session")
+def known_patient(_ehr_seed):
+    """A patient from the mock EHR's seed data (never reset, so shared)."""
+    return next(iter(_ehr_seed.patients.values()))
+
+
+@pytest.fixture(scope="session")
+def patient_identity(known_patient):
+    """(full name, ISO date of birth) of known_patient, as a caller gives them."""
+    return known_patient.name[0].full_name, known_patient.birthDate.isoformat()
+
+
+@pytest_asyncio.fixture
+async def call_state(redis_service):
+    """Call state machine over the real-Redis service."""
+    from app.voice.call_state import CallStateMachine
+
+    machine = CallStateMachine(redis_service)
+    yield machine
+    await machine.close()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def _http_client(_asgi_transport):
+    """One AsyncClient over the ASGI transport for the whole session.
+
+    The app sets no cookies and tests pass headers per request, so the
+    client carries nothing from one test to the next.
+    """
     async with httpx.AsyncClient(
-        transport=httpx.ASGITransport(app=app),
+        transport=_asgi_transport,
         base_url="http://test",
     ) as ac:
         yield ac
 
 
 @pytest.fixture
+def client(redis_client, redis_service, _asgi_transport, _http_client, ehr_service):
+    """Async HTTP client with real Redis and EHR service.
+
+    The client is shared; what each test gets fresh is the app state
+    behind it.
+    """
+    app = _asgi_transport.app
+    app.state.redis = redis_client
+    app.state.ehr_service = ehr_service
+    return _http_client
+
+
+@pytest.fixture(scope="session")
 def valid_api_key():
     """Return the configured API key for authenticated requests."""
-    from app.config import settings
     return settings.api_key
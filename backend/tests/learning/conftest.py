@@ -0,0 +1,38 @@
+"""Fixtures for learning-engine tests: a deterministic stand-in for Gemini."""
+
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakeGenaiClient:
+    """Replays a canned response for every generate_content call.
+
+    Mirrors the parts of google.genai.Client the learning engine uses
+    (`models.generate_content` and `aio.models.generate_content`), so tests
+    run offline, instantly and with the same result every time.
+    """
+
+    def __init__(self, text: str = ""):
+        self.text = text
+        self.calls = []
+        self.models = SimpleNamespace(generate_content=self._generate)
+        self.aio = SimpleNamespace(
+            models=SimpleNamespace(generate_content=self._agenerate),
+            aclose=self._aclose,
+        )
+
+    def _generate(self, **kwargs):
+        self.calls.append(kwargs)
+        return SimpleNamespace(text=self.text)
+
+    async def _agenerate(self, **kwargs):
+        return self._generate(**kwargs)
+
+    async def _aclose(self):
+        pass
+
+
+@pytest.fixture
+def fake_genai():
+    return FakeGenaiClient()
@@ -1,17 +1,6 @@
 import pytest
-from unittest.mock import AsyncMock, MagicMock, patch
 from app.learning.analysis import CallAnalyzer, CallAnalysis, KnowledgeCandidate, PIIFilter
 
-@pytest.fixture
-def mock_openai():
-    with patch("app.learning.analysis.AsyncOpenAI") as mock:
-        yield mock
-
-@pytest.fixture
-def mock_weave():
-    with patch("app.learning.analysis.weave") as mock:
-        yield mock
-
 def test_pii_filter():
     text = "My SSN is 123-45-6789 and my phone is 555-123-4567."
     redacted = PIIFilter.redact(text)
@@ -20,6 +9,19 @@ def test_pii_filter():
     assert "[PHONE]" in redacted
     assert "555-123-4567" not in redacted
 
+def test_pii_filter_overlapping_and_clean_text():
+    # Patterns apply in order, so a DOB is redacted after the card number
+    redacted = PIIFilter.redact("card 1234-5678-9012-3456, born 01/02/1990")
+    assert redacted == "card [CC], born [DOB]"
+    assert PIIFilter.contains_pii("born 01/02/1990")
+    clean = "Do you have wifi?"
+    assert PIIFilter.redact(clean) is clean
+    assert not PIIFilter.contains_pii(clean)
+
+def test_drop_marker():
+    assert PIIFilter.has_drop_marker("fine", PIIFilter.redact("SSN 123-45-6789"))
+    assert not PIIFilter.has_drop_marker("Do you have wifi?", "Yes, [PHONE] for help")
+
 def test_candidate_pii_validation():
     # Model validation should redact PII automatically
     cand = KnowledgeCandidate(
@@ -32,11 +34,9 @@ def test_candidate_pii_validation():
     assert "test@example.com" not in cand.question
 
 @pytest.mark.asyncio
-async def test_extract_candidates(mock_openai, mock_weave):
+async def test_extract_candidates(fake_genai):
     # Mock LLM response with candidates
-    mock_client = mock_openai.return_value
-    mock_response = MagicMock()
-    mock_response.choices[0].message.content = """
+    fake_genai.text = """
     {
         "summary": "User asked about wifi.",
         "outcome": "answered",
@@ -52,9 +52,7 @@ async def test_extract_candidates(mock_openai, mock_weave):
         ]
     }
     """
-    mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
-    
-    analyzer = CallAnalyzer()
+    analyzer = CallAnalyzer(client=fake_genai)
     result = await analyzer.analyze_transcript("call-1", "user: wifi?")
     
     assert len(result.knowledge_candidates) == 1
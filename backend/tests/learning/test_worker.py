@@ -1,37 +1,112 @@
 import pytest
 import asyncio
+import hashlib
 import json
-from app.worker import process_stream, STOP_EVENT
-from app.learning.analysis import CallAnalyzer
+from app.config import settings
+from app.worker import process_stream, STOP_EVENT, _prepare_candidates
+from app.learning.analysis import CallAnalyzer, KnowledgeCandidate
+
+# Canned model reply, serialized once at import
+_GREETING_ANALYSIS = json.dumps({
+    "summary": "Greeting only.",
+    "outcome": "info_only",
+    "sentiment": "neutral",
+})
+
+async def _run_worker_until_analyzed(fake_redis, analyzer, call_id):
+    """Queue `call_id`, run the worker until its analysis lands, then stop it."""
+    # Create the worker's group from the start of the stream, so the
+    # message below is delivered without racing the worker's startup
+    stream_key = settings.redis_stream_analysis
+    await fake_redis.xgroup_create(stream_key, "analysis_workers", id="0", mkstream=True)
+    await fake_redis.xadd(stream_key, {"call_id": call_id})
+
+    # Run worker in background until the analysis lands
+    STOP_EVENT.clear()
+    worker_task = asyncio.create_task(process_stream(fake_redis, analyzer))
+    analysis_key = f"analysis:{call_id}"
+    try:
+        async with asyncio.timeout(5):
+            while not await fake_redis.exists(analysis_key):
+                await asyncio.sleep(0.01)
+    finally:
+        STOP_EVENT.set()
+        await worker_task
+    return await fake_redis.hgetall(analysis_key)
+
 
 @pytest.mark.asyncio
-async def test_worker_processing(redis_client):
-    # Setup real data in Redis
+async def test_worker_processing(fake_redis, fake_genai):
+    # Setup data in (in-process) Redis
     call_id = "test-worker-call"
     transcript_key = f"call:{call_id}:transcript"
-    await redis_client.delete(transcript_key)
-    await redis_client.lpush(transcript_key, "user: hello", "assistant: hi")
-    
-    # Push to stream
-    stream_key = "call:analysis" # Matches settings.redis_stream_analysis
-    await redis_client.xadd(stream_key, {"call_id": call_id})
+    await fake_redis.lpush(transcript_key, "user: hello", "assistant: hi")
     
-    # Initialize real analyzer
-    analyzer = CallAnalyzer()
-    
-    # Run worker in background and stop it after a bit
-    STOP_EVENT.clear()
-    worker_task = asyncio.create_task(process_stream(redis_client, analyzer))
-    
-    # Wait for processing (give it a few seconds for LLM if real)
-    await asyncio.sleep(2)
-    STOP_EVENT.set()
-    await worker_task
+    # Analyzer backed by the deterministic Gemini stand-in (see conftest.py)
+    fake_genai.text = _GREETING_ANALYSIS
+    analyzer = CallAnalyzer(client=fake_genai)
     
+    data = await _run_worker_until_analyzed(fake_redis, analyzer, call_id)
+
     # Verify result in Redis
-    analysis_key = f"analysis:{call_id}"
-    exists = await redis_client.exists(analysis_key)
-    # If GEMINI_API_KEY is missing, it might not have stored anything or stored failure
-    if exists:
-        data = await redis_client.hgetall(analysis_key)
-        assert data["outcome"] != ""
+    assert data["outcome"] == "info_only"
+    assert json.loads(data["missing_info"]) == []
+    # Processed and acknowledged in the same transaction
+    stream_key = settings.redis_stream_analysis
+    assert (await fake_redis.xpending(stream_key, "analysis_workers"))["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_worker_reads_string_transcript(fake_redis, fake_genai):
+    """PresenceHandler stores the transcript with SET, as one string."""
+    call_id = "test-worker-string"
+    transcript = "Patient: hello\nAgent: hi"
+    await fake_redis.set(f"call:{call_id}:transcript", transcript, ex=86400)
+
+    fake_genai.text = _GREETING_ANALYSIS
+    analyzer = CallAnalyzer(client=fake_genai)
+
+    data = await _run_worker_until_analyzed(fake_redis, analyzer, call_id)
+    assert data["outcome"] == "info_only"
+    assert transcript in str(fake_genai.calls[-1]["contents"])
+
+
+def test_prepare_candidates_drops_pii_and_keys_by_question():
+    cands = [
+        KnowledgeCandidate(question="Do you have wifi?", answer="Yes", confidence=0.9, source_call_id="c1"),
+        KnowledgeCandidate(question="My SSN is 123-45-6789", answer="ok", confidence=0.9, source_call_id="c1"),
+    ]
+    prepared = _prepare_candidates("c1", cands)
+    assert len(prepared) == 1
+    cand_id, mapping = prepared[0]
+    # Content hash, not hash(): identical across processes and xdist workers
+    assert cand_id == f"cand:c1:{hashlib.blake2b(b'Do you have wifi?', digest_size=5).hexdigest()}"
+    assert mapping["question"] == "Do you have wifi?"
+    # Same question, same ID
+    assert _prepare_candidates("c1", cands[:1])[0][0] == cand_id
+
+
+@pytest.mark.asyncio
+async def test_reclaimed_message_dead_lettered_after_max_deliveries(fake_redis):
+    """A message that keeps failing is parked and acked, not retried forever."""
+    from app.worker import DEAD_LETTER_SUFFIX, MAX_DELIVERIES, _dead_letter_exhausted
+
+    stream_key = "test:analysis"
+    group = "analysis_workers"
+    await fake_redis.xgroup_create(stream_key, group, id="0", mkstream=True)
+    poison = await fake_redis.xadd(stream_key, {"call_id": "poison"})
+    fresh = await fake_redis.xadd(stream_key, {"call_id": "fresh"})
+    await fake_redis.xreadgroup(group, "worker_1", {stream_key: ">"})
+    # Each claim counts as a delivery
+    for _ in range(MAX_DELIVERIES):
+        await fake_redis.xclaim(stream_key, group, "worker_1", 0, [poison])
+
+    claimed = [(poison, {"call_id": "poison"}), (fresh, {"call_id": "fresh"})]
+    retry = await _dead_letter_exhausted(fake_redis, stream_key, group, claimed)
+
+    assert retry == [(fresh, {"call_id": "fresh"})]
+    dead = await fake_redis.xrange(stream_key + DEAD_LETTER_SUFFIX)
+    assert [fields["message_id"] for _, fields in dead] == [poison]
+    assert dead[0][1]["call_id"] == "poison"
+    pending = await fake_redis.xpending_range(stream_key, group, min="-", max="+", count=10)
+    assert [p["message_id"] for p in pending] == [fresh]
@@ -0,0 +1,83 @@
+"""
+Tests for the batched audit sink.
+"""
+
+import logging
+
+import pytest
+
+from app.voice import audit
+from app.voice.audit import AuditSink
+
+
+@pytest.mark.asyncio
+async def test_submit_does_not_write_until_flushed(fake_redis_service):
+    sink = AuditSink(fake_redis_service)
+    sink.submit("call:a1:events", {"type": "state_transition", "to": "ringing"})
+
+    # Nothing has been written yet — submit never awaits Redis
+    assert await fake_redis_service.client.xlen("call:a1:events") == 0
+
+    await sink.flush()
+    entries = await fake_redis_service.client.xrange("call:a1:events")
+    assert [fields["to"] for _, fields in entries] == ["ringing"]
+    await sink.close()
+
+
+@pytest.mark.asyncio
+async def test_events_keep_submission_order(fake_redis_service):
+    sink = AuditSink(fake_redis_service)
+    for state in ("ringing", "greeting", "routing"):
+        sink.submit("call:a2:events", {"type": "state_transition", "to": state})
+    sink.submit("call:a3:events", {"type": "emergency_detected"})
+
+    await sink.close()
+
+    entries = await fake_redis_service.client.xrange("call:a2:events")
+    assert [fields["to"] for _, fields in entries] == ["ringing", "greeting", "routing"]
+    assert await fake_redis_service.client.xlen("call:a3:events") == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_retried(fake_redis_service, monkeypatch):
+    """A write that fails is retried, not dropped; flush() waits for it."""
+    monkeypatch.setattr(audit, "RETRY_BACKOFF_SECONDS", 0.01)
+    sink = AuditSink(fake_redis_service)
+    write = sink._write
+    attempts = []
+
+    async def flaky_write(batch):
+        attempts.append(len(batch))
+        if len(attempts) == 1:
+            raise ConnectionError("Redis down")
+        await write(batch)
+
+    sink._write = flaky_write
+    sink.submit("call:a4:events", {"type": "state_transition", "to": "ringing"})
+    await sink.flush()
+
+    assert attempts == [1, 1]
+    assert await fake_redis_service.client.xlen("call:a4:events") == 1
+    await sink.close()
+
+
+@pytest.mark.asyncio
+async def test_close_logs_events_it_could_not_write(fake_redis_service, monkeypatch, caplog):
+    """With Redis unreachable, close() gives up after its timeout and logs
+    every pending event instead of losing it silently."""
+    monkeypatch.setattr(audit, "RETRY_BACKOFF_SECONDS", 0.01)
+    sink = AuditSink(fake_redis_service)
+
+    async def failing_write(batch):
+        raise ConnectionError("Redis down")
+
+    sink._write = failing_write
+    sink.submit("call:a5:events", {"type": "emergency_detected"})
+    sink.submit("call:a6:events", {"type": "state_transition", "to": "abandoned"})
+
+    with caplog.at_level(logging.ERROR, logger="app.voice.audit"):
+        await sink.close(timeout=0.1)
+
+    unwritten = [r.getMessage() for r in caplog.records if "Unwritten" in r.getMessage()]
+    assert len(unwritten) == 2
+    assert "call:a5:events" in unwritten[0] and "call:a6:events" in unwritten[1]
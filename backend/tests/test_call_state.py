@@ -1,9 +1,23 @@
 import pytest
-from app.voice.call_state import CallStateMachine, CallState
+import pytest_asyncio
+from app.voice.call_state import (
+    CallStateMachine,
+    CallState,
+    VALID_TRANSITIONS,
+    is_valid_transition,
+)
 
 @pytest.fixture
-def csm(redis_service):
-    return CallStateMachine(redis_service)
+def redis_service(fake_redis_service):
+    """State machine tests need no server: run them on fakeredis."""
+    return fake_redis_service
+
+
+@pytest_asyncio.fixture
+async def csm(redis_service):
+    machine = CallStateMachine(redis_service)
+    yield machine
+    await machine.close()
 
 
 @pytest.mark.asyncio
@@ -12,12 +26,29 @@ async def test_create_call(csm, redis_service):
     state = await csm.create_call(call_id, "prov-1")
     assert state == CallState.RINGING
     
-    # Verify in real Redis
+    # Verify in Redis
     saved = await redis_service.get_call_state(call_id)
     assert saved["state"] == CallState.RINGING.value
     assert saved["provider_id"] == "prov-1"
 
 
+@pytest.mark.asyncio
+async def test_create_call_is_idempotent(csm, redis_service):
+    """A retried create must not reset the call or duplicate the audit event."""
+    call_id = "call-retry"
+    await csm.create_call(call_id, "prov-1")
+    await csm.transition(call_id, CallState.GREETING)
+
+    state = await csm.create_call(call_id, "prov-2")
+    assert state == CallState.GREETING
+
+    saved = await redis_service.get_call_state(call_id)
+    assert saved["provider_id"] == "prov-1"
+    await csm.audit.flush()
+    events = await redis_service.client.xrange(f"call:{call_id}:events")
+    assert [e["to"] for _, e in events] == ["ringing", "greeting"]
+
+
 @pytest.mark.asyncio
 async def test_valid_transition(csm):
     call_id = "call-trans"
@@ -27,6 +58,20 @@ async def test_valid_transition(csm):
     assert await csm.get_state(call_id) == CallState.GREETING
 
 
+@pytest.mark.asyncio
+async def test_transition_from_states_guard(csm):
+    """A guarded transition leaves a call that moved on elsewhere untouched."""
+    call_id = "call-guard"
+    await csm.create_call(call_id)
+    await csm.transition(call_id, CallState.ABANDONED)
+
+    state = await csm.transition(
+        call_id, CallState.RESOLVING, from_states=(CallState.VERIFIED,),
+    )
+    assert state == CallState.ABANDONED
+    assert await csm.get_state(call_id) == CallState.ABANDONED
+
+
 @pytest.mark.asyncio
 async def test_transition_not_found(csm):
     with pytest.raises(ValueError, match="not found"):
@@ -71,3 +116,88 @@ async def test_abandoned_from_any_active_state(csm):
         result = await csm.transition(call_id, CallState.ABANDONED)
         assert result == CallState.ABANDONED
         assert await csm.get_state(call_id) == CallState.ABANDONED
+
+
+@pytest.mark.asyncio
+async def test_get_state_without_state_code(csm, redis_service):
+    """Calls created by the voice router only carry the string state."""
+    call_id = "call-router"
+    await redis_service.set_call_state(call_id, {"state": "ringing", "status": "pending"})
+    assert await csm.get_state(call_id) == CallState.RINGING
+
+    await csm.transition(call_id, CallState.GREETING)
+    assert await csm.get_state(call_id) == CallState.GREETING
+
+
+@pytest.mark.asyncio
+async def test_scripts_upgrade_legacy_string_state(csm, redis_service):
+    """The Lua-backed operations also convert a legacy JSON-string record."""
+    import json
+    call_id = "call-legacy"
+    await redis_service.client.set(
+        f"call:{call_id}:state", json.dumps({"state": "routing", "provider_id": "p"}),
+    )
+
+    assert await csm.create_call(call_id) == CallState.ROUTING
+    assert await csm.verify_and_store(call_id, "pat-1", "Ann Lee") == CallState.ROUTING
+    assert await csm.get_state(call_id) == CallState.VERIFIED
+
+
+@pytest.mark.asyncio
+async def test_verify_and_store(csm, redis_service):
+    """Verification transitions from ROUTING and stores the patient atomically."""
+    call_id = "call-verify"
+    await csm.create_call(call_id)
+    await csm.transition(call_id, CallState.GREETING)
+    await csm.transition(call_id, CallState.ROUTING)
+
+    assert await csm.verify_and_store(call_id, "pat-1", "Jane Doe") == CallState.ROUTING
+    assert await csm.get_state(call_id) == CallState.VERIFIED
+    saved = await redis_service.get_call_state(call_id)
+    assert saved["patient_id"] == "pat-1"
+    assert saved["patient_name"] == "Jane Doe"
+
+    # Already verified: metadata is updated, state is left alone
+    assert await csm.verify_and_store(call_id, "pat-2", "John Doe") is None
+    assert await csm.get_state(call_id) == CallState.VERIFIED
+    assert (await redis_service.get_call_state(call_id))["patient_id"] == "pat-2"
+
+    await csm.audit.flush()
+    events = await redis_service.client.xrange(f"call:{call_id}:events")
+    assert [e["to"] for _, e in events][-1] == "verified"
+
+
+@pytest.mark.asyncio
+async def test_metadata_needs_an_existing_call(csm, redis_service):
+    """Metadata writes on an unknown or expired call create no record."""
+    await csm.set_metadata("call-gone", "patient_id", "pat-1")
+    await csm.update_metadata("call-gone", {"patient_name": "Ann Lee"})
+    assert await csm.verify_and_store("call-gone", "pat-1", "Ann Lee") is None
+    assert not await redis_service.client.exists("call:call-gone:state")
+
+
+def test_is_valid_transition_matches_table():
+    for frm in CallState:
+        for to in CallState:
+            expected = to in VALID_TRANSITIONS.get(frm, set())
+            assert is_valid_transition(frm.code, to.code) is expected
+
+
+def test_state_codes_round_trip():
+    from app.voice.call_state import INT2STATE
+    assert [s.code for s in INT2STATE] == list(range(len(CallState)))
+    assert all(CallState(s.value) is s for s in CallState)
+
+
+@pytest.mark.asyncio
+async def test_close_stops_audit_task(redis_service):
+    machine = CallStateMachine(redis_service)
+    await machine.create_call("call-close")
+    await machine.transition("call-close", CallState.GREETING)
+    task = machine.audit._task
+    assert task is not None
+
+    await machine.close()
+    assert task.done()
+    events = await redis_service.client.xrange("call:call-close:events")
+    assert [e["to"] for _, e in events] == ["ringing", "greeting"]
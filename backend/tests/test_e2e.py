@@ -4,6 +4,7 @@ End-to-End Test for Healthcare Call Flow.
 
 import pytest
 
+@pytest.mark.e2e
 @pytest.mark.asyncio
 async def test_full_call_flow_placeholder():
     # Full E2E testing requires a real voice pipeline (Daily, Deepgram, etc.)
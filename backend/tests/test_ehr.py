@@ -1,15 +1,9 @@
 import pytest
 import uuid
 from datetime import date, timedelta
-from app.services.ehr.mock import MockEHRAdapter
 from app.services.ehr.models import VisitType
 
 
-@pytest.fixture
-def ehr_service():
-    return MockEHRAdapter()
-
-
 @pytest.mark.asyncio
 async def test_lookup_patient(ehr_service):
     # Get a real patient from seed data
@@ -59,6 +53,21 @@ async def test_get_availability(ehr_service):
         assert slot.schedule["reference"].endswith(practitioner_id)
 
 
+@pytest.mark.asyncio
+async def test_get_availability_limit(ehr_service):
+    """A limit returns the earliest slots, in order; the count covers them all."""
+    practitioner_id = list(ehr_service.practitioners.keys())[0]
+    start_date = date.today()
+    end_date = start_date + timedelta(days=14)
+
+    all_slots = await ehr_service.get_availability(practitioner_id, start_date, end_date)
+    limited = await ehr_service.get_availability(practitioner_id, start_date, end_date, limit=3)
+    assert limited == all_slots[:3]
+    assert await ehr_service.count_availability(
+        practitioner_id, start_date, end_date,
+    ) == len(all_slots)
+
+
 @pytest.mark.asyncio
 async def test_book_appointment(ehr_service):
     # Setup
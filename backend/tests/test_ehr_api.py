@@ -2,6 +2,9 @@ import pytest
 from httpx import AsyncClient
 from app.services.ehr.models import VisitType
 
+# A well-formed provider ID that no seeded practitioner has
+_UNKNOWN_PROVIDER_ID = "00000000-0000-4000-8000-000000000000"
+
 
 @pytest.mark.asyncio
 async def test_search_patient_api(client: AsyncClient):
@@ -17,11 +20,8 @@ async def test_search_patient_api(client: AsyncClient):
 
 @pytest.mark.asyncio
 async def test_get_availability_api(client: AsyncClient):
-    import uuid
-    provider_id = str(uuid.uuid4())
-    
     response = await client.get(
-        f"/api/ehr/appointments/available?provider_id={provider_id}&start_date=2025-01-01&end_date=2025-01-05"
+        f"/api/ehr/appointments/available?provider_id={_UNKNOWN_PROVIDER_ID}&start_date=2025-01-01&end_date=2025-01-05"
     )
     assert response.status_code == 200
     assert isinstance(response.json(), list)
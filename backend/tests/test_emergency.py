@@ -4,7 +4,8 @@ Test EmergencyDetector middleware.
 
 import pytest
 import asyncio
-from unittest.mock import AsyncMock, MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
 import sys
 import importlib
 from pipecat.processors.frame_processor import FrameDirection
@@ -31,18 +32,24 @@ class StubLLMMessagesFrame(StubFrame):
     def __init__(self, messages):
         self.messages = messages
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def detector_cls():
-    """Return EmergencyDetector class that inherits from StubFrameProcessor."""
+    """Return EmergencyDetector class that inherits from StubFrameProcessor.
+
+    The module is reloaded against the stubs once for this file (each test
+    builds its own detector); later tests still see the real module.
+    """
     # Create fake modules
-    fake_proc_module = MagicMock()
-    fake_proc_module.FrameProcessor = StubFrameProcessor
-    fake_proc_module.FrameDirection = FrameDirection
-    
-    fake_frames_module = MagicMock()
-    fake_frames_module.Frame = StubFrame
-    fake_frames_module.TranscriptionFrame = StubTranscriptionFrame
-    fake_frames_module.LLMMessagesFrame = StubLLMMessagesFrame
+    # Plain namespaces: `from ... import` only needs the attributes
+    fake_proc_module = SimpleNamespace(
+        FrameProcessor=StubFrameProcessor,
+        FrameDirection=FrameDirection,
+    )
+    fake_frames_module = SimpleNamespace(
+        Frame=StubFrame,
+        TranscriptionFrame=StubTranscriptionFrame,
+        LLMMessagesFrame=StubLLMMessagesFrame,
+    )
 
     with patch.dict(sys.modules, {
         "pipecat.processors.frame_processor": fake_proc_module,
@@ -50,7 +57,12 @@ def detector_cls():
     }):
         import app.voice.emergency
         importlib.reload(app.voice.emergency)
-        return app.voice.emergency.EmergencyDetector
+        detector = app.voice.emergency.EmergencyDetector
+    yield detector
+    # patch.dict drops the module again unless it was imported before; if
+    # it was, the reload above rewrote that module object in place
+    if "app.voice.emergency" in sys.modules:
+        importlib.reload(sys.modules["app.voice.emergency"])
 
 @pytest.mark.asyncio
 async def test_emergency_detector_triggers(detector_cls):
@@ -94,3 +106,32 @@ async def test_emergency_detector_passthrough(detector_cls):
     # Should push only original frame
     assert detector.push_frame.call_count == 1
     assert detector.push_frame.call_args[0][0] == frame
+
+
+@pytest.mark.asyncio
+async def test_emergency_detector_ignores_case(detector_cls):
+    """Test that uppercase speech still matches the lowercase keywords."""
+    detector = detector_cls()
+    detector.push_frame = AsyncMock()
+
+    frame = StubTranscriptionFrame("I have CHEST PAIN right now", "user", "iso")
+
+    await detector.process_frame(frame, FrameDirection.DOWNSTREAM)
+
+    assert detector.push_frame.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_every_keyword_matches(detector_cls):
+    """Test that each emergency keyword triggers the override in speech."""
+    # The module was loaded against stub pipecat modules; read it from the class
+    keywords = detector_cls.process_frame.__globals__["EMERGENCY_KEYWORDS"]
+
+    for keyword in keywords:
+        detector = detector_cls()
+        detector.push_frame = AsyncMock()
+        frame = StubTranscriptionFrame(f"the caller said {keyword.upper()} just now", "user", "iso")
+
+        await detector.process_frame(frame, FrameDirection.DOWNSTREAM)
+
+        assert detector.push_frame.call_count == 2, keyword
@@ -5,6 +5,13 @@ import pytest
 pytestmark = pytest.mark.asyncio
 
 
+class _DownRedis:
+    """Redis stand-in whose ping fails at once."""
+
+    async def ping(self):
+        raise ConnectionError("Redis down")
+
+
 async def test_health_endpoint(client):
     """GET /health returns 200 with status ok and Redis status."""
     response = await client.get("/health")
@@ -24,3 +31,15 @@ async def test_health_detailed_redis_connected(client):
     assert data["services"]["redis"]["status"] == "connected"
     assert "latency_ms" in data["services"]["redis"]
     assert data["services"]["api"]["status"] == "running"
+
+
+async def test_health_detailed_redis_disconnected(client, _asgi_transport):
+    """GET /health/detailed reports degraded when Redis ping fails."""
+    # The client fixture sets app.state afresh for every test
+    _asgi_transport.app.state.redis = _DownRedis()
+    response = await client.get("/health/detailed")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "degraded"
+    assert data["services"]["redis"] == {"status": "disconnected"}
+    assert data["services"]["api"]["status"] == "running"
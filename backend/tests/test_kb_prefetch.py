@@ -4,7 +4,7 @@ import pytest
 import pytest_asyncio
 import asyncio
 import time
-from unittest.mock import AsyncMock, MagicMock
+from types import SimpleNamespace
 
 from app.voice.kb_prefetch import KBPrefetcher, DEBOUNCE_SECONDS
 
@@ -14,21 +14,18 @@ class TestKBPrefetcherCache:
 
     def test_empty_cache_returns_none(self):
         """Cache miss should return None."""
-        kb_mock = MagicMock()
+        kb_mock = SimpleNamespace()
         prefetcher = KBPrefetcher(kb=kb_mock)
         result = prefetcher.get_cached_result("office hours")
         assert result is None
 
     def test_cached_result_returned(self):
         """Manually inserted cache entries should be retrievable."""
-        kb_mock = MagicMock()
+        kb_mock = SimpleNamespace()
         prefetcher = KBPrefetcher(kb=kb_mock)
 
         # Manually populate cache
-        prefetcher._cache["office hours"] = {
-            "results": [{"content": "We are open...", "score": 0.85}],
-            "timestamp": time.monotonic(),
-        }
+        prefetcher._store("office hours", [{"content": "We are open...", "score": 0.85}])
 
         result = prefetcher.get_cached_result("office hours")
         assert result is not None
@@ -37,27 +34,42 @@ class TestKBPrefetcherCache:
 
     def test_stale_cache_returns_none(self):
         """Expired cache entries should not be returned."""
-        kb_mock = MagicMock()
+        kb_mock = SimpleNamespace()
         prefetcher = KBPrefetcher(kb=kb_mock)
 
         # Insert an entry that's already expired
-        prefetcher._cache["old query"] = {
-            "results": [{"content": "stale", "score": 0.7}],
-            "timestamp": time.monotonic() - 20.0,  # 20s ago, way past TTL
-        }
+        prefetcher._store(
+            "old query",
+            [{"content": "stale", "score": 0.7}],
+            now=time.monotonic() - 20.0,  # 20s ago, way past TTL
+        )
 
         result = prefetcher.get_cached_result("old query")
         assert result is None
 
+    def test_stale_entry_evicted_from_cache(self):
+        """Expired entries should be dropped, refreshed ones kept."""
+        kb_mock = SimpleNamespace()
+        prefetcher = KBPrefetcher(kb=kb_mock)
+        now = time.monotonic()
+
+        prefetcher._store("old query", [], now=now - 20.0)
+        prefetcher._store("refreshed", [], now=now - 20.0)
+        prefetcher._store("refreshed", [{"content": "fresh", "score": 0.8}], now=now)
+
+        assert prefetcher.get_cached_result("nothing matches this") is None
+        assert "old query" not in prefetcher._cache
+        assert prefetcher.get_cached_result("refreshed")[0]["content"] == "fresh"
+
     def test_fuzzy_match_on_containment(self):
         """Partial query containment should trigger a fuzzy cache hit."""
-        kb_mock = MagicMock()
+        kb_mock = SimpleNamespace()
         prefetcher = KBPrefetcher(kb=kb_mock)
 
-        prefetcher._cache["what are your office hours"] = {
-            "results": [{"content": "Monday through Friday", "score": 0.9}],
-            "timestamp": time.monotonic(),
-        }
+        prefetcher._store(
+            "what are your office hours",
+            [{"content": "Monday through Friday", "score": 0.9}],
+        )
 
         # Shorter query contained in cached key
         result = prefetcher.get_cached_result("office hours")
@@ -66,11 +78,11 @@ class TestKBPrefetcherCache:
 
     def test_clear_cache(self):
         """clear_cache should empty all entries."""
-        kb_mock = MagicMock()
+        kb_mock = SimpleNamespace()
         prefetcher = KBPrefetcher(kb=kb_mock)
 
-        prefetcher._cache["q1"] = {"results": [], "timestamp": time.monotonic()}
-        prefetcher._cache["q2"] = {"results": [], "timestamp": time.monotonic()}
+        prefetcher._store("q1", [])
+        prefetcher._store("q2", [])
 
         prefetcher.clear_cache()
         assert len(prefetcher._cache) == 0
@@ -81,7 +93,7 @@ class TestKBPrefetcherChunking:
 
     def test_short_text_ignored(self):
         """Texts shorter than MIN_WORDS_FOR_PREFETCH should not trigger prefetch."""
-        kb_mock = MagicMock()
+        kb_mock = SimpleNamespace()
         prefetcher = KBPrefetcher(kb=kb_mock)
 
         # Simulate: _on_partial should not be called for short text
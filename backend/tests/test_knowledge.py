@@ -13,7 +13,11 @@ Key design decisions:
 import pytest
 import pytest_asyncio
 import asyncio
-from app.voice.knowledge import KnowledgeBase, VALLEY_FAMILY_MEDICINE_FAQ, EMBEDDING_CACHE_PREFIX
+from app.voice import knowledge
+from app.voice.knowledge import (
+    KnowledgeBase, VALLEY_FAMILY_MEDICINE_FAQ, EMBEDDING_CACHE_PREFIX, QUERY_CACHE_PREFIX,
+    VECTOR_PREFIX, INDEX_NAME,
+)
 
 
 # ── Shared Fixtures ─────────────────────────────────────────────────────
@@ -30,15 +34,22 @@ async def seeded_kb():
         await kb.redis.ft("idx:knowledge").dropindex(delete_documents=True)
     except Exception:
         pass
+    knowledge._ready_indexes.clear()
 
-    # Clean up any cached embeddings and knowledge keys from prior runs
-    for pattern in [f"{EMBEDDING_CACHE_PREFIX}*", "knowledge:*"]:
-        keys = await kb.redis.keys(pattern)
-        if keys:
-            await kb.redis.delete(*keys)
+    # Clean up any cached embeddings, query results and knowledge keys from prior runs
+    patterns = [f"{EMBEDDING_CACHE_PREFIX}*", f"{QUERY_CACHE_PREFIX}*", "knowledge:*", f"{VECTOR_PREFIX}*"]
+    async with kb.redis.pipeline(transaction=False) as pipe:
+        for pattern in patterns:
+            pipe.keys(pattern)
+        stale = [key for keys in await pipe.execute() for key in keys]
+    if stale:
+        await kb.redis.delete(*stale)
 
     await kb.seed(VALLEY_FAMILY_MEDICINE_FAQ)
-    await asyncio.sleep(2)  # Wait for RediSearch background indexing
+    # Wait for RediSearch background indexing to finish, not a fixed 2s
+    async with asyncio.timeout(10):
+        while int((await kb.redis.ft(INDEX_NAME).info())["indexing"]):
+            await asyncio.sleep(0.05)
 
     yield kb
 
@@ -47,27 +58,33 @@ async def seeded_kb():
 
 # ── Test Cases ──────────────────────────────────────────────────────────
 
-DIRECT_MATCH_QUERIES = [
+def _cases(*rows):
+    """Parametrize rows (query, expected_category, expected_substr), with
+    readable IDs instead of pytest's generated ones."""
+    return tuple(pytest.param(*row, id=row[1]) for row in rows)
+
+
+DIRECT_MATCH_QUERIES = _cases(
     ("When are you open during the week?", "hours", "Monday"),
     ("Where is the clinic located?", "location", "located"),
     ("What's your phone number to call?", "phone", "phone"),
     ("Is there parking available near the building?", "parking", "parking"),
-]
+)
 
-SEMANTIC_MATCH_QUERIES = [
+SEMANTIC_MATCH_QUERIES = _cases(
     ("Do you take Blue Cross insurance?", "insurance", "insurance"),
     ("What if I need to cancel my appointment?", "cancellation", "cancel"),
-]
+)
 
-PARAPHRASED_QUERIES = [
+PARAPHRASED_QUERIES = _cases(
     ("I'm a first-time patient, what should I bring?", "new_patient", "new patient"),
     ("What is the address of your medical office building?", "location", "Valley Blvd"),
-]
+)
 
-INFERENCE_QUERIES = [
+INFERENCE_QUERIES = _cases(
     ("Can I come in on Saturday?", "hours", "closed"),
     ("What happens if I miss my appointment?", "cancellation", "missed"),
-]
+)
 
 
 # ── Core Tests ──────────────────────────────────────────────────────────
@@ -82,6 +99,10 @@ async def test_seed_indexes_all_documents(seeded_kb):
     num_docs = int(info["num_docs"])
     assert num_docs == 7, f"Index has {num_docs} docs, expected 7"
 
+    # Vectors live only in the indexed hashes, never in the content hashes
+    assert not await seeded_kb.redis.hexists("knowledge:hours", "embedding")
+    assert await seeded_kb.redis.hexists(f"{VECTOR_PREFIX}hours", "embedding")
+
 
 @pytest.mark.asyncio(scope="module")
 @pytest.mark.parametrize("query,expected_category,expected_substr", DIRECT_MATCH_QUERIES)
@@ -168,6 +189,15 @@ async def test_embedding_cache_hit(seeded_kb):
     assert len(cache_keys) >= 7, f"Expected >=7 cached embeddings, got {len(cache_keys)}"
 
 
+@pytest.mark.asyncio(scope="module")
+async def test_repeated_query_served_from_cache(seeded_kb):
+    """A repeated question (modulo case/whitespace) should hit the query cache."""
+    first = await seeded_kb.query("What are your office hours?")
+    key = seeded_kb._query_cache_key("  what are your OFFICE hours? ", 1, 0.6, None)
+    assert await seeded_kb.redis.exists(key)
+    assert await seeded_kb.query("  what are your OFFICE hours? ") == first
+
+
 @pytest.mark.asyncio(scope="module")
 async def test_metadata_fields_present(seeded_kb):
     """All query results must include category and source_key metadata."""
@@ -224,3 +254,94 @@ async def test_chunking_long_text(seeded_kb):
     assert len(chunks) >= 3, f"Expected >=3 chunks, got {len(chunks)}"
     # Verify overlap: end of chunk N overlaps with start of chunk N+1
     assert chunks[0][-50:] == chunks[1][:50], "Chunks should overlap"
+
+
+def test_chunking_rejects_overlap_not_smaller_than_chunk():
+    """An overlap >= chunk_size would never advance; it must be rejected."""
+    from app.voice.knowledge import KnowledgeBase as KB
+    with pytest.raises(ValueError, match="overlap"):
+        KB._chunk_text("A" * 1200, chunk_size=100, overlap=100)
+
+
+def test_float16_vectors_preserve_cosine():
+    """Index vectors are FLOAT16; cosine scores must stay within 1% of FP32."""
+    import numpy as np
+    from app.voice.knowledge import EMBEDDING_DIM, _vector_bytes
+
+    rng = np.random.default_rng(0)
+    a, b = rng.standard_normal((2, EMBEDDING_DIM)).astype(np.float32)
+    b = 0.7 * a + 0.3 * b  # a related pair, like a query and its FAQ
+
+    def cos(x, y):
+        return float(x @ y / (np.linalg.norm(x) * np.linalg.norm(y)))
+
+    ha = np.frombuffer(_vector_bytes(a), dtype=np.float16).astype(np.float32)
+    hb = np.frombuffer(_vector_bytes(b), dtype=np.float16).astype(np.float32)
+
+    assert ha.size == EMBEDDING_DIM  # 2 bytes per dimension
+    assert cos(ha, a) > 0.99
+    assert abs(cos(ha, hb) - cos(a, b)) < 0.01
+
+
+def test_index_vector_type_from_ft_info():
+    """The vector TYPE is read from FT.INFO in both reply shapes, so an index
+    built with another type is detected and rebuilt."""
+    from app.voice.knowledge import _index_vector_type
+
+    resp2 = {"attributes": [
+        [b"identifier", b"category", b"attribute", b"category", b"type", b"TAG"],
+        [b"identifier", b"embedding", b"attribute", b"embedding", b"type", b"VECTOR",
+         b"algorithm", b"HNSW", b"data_type", b"INT8", b"dim", 3072],
+    ]}
+    resp3 = {"attributes": [{"identifier": "embedding", "type": "VECTOR", "data_type": "FLOAT16"}]}
+
+    assert _index_vector_type(resp2) == "INT8"
+    assert _index_vector_type(resp3) == "FLOAT16"
+    assert _index_vector_type({"attributes": [[b"type", b"VECTOR"]]}) is None
+
+
+@pytest.mark.asyncio
+async def test_index_rebuild_keeps_every_document_searchable(monkeypatch):
+    """Rebuilding an outdated index gives every knowledge:* document a vector
+    hash, not just the seeded FAQ (dashboard entries are never re-seeded)."""
+    import fakeredis
+    import numpy as np
+    from unittest.mock import AsyncMock, MagicMock
+    from app.voice import knowledge
+
+    # Embeddings are stubbed below; no Gemini client (or API key) is needed
+    monkeypatch.setattr(knowledge, "_get_genai_client", lambda: None)
+    kb = KnowledgeBase("redis://unused")
+    kb.redis = fakeredis.aioredis.FakeRedis()
+    ft = MagicMock(dropindex=AsyncMock())
+    kb.redis.ft = MagicMock(return_value=ft)
+    kb._get_embeddings = AsyncMock(side_effect=lambda texts: [
+        np.full(4, len(text), dtype=np.float32) for text in texts
+    ])
+
+    await kb.redis.hset("knowledge:hours", mapping={
+        "content": "Open 8-5", "category": "hours", "source_key": "hours",
+        "embedding": b"old", "scale": 1.0,
+    })
+    await kb.redis.hset("knowledge:faq_0001", mapping={
+        "content": "Dashboard answer", "category": "faq_0001", "source_key": "faq_0001",
+    })
+
+    await kb._rebuild_index_vectors()
+
+    for doc_id in ("hours", "faq_0001"):
+        vec = await kb.redis.hgetall(f"{VECTOR_PREFIX}{doc_id}")
+        assert vec[b"category"] == doc_id.encode()
+        assert len(vec[b"embedding"]) == 4 * 2  # FLOAT16
+        assert not await kb.redis.hexists(f"knowledge:{doc_id}", "embedding")
+    ft.dropindex.assert_awaited_once_with(delete_documents=False)
+
+    # A failed embedding leaves the legacy layout untouched for a retry
+    await kb.redis.hset("knowledge:new", mapping={"content": "x", "embedding": b"old"})
+    kb._get_embeddings = AsyncMock(side_effect=lambda texts: [None] * len(texts))
+    with pytest.raises(RuntimeError, match="failed to embed"):
+        await kb._rebuild_index_vectors()
+    assert await kb.redis.hexists("knowledge:new", "embedding")
+    assert ft.dropindex.await_count == 1
+
+    await kb.redis.aclose()
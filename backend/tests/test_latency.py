@@ -2,7 +2,7 @@
 
 import pytest
 import time
-from app.voice.latency import LatencyTracker, TurnMetrics
+from app.voice.latency import LatencySketch, LatencyTracker, TurnMetrics
 
 
 class TestTurnMetrics:
@@ -40,6 +40,10 @@ class TestTurnMetrics:
         )
         assert abs(m.total_turn_ms - 1500.0) < 1.0
 
+    def test_slotted(self):
+        """Turns are kept per call; instances carry no per-object __dict__."""
+        assert not hasattr(TurnMetrics(), "__dict__")
+
     def test_zero_when_timestamps_missing(self):
         m = TurnMetrics(turn_id=1)
         assert m.ttft_ms == 0.0
@@ -54,7 +58,7 @@ class TestLatencyTracker:
     def test_initial_state(self):
         tracker = LatencyTracker(call_id="test-001")
         assert tracker._turn_count == 0
-        assert len(tracker._completed_turns) == 0
+        assert tracker._completed_turn_count == 0
 
     def test_mark_tool_timing(self):
         tracker = LatencyTracker(call_id="test-001")
@@ -83,9 +87,67 @@ class TestLatencyTracker:
                 first_audio_out=100.5,
                 llm_complete=101.0,
             )
-            tracker._completed_turns.append(t)
+            tracker._record_turn(t)
 
         summary = tracker.get_summary()
         assert summary["turns"] == 3
         assert summary["ttft"]["p50"] > 0
         assert summary["ttfa"]["p50"] > 0
+        assert abs(summary["ttft"]["p50"] - 300.0) < 1.0
+
+
+class TestLatencySketch:
+    """Tests for the bounded-memory percentile sketch."""
+
+    def test_empty_sketch(self):
+        assert LatencySketch().percentiles() == {"p50": 0, "p95": 0, "p99": 0}
+
+    def test_ignores_missing_metrics(self):
+        sketch = LatencySketch()
+        sketch.add(0.0)
+        assert sketch.count == 0
+
+    def test_quantiles_within_bucket_error(self):
+        sketch = LatencySketch()
+        for v in range(1, 1001):
+            sketch.add(float(v))
+
+        assert abs(sketch.quantile(0.50) - 500) / 500 < 0.05
+        assert abs(sketch.quantile(0.95) - 950) / 950 < 0.05
+        assert abs(sketch.quantile(0.99) - 990) / 990 < 0.05
+
+    def test_memory_bounded_by_range_not_samples(self):
+        sketch = LatencySketch()
+        for i in range(100_000):
+            sketch.add(200.0 + (i % 800))
+        assert sketch.count == 100_000
+        assert len(sketch._buckets) < 40
+
+
+class TestFrameDispatch:
+    """Frame types resolve to the same handler the isinstance chain picked."""
+
+    def test_subclasses_resolve_to_base_handler(self):
+        from pipecat.frames.frames import (
+            AudioRawFrame, TextFrame, TranscriptionFrame, TTSAudioRawFrame,
+        )
+        assert LatencyTracker._resolve_handler(TranscriptionFrame) == "_on_transcription"
+        assert LatencyTracker._resolve_handler(TextFrame) == "_on_text"
+        assert LatencyTracker._resolve_handler(AudioRawFrame) == "_on_audio"
+        assert LatencyTracker._resolve_handler(TTSAudioRawFrame) == "_on_audio"
+
+    def test_unhandled_frame_ignored(self):
+        from pipecat.frames.frames import StartFrame
+        assert LatencyTracker._resolve_handler(StartFrame) is None
+
+    def test_audio_stamped_once_per_turn(self):
+        tracker = LatencyTracker(call_id="test-001")
+        tracker._on_audio(None)  # No user speech yet: nothing to measure
+        assert tracker._current_turn.first_audio_out == 0
+
+        tracker._current_turn.user_speech_end = time.monotonic()
+        tracker._on_audio(None)
+        first = tracker._current_turn.first_audio_out
+        tracker._on_audio(None)
+        assert first > 0
+        assert tracker._current_turn.first_audio_out == first
@@ -0,0 +1,99 @@
+"""
+Tests for RedisService: call state storage and the fallback vector search.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_vector_search_ranks_by_cosine(fake_redis_service):
+    client = fake_redis_service.client
+    await client.hset("kb:hours", mapping={"content": "Open 9-5", "vector": json.dumps([1.0, 0.0, 0.0])})
+    await client.hset("kb:parking", mapping={"content": "Lot B", "vector": json.dumps([0.6, 0.8, 0.0])})
+    await client.hset("kb:zero", mapping={"content": "none", "vector": json.dumps([0.0, 0.0, 0.0])})
+    await client.hset("kb:wrong-dim", mapping={"content": "old", "vector": json.dumps([1.0, 0.0])})
+    # Raw float32 bytes, as read back through a decode_responses client
+    raw = np.array([0.0, 1.0, 0.0], dtype=np.float32).tobytes().decode("latin-1")
+    await client.hset("kb:insurance", mapping={"content": "We take Aetna", "vector": raw})
+
+    results = await fake_redis_service.vector_search([1.0, 0.0, 0.0], k=2)
+
+    assert [r["content"] for r in results] == ["Open 9-5", "Lot B"]
+    assert results[0]["score"] == pytest.approx(1.0)
+    assert results[1]["score"] == pytest.approx(0.6)
+    assert results[0]["metadata"] == {"source": "knowledge_base", "key": "kb:hours"}
+
+    # k larger than the usable vectors returns them all, best first
+    results = await fake_redis_service.vector_search([1.0, 0.0, 0.0], k=10)
+    assert [r["metadata"]["key"] for r in results] == ["kb:hours", "kb:parking", "kb:insurance"]
+
+
+@pytest.mark.asyncio
+async def test_call_state_round_trips_json_fields(fake_redis_service):
+    """JSON fields come back as written; other fields must be strings."""
+    await fake_redis_service.set_call_state("rs-1", {
+        "room_url": "https://x.daily.co/r",
+        "participants": ["p1"],
+        "agent_joined": False,
+        "updated_at": 123,
+    })
+    state = await fake_redis_service.get_call_state("rs-1")
+    assert state == {
+        "room_url": "https://x.daily.co/r",
+        "participants": ["p1"],
+        "agent_joined": False,
+        "updated_at": 123,
+    }
+
+    # A value that would come back as a different type is refused on write
+    with pytest.raises(TypeError, match="room_name"):
+        await fake_redis_service.set_call_state("rs-1", {"room_name": None})
+
+
+@pytest.mark.asyncio
+async def test_legacy_string_call_state_is_upgraded(fake_redis_service):
+    """A state stored as one JSON string by older releases is converted to a
+    hash on first access instead of failing with WRONGTYPE."""
+    client = fake_redis_service.client
+    await client.set("call:rs-2:state", json.dumps({
+        "call_id": "rs-2",
+        "room_name": None,
+        "state": "routing",
+        "participants": ["p1"],
+        "agent_joined": True,
+    }))
+
+    state = await fake_redis_service.get_call_state("rs-2")
+    assert state == {
+        "call_id": "rs-2",
+        "state": "routing",
+        "participants": ["p1"],
+        "agent_joined": True,
+    }
+    assert await client.type("call:rs-2:state") == "hash"
+
+    # Writes upgrade too
+    await client.set("call:rs-3:state", json.dumps({"state": "greeting"}))
+    await fake_redis_service.set_call_state("rs-3", {"status": "active"}, state_code=2)
+    assert await fake_redis_service.get_call_state_with_code("rs-3") == (
+        2, {"state": "greeting", "status": "active"},
+    )
+
+
+@pytest.mark.asyncio
+async def test_field_updates_never_create_a_call(fake_redis_service):
+    """Updating an unknown call leaves no orphan state record behind."""
+    assert await fake_redis_service.set_call_field("rs-ghost", "patient_id", "p1") is False
+    assert await fake_redis_service.update_call_state("rs-ghost", {"status": "active"}) is False
+    assert not await fake_redis_service.client.exists("call:rs-ghost:state")
+
+    await fake_redis_service.set_call_state("rs-4", {"state": "ringing"})
+    assert await fake_redis_service.update_call_state(
+        "rs-4", {"status": "active", "participants": ["p1"]},
+    ) is True
+    assert await fake_redis_service.get_call_state("rs-4") == {
+        "state": "ringing", "status": "active", "participants": ["p1"],
+    }
@@ -2,12 +2,13 @@
 Test the full scheduling flow with mocked EHR and gated tools.
 """
 
-import pytest
+import asyncio
 import json
 from datetime import date, timedelta
 
-from app.services.ehr.mock import MockEHRAdapter
-from app.voice.call_state import CallStateMachine, CallState
+import pytest
+
+from app.voice.call_state import CallState
 from app.voice.tools import (
     execute_verify_patient,
     execute_list_providers,
@@ -15,34 +16,23 @@ from app.voice.tools import (
     execute_book_appointment,
 )
 
-
-@pytest.fixture
-def call_state(redis_service):
-    return CallStateMachine(redis_service)
-
-
-@pytest.fixture
-def ehr_service():
-    return MockEHRAdapter()
+# Availability window for the happy path; MockEHR seeds the next 30 days
+_START_DATE = date.today().isoformat()
+_END_DATE = (date.today() + timedelta(days=5)).isoformat()
 
 
-@pytest.fixture
-def known_patient(ehr_service):
-    return list(ehr_service.patients.values())[0]
-
-
-@pytest.fixture
-def known_provider(ehr_service):
-    return list(ehr_service.practitioners.values())[0]
+@pytest.fixture(scope="session")
+def known_provider(_ehr_seed):
+    return next(iter(_ehr_seed.practitioners.values()))
 
 
 @pytest.mark.asyncio
-async def test_scheduling_flow_happy_path(call_state, ehr_service, known_patient, known_provider):
+async def test_scheduling_flow_happy_path(call_state, ehr_service, patient_identity, known_provider):
     """
     Full flow:
     1. Verify patient -> match
-    2. List providers -> returns list
-    3. Get availability -> returns slots
+    2. List providers -> returns list     } concurrently
+    3. Get availability -> returns slots  }
     4. Book appointment -> success
     """
     call_id = "call-sched-001"
@@ -51,28 +41,25 @@ async def test_scheduling_flow_happy_path(call_state, ehr_service, known_patient
     await call_state.transition(call_id, CallState.ROUTING)
 
     # 1. Verify
-    name = known_patient.name[0].full_name
-    dob = known_patient.birthDate.isoformat()
+    name, dob = patient_identity
     await execute_verify_patient(call_id, call_state, ehr_service, name=name, date_of_birth=dob)
     assert await call_state.get_state(call_id) == CallState.VERIFIED
 
-    # 2. List Providers
-    res_json = await execute_list_providers(call_id, call_state, ehr_service)
-    res = json.loads(res_json)
+    # 2 + 3. List providers and get availability; both are read-only once
+    # verified, so they run concurrently
+    providers_json, avail_json = await asyncio.gather(
+        execute_list_providers(call_id, call_state, ehr_service),
+        execute_get_availability(
+            call_id, call_state, ehr_service,
+            provider_id=known_provider.id, start_date=_START_DATE, end_date=_END_DATE
+        ),
+    )
+
+    res = json.loads(providers_json)
     assert "providers" in res
-    assert len(res["providers"]) > 0
-    provider_id = res["providers"][0]["id"]
+    assert known_provider.id in {p["id"] for p in res["providers"]}
 
-    # 3. Get Availability
-    # Find a date range with slots (MockEHR seeds next 30 days)
-    start_date = date.today().isoformat()
-    end_date = (date.today() + timedelta(days=5)).isoformat()
-    
-    res_json = await execute_get_availability(
-        call_id, call_state, ehr_service,
-        provider_id=provider_id, start_date=start_date, end_date=end_date
-    )
-    res = json.loads(res_json)
+    res = json.loads(avail_json)
     assert "slots" in res
     assert len(res["slots"]) > 0
     slot_id = res["slots"][0]["slot_id"]
@@ -89,21 +76,3 @@ async def test_scheduling_flow_happy_path(call_state, ehr_service, known_patient
     # Check state transition (should go to RESOLVING)
     assert await call_state.get_state(call_id) == CallState.RESOLVING
 
-
-@pytest.mark.asyncio
-async def test_scheduling_gated_before_verify(call_state, ehr_service):
-    """Tools should be blocked if not verified."""
-    call_id = "call-sched-002"
-    await call_state.create_call(call_id)
-    # State is GREETING/ROUTING, not VERIFIED
-
-    # Try list_providers
-    res = json.loads(await execute_list_providers(call_id, call_state, ehr_service))
-    assert res["error"] == "identity_not_verified"
-    
-    # Try book_appointment
-    res = json.loads(await execute_book_appointment(
-        call_id, call_state, ehr_service,
-        slot_id="any", visit_type="routine"
-    ))
-    assert res["error"] == "identity_not_verified"
@@ -33,19 +33,20 @@ class TestGetThinkingPhrase:
 
     def test_per_call_dedup_avoids_repetition(self):
         """Phrases should not repeat within a call (up to pool exhaustion)."""
+        from app.voice.thinking_phrases import RECENT_PHRASE_WINDOW
         call_id = "test-dedup-001"
         clear_call_phrases(call_id)
 
-        # Get all phrases for verify_patient (5 in pool)
+        # One pass over the pool (5 phrases); the last 3 picks are never
+        # repeated, so every run of 4 consecutive picks is distinct
         pool_size = len(TOOL_PHRASES["verify_patient"])
-        seen = set()
-        for _ in range(pool_size):
-            phrase = get_thinking_phrase("verify_patient", call_id=call_id)
-            seen.add(phrase)
-
-        # Should have gotten at least min(pool_size, 4) unique phrases
-        # (tracker keeps last 3, so 4th may be the 1st again)
-        assert len(seen) >= min(pool_size, 3)
+        picks = [
+            get_thinking_phrase("verify_patient", call_id=call_id)
+            for _ in range(pool_size)
+        ]
+        run = RECENT_PHRASE_WINDOW + 1
+        for i in range(len(picks) - run + 1):
+            assert len(set(picks[i:i + run])) == run, picks
 
         clear_call_phrases(call_id)
 
@@ -56,6 +57,9 @@ class TestGetThinkingPhrase:
         get_thinking_phrase("verify_patient", call_id=call_id)
         clear_call_phrases(call_id)
 
+        from app.voice.thinking_phrases import _recent_phrases
+        assert call_id not in _recent_phrases
+
         # After clearing, should be able to get any phrase again
         phrase = get_thinking_phrase("verify_patient", call_id=call_id)
         assert phrase in TOOL_PHRASES["verify_patient"]
@@ -82,3 +86,46 @@ class TestGetThinkingPhrase:
         for tool_name, phrases in TOOL_PHRASES.items():
             assert len(phrases) >= 3, \
                 f"Tool '{tool_name}' has only {len(phrases)} phrases, need >=3"
+
+    def test_pick_excluding_is_uniform_over_remaining(self):
+        """The single-pass pick never returns excluded phrases and covers the rest."""
+        from app.voice.thinking_phrases import _pick_excluding
+        pool = TOOL_PHRASES["verify_patient"]
+        recent = list(pool[:2])
+
+        picks = {_pick_excluding(pool, recent) for _ in range(500)}
+        assert picks == set(pool[2:])
+        assert _pick_excluding(pool, list(pool)) is None
+
+    def test_recent_window_tracks_last_phrases(self):
+        """The recent set always mirrors the last RECENT_PHRASE_WINDOW phrases."""
+        from app.voice.thinking_phrases import _recent_phrases, RECENT_PHRASE_WINDOW
+        call_id = "test-window-001"
+        clear_call_phrases(call_id)
+
+        for _ in range(20):
+            phrase = get_thinking_phrase("verify_patient", call_id=call_id)
+            recent, seen = _recent_phrases[call_id]["verify_patient"]
+            assert recent[-1] == phrase
+            assert len(recent) <= RECENT_PHRASE_WINDOW
+            assert seen == set(recent)
+
+        clear_call_phrases(call_id)
+
+    @pytest.mark.asyncio
+    async def test_call_context_isolates_history(self):
+        """Calls that start their own context never touch the shared fallback."""
+        import asyncio
+        from app.voice.thinking_phrases import _recent_phrases, start_call_phrases
+
+        async def pick(call_id):
+            return get_thinking_phrase("verify_patient", call_id=call_id)
+
+        async def run_call(call_id):
+            start_call_phrases()
+            # Tasks spawned by the call share its history
+            return [await asyncio.create_task(pick(call_id)) for _ in range(3)]
+
+        a, b = await asyncio.gather(run_call("ctx-a"), run_call("ctx-b"))
+        assert len(set(a)) == 3 and len(set(b)) == 3
+        assert "ctx-a" not in _recent_phrases and "ctx-b" not in _recent_phrases
@@ -5,47 +5,29 @@ Test EHR tool wrappers — verify gating, verification flow, and tool dispatch.
 import pytest
 import json
 
-from app.services.ehr.mock import MockEHRAdapter
-from app.voice.call_state import CallStateMachine, CallState
+from app.voice.call_state import CallState
 from app.voice.tools import (
     dispatch_tool,
     execute_verify_patient,
+    execute_list_providers,
     execute_get_availability,
     execute_book_appointment,
     execute_check_insurance,
 )
 
 
-@pytest.fixture
-def ehr_service():
-    return MockEHRAdapter()
-
-
-@pytest.fixture
-def call_state(redis_service):
-    return CallStateMachine(redis_service)
-
-
-@pytest.fixture
-def known_patient(ehr_service):
-    """Get a patient from the mock EHR for testing."""
-    patient = list(ehr_service.patients.values())[0]
-    return patient
-
-
 # ---- verify_patient tests ----
 
 
 @pytest.mark.asyncio
-async def test_verify_patient_match(call_state, ehr_service, known_patient):
+async def test_verify_patient_match(call_state, ehr_service, known_patient, patient_identity):
     """verify_patient with matching name + DOB should succeed and set VERIFIED."""
     call_id = "test-call-001"
     await call_state.create_call(call_id)
     await call_state.transition(call_id, CallState.GREETING)
     await call_state.transition(call_id, CallState.ROUTING)
 
-    name = known_patient.name[0].full_name
-    dob = known_patient.birthDate.isoformat()
+    name, dob = patient_identity
 
     result = json.loads(await execute_verify_patient(
         call_id, call_state, ehr_service, name=name, date_of_birth=dob,
@@ -76,41 +58,43 @@ async def test_verify_patient_no_match(call_state, ehr_service):
 # ---- Gated tools before verification ----
 
 
+# Each gated tool with arguments that would be valid once verified
+GATED_CALLS = (
+    (execute_list_providers, {}),
+    (execute_get_availability, {
+        "provider_id": "any", "start_date": "2025-01-01", "end_date": "2025-01-05",
+    }),
+    (execute_book_appointment, {"slot_id": "any", "visit_type": "routine"}),
+    (execute_check_insurance, {"plan_id": "any"}),
+)
+
+
 @pytest.mark.asyncio
 async def test_gated_tools_before_verification(call_state, ehr_service):
-    """Gated tools should return identity_not_verified error before VERIFIED state."""
+    """Gated tools should return identity_not_verified error before VERIFIED state.
+
+    Checked on a fresh (RINGING) call and again once it reaches ROUTING.
+    """
     call_id = "test-call-003"
-    await call_state.create_call(call_id)
-    await call_state.transition(call_id, CallState.GREETING)
-    await call_state.transition(call_id, CallState.ROUTING)
 
-    # get_availability — gated
-    result = json.loads(await execute_get_availability(
-        call_id, call_state, ehr_service,
-        provider_id="any", start_date="2025-01-01", end_date="2025-01-05",
-    ))
-    assert result["error"] == "identity_not_verified"
+    async def assert_all_gated():
+        for tool, kwargs in GATED_CALLS:
+            result = json.loads(await tool(call_id, call_state, ehr_service, **kwargs))
+            assert result["error"] == "identity_not_verified", tool.__name__
 
-    # book_appointment — gated
-    result = json.loads(await execute_book_appointment(
-        call_id, call_state, ehr_service,
-        slot_id="any", visit_type="routine",
-    ))
-    assert result["error"] == "identity_not_verified"
+    await call_state.create_call(call_id)
+    await assert_all_gated()
 
-    # check_insurance — gated
-    result = json.loads(await execute_check_insurance(
-        call_id, call_state, ehr_service,
-        plan_id="any",
-    ))
-    assert result["error"] == "identity_not_verified"
+    await call_state.transition(call_id, CallState.GREETING)
+    await call_state.transition(call_id, CallState.ROUTING)
+    await assert_all_gated()
 
 
 # ---- Gated tools after verification ----
 
 
 @pytest.mark.asyncio
-async def test_gated_tools_after_verification(call_state, ehr_service, known_patient):
+async def test_gated_tools_after_verification(call_state, ehr_service, patient_identity):
     """After verification, gated tools should execute successfully."""
     call_id = "test-call-004"
     await call_state.create_call(call_id)
@@ -118,8 +102,7 @@ async def test_gated_tools_after_verification(call_state, ehr_service, known_pat
     await call_state.transition(call_id, CallState.ROUTING)
 
     # Verify first
-    name = known_patient.name[0].full_name
-    dob = known_patient.birthDate.isoformat()
+    name, dob = patient_identity
     await execute_verify_patient(
         call_id, call_state, ehr_service, name=name, date_of_birth=dob,
     )
@@ -132,6 +115,36 @@ async def test_gated_tools_after_verification(call_state, ehr_service, known_pat
     ))
     assert "error" not in result
     assert "slots" in result
+    assert result["total_available"] == 0
+
+
+@pytest.mark.asyncio
+async def test_get_availability_reports_total(call_state, ehr_service, patient_identity):
+    """The LLM sees at most MAX_SLOTS_RETURNED slots plus the full count."""
+    from datetime import date, timedelta
+    from app.voice.tools import MAX_SLOTS_RETURNED
+
+    call_id = "test-call-006"
+    await call_state.create_call(call_id)
+    await call_state.transition(call_id, CallState.GREETING)
+    await call_state.transition(call_id, CallState.ROUTING)
+    name, dob = patient_identity
+    await execute_verify_patient(
+        call_id, call_state, ehr_service, name=name, date_of_birth=dob,
+    )
+
+    provider_id = next(iter(ehr_service.practitioners))
+    start = date.today()
+    end = start + timedelta(days=14)
+    total = len(await ehr_service.get_availability(provider_id, start, end))
+    assert total > MAX_SLOTS_RETURNED
+
+    result = json.loads(await execute_get_availability(
+        call_id, call_state, ehr_service,
+        provider_id=provider_id, start_date=start.isoformat(), end_date=end.isoformat(),
+    ))
+    assert len(result["slots"]) == MAX_SLOTS_RETURNED
+    assert result["total_available"] == total
 
 
 # ---- dispatch_tool ----
@@ -147,15 +160,14 @@ async def test_dispatch_unknown_tool(call_state, ehr_service):
 
 
 @pytest.mark.asyncio
-async def test_dispatch_verify_patient(call_state, ehr_service, known_patient):
+async def test_dispatch_verify_patient(call_state, ehr_service, patient_identity):
     """dispatch_tool routes verify_patient correctly."""
     call_id = "test-call-005"
     await call_state.create_call(call_id)
     await call_state.transition(call_id, CallState.GREETING)
     await call_state.transition(call_id, CallState.ROUTING)
 
-    name = known_patient.name[0].full_name
-    dob = known_patient.birthDate.isoformat()
+    name, dob = patient_identity
 
     result = json.loads(await dispatch_tool(
         "verify_patient",
@@ -163,3 +175,89 @@ async def test_dispatch_verify_patient(call_state, ehr_service, known_patient):
         call_id, call_state, ehr_service,
     ))
     assert result["verified"] is True
+
+
+@pytest.mark.asyncio
+async def test_dispatch_rejects_invalid_arguments(call_state, ehr_service):
+    """Arguments that do not match the tool's model never reach the handler."""
+    result = json.loads(await dispatch_tool(
+        "book_appointment",
+        {"slot_id": "slot-1", "visit_type": "spa_day"},
+        "call-x", call_state, ehr_service,
+    ))
+    assert result["error"] == "invalid_arguments"
+    assert "visit_type" in result["message"]
+
+    result = json.loads(await dispatch_tool(
+        "verify_patient", {"name": "Jane"}, "call-x", call_state, ehr_service,
+    ))
+    assert result["error"] == "invalid_arguments"
+    assert "date_of_birth" in result["message"]
+
+
+# ---- schema constants ----
+
+
+def test_precomputed_tool_functions_match_schemas():
+    """Import-time name lookup stays in sync with TOOL_SCHEMAS."""
+    from app.voice.tools import TOOL_FUNCTIONS, TOOL_SCHEMAS
+    assert list(TOOL_FUNCTIONS) == [t["function"]["name"] for t in TOOL_SCHEMAS]
+
+
+def test_schemas_generated_from_argument_models():
+    """Every tool has a handler and an argument model; schemas carry no titles."""
+    from app.voice.tools import TOOL_ARGS, TOOL_HANDLERS, TOOL_SCHEMAS
+    assert set(TOOL_ARGS) == set(TOOL_HANDLERS) == {t["function"]["name"] for t in TOOL_SCHEMAS}
+    book = next(t["function"] for t in TOOL_SCHEMAS if t["function"]["name"] == "book_appointment")
+    assert book["parameters"]["required"] == ["slot_id", "visit_type"]
+    assert book["parameters"]["properties"]["visit_type"]["enum"] == [
+        "routine", "urgent", "checkup", "followup",
+    ]
+    assert '"title"' not in json.dumps(TOOL_SCHEMAS)
+
+
+# ---- search_knowledge_base answer cache ----
+
+
+@pytest.mark.asyncio
+async def test_repeated_kb_question_served_from_cache():
+    """A repeated question (modulo case/whitespace) skips the KB lookup."""
+    from unittest.mock import AsyncMock
+    from app.voice import tools
+
+    tools._kb_responses.clear()
+    kb = AsyncMock()
+    kb.query.return_value = [{"content": "8 to 5", "score": 0.9, "category": "hours"}]
+
+    first = await tools.execute_search_knowledge_base(None, None, None, query="Office hours?", kb=kb)
+    second = await tools.execute_search_knowledge_base(None, None, None, query="  office HOURS? ", kb=kb)
+
+    assert first == second
+    assert b"8 to 5" in first
+    kb.query.assert_awaited_once()
+
+    # Editing the KB drops cached answers
+    tools.clear_kb_response_cache()
+    await tools.execute_search_knowledge_base(None, None, None, query="Office hours?", kb=kb)
+    assert kb.query.await_count == 2
+    tools._kb_responses.clear()
+
+
+@pytest.mark.asyncio
+async def test_empty_kb_result_not_cached():
+    """An empty result may be a failed lookup, so the next ask queries again."""
+    from unittest.mock import AsyncMock
+    from app.voice import tools
+
+    tools._kb_responses.clear()
+    kb = AsyncMock()
+    kb.query.return_value = []
+
+    first = await tools.execute_search_knowledge_base(None, None, None, query="Parking?", kb=kb)
+    assert first == tools._KB_NO_RESULTS
+
+    kb.query.return_value = [{"content": "Free lot", "score": 0.9, "category": "parking"}]
+    second = await tools.execute_search_knowledge_base(None, None, None, query="Parking?", kb=kb)
+    assert b"Free lot" in second
+    assert kb.query.await_count == 2
+    tools._kb_responses.clear()
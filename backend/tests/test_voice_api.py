@@ -1,5 +1,6 @@
-import pytest
 import json
+
+import pytest
 from httpx import AsyncClient
 
 @pytest.mark.asyncio
@@ -14,8 +15,8 @@ async def test_create_call(client: AsyncClient, redis_client):
         assert "call_id" in data
         assert "room_url" in data
         # Verify in Redis
-        saved = await redis_client.get(f"call:{data['call_id']}:state")
-        assert saved is not None
+        saved = await redis_client.hgetall(f"call:{data['call_id']}:state")
+        assert saved
     elif response.status_code == 500:
         assert "Daily API key" in response.json()["detail"] or "Failed" in response.json()["detail"]
 
@@ -24,25 +25,40 @@ async def test_create_call(client: AsyncClient, redis_client):
 async def test_join_agent(client: AsyncClient, redis_client):
     # Seed a call
     call_id = "test-join-123"
-    await redis_client.set(f"call:{call_id}:state", json.dumps({
+    await redis_client.hset(f"call:{call_id}:state", mapping={
         "call_id": call_id,
         "room_url": "https://test.daily.co/room",
         "room_name": "room",
-        "agent_joined": False
-    }))
+        "agent_joined": json.dumps(False),
+    })
     
     response = await client.post(f"/api/voice/{call_id}/join-agent")
     assert response.status_code == 200
     data = response.json()
     assert data["success"] is True
     
-    # Verify state updated in Redis (wait for background task)
-    for _ in range(10):
-        saved_data = await redis_client.get(f"call:{call_id}:state")
-        if saved_data:
-            saved = json.loads(saved_data)
-            if saved.get("agent_joined"):
-                break
-        await asyncio.sleep(0.2)
-    
-    assert saved["agent_joined"] is True
+    # Verify state updated in Redis; under pytest the endpoint awaits the
+    # agent handler before responding, so there is nothing to wait for
+    saved = await redis_client.hgetall(f"call:{call_id}:state")
+    assert json.loads(saved["agent_joined"]) is True
+
+
+@pytest.mark.asyncio
+async def test_agent_join_keeps_newer_call_state(client: AsyncClient, redis_client):
+    """The agent handler writes only what it changes, not its stale snapshot."""
+    from app.routers.voice import start_agent_handler
+
+    call_id = "test-join-stale"
+    stale = {"call_id": call_id, "room_url": "https://test.daily.co/room",
+             "room_name": "room", "state": "ringing", "agent_joined": False}
+    await redis_client.hset(f"call:{call_id}:state", mapping={
+        "call_id": call_id,
+        "state": "greeting",
+        "agent_joined": json.dumps(False),
+    })
+
+    await start_agent_handler(call_id, stale)
+
+    saved = await redis_client.hgetall(f"call:{call_id}:state")
+    assert saved["state"] == "greeting"
+    assert json.loads(saved["agent_joined"]) is True